@@ -1,24 +1,44 @@
 import logging
+from collections.abc import Iterable, Sequence
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from pydantic import BaseModel
+from sqlalchemy import CompoundSelect, delete, func, insert, literal, Row, select, Select, Text, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased
 from starlette import status
 
 from app.api.organization.schemas import ActivityCreate
-from app.api.activity.schemas import OrgActivResponse
+from app.api.activity.schemas import ActivityTreeImport, MAX_ACTIVITY_DEPTH
+from app.api.activity.tree import activity_tree
+from app.api.building.cache import geo_cache
+from app.api.organization.projection import buildings, CREATED_AT_FORMAT, fetch_json, organizations
+from app.api.suggest.index import ACTIVITY, suggest_index
 from app.dao.base import BaseDAO
-from app.models import Activity, Organization
+from app.dao.hooks import after_commit, commit_state
+from app.dao.pagination import Page, PageParams
+from app.models import Activity, ActivityClosure, ActivityTreeVersion, OrganizationActivity
 
 logger = logging.getLogger(__name__)
 
+# id деятельностей со сменённым parent_id: копит _after_update, забирает _sync_closure
+_MOVED_KEY = "activity_closure_moved"
+# изменения снимка дерева за транзакцию и версия дерева после неё, см. _tree_state
+_TREE_KEY = "activity_tree_changes"
+
 
 class ActivityDao(BaseDAO):
     model = Activity
+    old_columns = ("name", "parent_id")
 
     @classmethod
-    async def get_orgs_by_activity_name(cls, session: AsyncSession, activity_name: str) -> list[OrgActivResponse]:
+    async def get_orgs_by_activity_name(
+        cls,
+        session: AsyncSession,
+        activity_name: str,
+        include_descendants: bool = False,
+        page: PageParams = PageParams(),
+    ) -> Page[str]:
         # можно new join
         # query = (
         #     select(
@@ -47,41 +67,79 @@ class ActivityDao(BaseDAO):
         #
         # return results
 
+        org_ids = cls.org_ids_by_activity_name(activity_name, include_descendants)
+
+        # JSON-массив OrgActivResponse собирает Postgres; возвращаем готовое тело ответа
         query = (
-            select(Organization)
-            .join(Organization.activities)
-            .where(cls.model.name == activity_name)
-            .options(selectinload(Organization.building))
-        )
-        result = await session.execute(query)
-        organizations = result.scalars().all()
-
-        if not organizations:
-            logger.info(f"Организации для вида деятельности {activity_name}не найдены.")
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Вид деятельности не найден.")
-
-        results = [
-            OrgActivResponse(
-                id=org.id,
-                created_at=org.created_at,
-                name=org.name,
-                phone_numbers=org.phone_numbers,
-                address=org.building.address,
-                activities=activity_name,
+            select(
+                organizations.c.id,
+                func.to_char(organizations.c.created_at, CREATED_AT_FORMAT).label("created_at"),
+                organizations.c.name,
+                organizations.c.phone_numbers,
+                buildings.c.address,
+                literal(activity_name, Text).label("activities"),
             )
-            for org in organizations
-        ]
-        logger.info(f"Найдено организаций: {len(results)} для вида деятельности: {activity_name}")
+            .join(buildings, buildings.c.id == organizations.c.building_id)
+            .where(organizations.c.id.in_(org_ids))
+        )
+        result_page = await fetch_json(session, query, page)
+
+        # пустая страница после курсора — просто конец списка; 404 — только если такого вида деятельности нет
+        if result_page.items == "[]" and page.cursor is None:
+            exists = await session.scalar(select(select(cls.model.id).where(cls.model.name == activity_name).exists()))
+            if not exists:
+                logger.info(f"Вид деятельности {activity_name} не найден.")
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Вид деятельности не найден.")
+
+        logger.info(f"Организации для вида деятельности: {activity_name}, ответ {len(result_page.items)} символов")
+
+        return result_page
 
-        return results
+    @classmethod
+    def org_ids_by_activity_name(cls, activity_name: str, include_descendants: bool = False) -> Select | CompoundSelect:
+        """Подзапрос id организаций с видом деятельности activity_name (и, если нужно, всеми вложенными)."""
+        tree, version = activity_tree.tree, activity_tree.version
+        snapshot_ids = tree.ids_by_name(activity_name) if version is not None else ()
+        if include_descendants:
+            snapshot_ids = tree.subtree(snapshot_ids)
+        activity_ids = cls._activity_ids_by_name(activity_name, include_descendants)
+        org_ids = select(OrganizationActivity.organization_id)
+        if not snapshot_ids:
+            return org_ids.where(OrganizationActivity.activity_id.in_(activity_ids))
+        # имя -> id и поддерево берём из снимка дерева в памяти, в БД только organization_activity; если
+        # снимок старше дерева в БД — из БД. Условие на версию не зависит от строк: Postgres проверяет его
+        # один раз (One-Time Filter) и выполняет только одну ветку
+        db_version = select(ActivityTreeVersion.version).scalar_subquery()
+        return union_all(
+            org_ids.where(db_version == version, OrganizationActivity.activity_id.in_(snapshot_ids)),
+            org_ids.where(db_version != version, OrganizationActivity.activity_id.in_(activity_ids)),
+        )
+
+    @classmethod
+    def _activity_ids_by_name(cls, activity_name: str, include_descendants: bool) -> Select:
+        if include_descendants:
+            # всё поддерево одним запросом: имя -> closure (ancestor_id, descendant_id) -> organization_activity
+            return (
+                select(ActivityClosure.descendant_id)
+                .join(cls.model, cls.model.id == ActivityClosure.ancestor_id)
+                .where(cls.model.name == activity_name)
+            )
+        return select(cls.model.id).where(cls.model.name == activity_name)
 
     @classmethod
     async def _check_activity_depth(cls, session: AsyncSession, activity_id: int, current_depth: int = 1) -> None:
         logger.info(f"current_depth: {current_depth}")
+        tree = activity_tree.tree
+        in_tree = activity_id in tree
+        if in_tree:
+            # глубина предка известна из снимка дерева — без обхода родителей по БД
+            current_depth += tree.depths[activity_id]
         if current_depth > 2:
             logger.warning("Достигнут максимальный уровень вложенности (3 уровня).")
             raise ValueError("Достигнут максимальный уровень вложенности (3 уровня).")
 
+        if in_tree:
+            return
         parent_activity = await session.get(cls.model, activity_id)
         if parent_activity and parent_activity.parent_id:
             await cls._check_activity_depth(session, parent_activity.parent_id, current_depth + 1)
@@ -94,5 +152,230 @@ class ActivityDao(BaseDAO):
             await cls._check_activity_depth(session, new_activity.parent_id)
 
         session.add(new_activity)
+        await session.flush()
+        await cls._add_closure(session, new_activity)
+        cls._after_add(session, [new_activity])
+        await cls._read_tree_version(session)
         await session.commit()
         return new_activity
+
+    @classmethod
+    async def import_tree(cls, session: AsyncSession, tree: ActivityTreeImport) -> list[list[Activity]]:
+        """
+        Массовая загрузка дерева: по одному INSERT ... RETURNING на уровень, замыкание — одним INSERT.
+
+        Глубина уже проверена схемой; коммит — на вызывающей стороне, одной транзакцией.
+        """
+        levels: list[list[Activity]] = []
+        # пути от корня для каждого узла предыдущего уровня — из них строится замыкание
+        parent_paths: list[list[int]] = []
+        closure_rows = []
+        for level in tree.levels():
+            parents = levels[-1] if levels else []
+            rows = [
+                {"name": name, "parent_id": parents[parent].id if parent is not None else None}
+                for name, parent in level
+            ]
+            result = await session.scalars(
+                insert(cls.model).returning(cls.model, sort_by_parameter_order=True),
+                rows,
+            )
+            activities = list(result.all())
+
+            paths = []
+            for activity, (_, parent) in zip(activities, level):
+                path = [*(parent_paths[parent] if parent is not None else []), activity.id]
+                paths.append(path)
+                closure_rows.extend(
+                    {"ancestor_id": ancestor_id, "descendant_id": activity.id, "depth": len(path) - 1 - depth}
+                    for depth, ancestor_id in enumerate(path)
+                )
+            levels.append(activities)
+            parent_paths = paths
+
+        if closure_rows:
+            await session.execute(insert(ActivityClosure), closure_rows)
+        cls._after_add(session, [activity for activities in levels for activity in activities])
+        await cls._read_tree_version(session)
+        logger.info(f"Загружено деятельностей: {sum(map(len, levels))}, по уровням: {[len(a) for a in levels]}")
+        return levels
+
+    # общие методы записи BaseDAO не знают о замыкании: после них пересобираем его для новых и перенесённых узлов
+    @classmethod
+    async def add(cls, session: AsyncSession, values: BaseModel, orm: bool = False) -> Row | Activity:
+        new_activity = await super().add(session, values, orm)
+        await cls._after_write(session, [new_activity.id])
+        return new_activity
+
+    @classmethod
+    async def add_many(
+        cls,
+        session: AsyncSession,
+        instances: list[BaseModel],
+        chunk_size: int | None = None,
+        orm: bool = False,
+    ) -> list[Row] | list[Activity]:
+        new_activities = await super().add_many(session, instances, chunk_size, orm)
+        await cls._after_write(session, [activity.id for activity in new_activities])
+        return new_activities
+
+    @classmethod
+    async def upsert_many(
+        cls,
+        session: AsyncSession,
+        records: list[BaseModel],
+        conflict: Sequence[str] | None = None,
+        update: Sequence[str] = (),
+        chunk_size: int | None = None,
+    ) -> list[Row]:
+        rows = await super().upsert_many(session, records, conflict, update, chunk_size)
+        await cls._after_write(session, [row.id for row in rows if row.inserted])
+        return rows
+
+    @classmethod
+    async def update(cls, session: AsyncSession, filters: BaseModel, values: BaseModel):
+        updated = await super().update(session, filters, values)
+        await cls._after_write(session)
+        return updated
+
+    @classmethod
+    async def delete(cls, session: AsyncSession, filters: BaseModel):
+        deleted = await super().delete(session, filters)
+        await cls._read_tree_version(session)
+        return deleted
+
+    @classmethod
+    async def bulk_update_chunks(
+        cls,
+        session: AsyncSession,
+        records: list[BaseModel],
+        chunk_size: int | None = None,
+    ) -> list[int]:
+        rowcounts = await super().bulk_update_chunks(session, records, chunk_size)
+        await cls._after_write(session)
+        return rowcounts
+
+    @classmethod
+    async def _after_write(cls, session: AsyncSession, added_ids: Iterable[int] = ()) -> None:
+        await cls._sync_closure(session, added_ids)
+        await cls._read_tree_version(session)
+
+    @classmethod
+    async def _sync_closure(cls, session: AsyncSession, added_ids: Iterable[int] = ()) -> None:
+        """
+        Пересобрать замыкание новых и перенесённых (из _after_update) узлов вместе с их поддеревьями.
+
+        Пути строятся заново по parent_id; узел глубже MAX_ACTIVITY_DEPTH уровней или цикл — ValueError,
+        транзакцию откатывает вызывающая сторона.
+        """
+        activity_ids = {*added_ids, *session.sync_session.info.pop(_MOVED_KEY, ())}
+        if not activity_ids:
+            return
+        max_depth = MAX_ACTIVITY_DEPTH - 1
+        child = aliased(cls.model)
+        # поддерево вниз по parent_id; ограничение глубины обрывает рекурсию на цикле
+        subtree = select(cls.model.id, literal(0).label("depth")).where(cls.model.id.in_(activity_ids))
+        subtree = subtree.cte("subtree", recursive=True)
+        subtree = subtree.union(
+            select(child.id, subtree.c.depth + 1)
+            .join(subtree, child.parent_id == subtree.c.id)
+            .where(subtree.c.depth <= max_depth),
+        )
+        subtree_ids = select(subtree.c.id).scalar_subquery()
+        # пути вверх от каждого узла поддерева: (предок, узел, глубина)
+        parent = aliased(cls.model)
+        paths = select(
+            cls.model.id.label("ancestor_id"),
+            cls.model.id.label("descendant_id"),
+            literal(0).label("depth"),
+            cls.model.parent_id,
+        ).where(cls.model.id.in_(subtree_ids))
+        paths = paths.cte("paths", recursive=True)
+        paths = paths.union_all(
+            select(parent.id, paths.c.descendant_id, paths.c.depth + 1, parent.parent_id)
+            .join(paths, parent.id == paths.c.parent_id)
+            .where(paths.c.depth <= max_depth),
+        )
+        rows = (await session.execute(select(paths.c.ancestor_id, paths.c.descendant_id, paths.c.depth))).all()
+        if any(row.depth > max_depth for row in rows):
+            logger.warning(f"Достигнут максимальный уровень вложенности ({MAX_ACTIVITY_DEPTH} уровня).")
+            raise ValueError(f"Достигнут максимальный уровень вложенности ({MAX_ACTIVITY_DEPTH} уровня).")
+        if not rows:
+            return
+
+        descendant_ids = {row.descendant_id for row in rows}
+        await session.execute(delete(ActivityClosure).where(ActivityClosure.descendant_id.in_(descendant_ids)))
+        await session.execute(insert(ActivityClosure), [row._asdict() for row in rows])
+        logger.info(f"Замыкание пересобрано для {len(descendant_ids)} деятельностей, путей: {len(rows)}")
+
+    # снимок дерева в памяти подменяется только после коммита, один раз на транзакцию
+    @classmethod
+    def _tree_state(cls, session: AsyncSession) -> dict:
+        return commit_state(session, _TREE_KEY, _apply_tree_changes)
+
+    @classmethod
+    async def _read_tree_version(cls, session: AsyncSession) -> None:
+        # версия после записей этой транзакции; строка версии заблокирована до коммита
+        cls._tree_state(session)["version"] = await session.scalar(select(ActivityTreeVersion.version))
+
+    @classmethod
+    def _after_add(cls, session: AsyncSession, instances: list[Activity | Row]) -> None:
+        changes = cls._tree_state(session).setdefault("changes", {})
+        for activity in instances:
+            changes[activity.id] = (activity.id, activity.name, activity.parent_id)
+        names = [activity.name for activity in instances]
+        after_commit(session, lambda: suggest_index.add(ACTIVITY, names))
+
+    @classmethod
+    def _after_update(cls, session: AsyncSession, rows: list[Row]) -> None:
+        changes = cls._tree_state(session).setdefault("changes", {})
+        for row in rows:
+            changes[row.id] = (row.id, row.name, row.parent_id)
+        moved = [row.id for row in rows if row.parent_id != row.old_parent_id]
+        if moved:
+            session.sync_session.info.setdefault(_MOVED_KEY, set()).update(moved)
+        renamed = [(row.old_name, row.name) for row in rows if row.old_name != row.name]
+        if renamed:
+            # названия деятельностей входят в ответ геопоиска
+            after_commit(session, lambda: geo_cache.invalidate(activity_names=[old for old, _ in renamed]))
+            after_commit(session, lambda: suggest_index.remove(ACTIVITY, [old for old, _ in renamed]))
+            after_commit(session, lambda: suggest_index.add(ACTIVITY, [new for _, new in renamed]))
+
+    @classmethod
+    def _after_delete(cls, session: AsyncSession, rows: list[Row]) -> None:
+        changes = cls._tree_state(session).setdefault("changes", {})
+        for row in rows:
+            changes[row.id] = None
+        names = [row.name for row in rows]
+        after_commit(session, lambda: geo_cache.invalidate(activity_names=names))
+        after_commit(session, lambda: suggest_index.remove(ACTIVITY, names))
+
+    @classmethod
+    async def _add_closure(cls, session: AsyncSession, activity: Activity) -> None:
+        # пути нового листа: (сам, сам, 0) и (предок родителя, новый, глубина + 1)
+        paths = select(
+            literal(activity.id).label("ancestor_id"),
+            literal(activity.id).label("descendant_id"),
+            literal(0).label("depth"),
+        )
+        if activity.parent_id:
+            paths = paths.union_all(
+                select(
+                    ActivityClosure.ancestor_id,
+                    literal(activity.id),
+                    ActivityClosure.depth + 1,
+                ).where(ActivityClosure.descendant_id == activity.parent_id),
+            )
+        await session.execute(
+            insert(ActivityClosure).from_select(["ancestor_id", "descendant_id", "depth"], paths),
+        )
+
+
+def _apply_tree_changes(state: dict) -> None:
+    # None — узел удалён
+    changes = state.get("changes", {})
+    activity_tree.apply(
+        upserts=[row for row in changes.values() if row is not None],
+        deleted_ids=[activity_id for activity_id, row in changes.items() if row is None],
+        version=state.get("version"),
+    )
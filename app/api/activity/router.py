@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Query, Depends
+from fastapi import APIRouter, Query, Depends, Response
 from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from app.api.activity.dao import ActivityDao
-from app.api.activity.schemas import OrgActivResponse
-from app.dependencies.dao_dep import get_session_without_commit
+from app.api.activity.schemas import ActivityTreeImport, ActivityTreeImportResult, OrgActivResponse
+from app.dao.pagination import PageParams
+from app.dependencies.dao_dep import get_session_with_commit, get_session_without_commit
+from app.dependencies.pagination_dep import get_page_params
 
 router = APIRouter(
     prefix="/activities",
@@ -22,6 +24,25 @@ router = APIRouter(
 )
 async def get_organizations_by_activity(
     activity_name: str = Query(..., example="Еда"),
+    include_descendants: bool = Query(False, description="Искать и во всех вложенных видах деятельности"),
+    page: PageParams = Depends(get_page_params),
     db: AsyncSession = Depends(get_session_without_commit),
 ):
-    return await ActivityDao.get_orgs_by_activity_name(db, activity_name)
+    # тело ответа уже сериализовано в Postgres — отдаём как есть, без валидации и повторной сериализации
+    result_page = await ActivityDao.get_orgs_by_activity_name(db, activity_name, include_descendants, page)
+    return Response(content=result_page.items, media_type="application/json", headers=result_page.headers)
+
+
+@router.post(
+    "/tree",
+    status_code=status.HTTP_201_CREATED,
+    response_model=ActivityTreeImportResult,
+    response_class=ORJSONResponse,
+    summary="Загрузить дерево деятельностей целиком (одна транзакция)",
+)
+async def import_activity_tree(
+    tree: ActivityTreeImport,
+    db: AsyncSession = Depends(get_session_with_commit),
+):
+    levels = await ActivityDao.import_tree(db, tree)
+    return ActivityTreeImportResult(created=sum(map(len, levels)), levels=[len(level) for level in levels])
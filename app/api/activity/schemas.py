@@ -1,6 +1,14 @@
-from pydantic import Field
+from typing import Annotated, Self
+
+from pydantic import BaseModel, Field, model_validator, RootModel, StringConstraints
 from app.api.organization.schemas import OrganizationBase, ResponseSchema
 
+MAX_ACTIVITY_DEPTH = 3
+
+ActivityName = Annotated[str, StringConstraints(min_length=1, max_length=50)]
+# узел: словарь {имя: поддерево} или список листьев, как ACTIVITY_HIERARCHY
+type ActivityHierarchy = dict[ActivityName, ActivityHierarchy] | list[ActivityName]
+
 
 class OrgActivResponse(OrganizationBase, ResponseSchema):
     address: str = Field(description="Название здания", examples=["Блюхера, 32/1"])
@@ -8,3 +16,39 @@ class OrgActivResponse(OrganizationBase, ResponseSchema):
         description="Название деятельности",
         examples=["Молочная продукция", "Мясная продукция"],
     )
+
+
+class ActivityTreeImport(RootModel[dict[ActivityName, ActivityHierarchy]]):
+    """Дерево деятельностей для массовой загрузки: {корень: {потомок: [лист, ...]}}."""
+
+    root: dict[ActivityName, ActivityHierarchy] = Field(
+        examples=[{"Еда": {"Мясная продукция": ["Говядина", "Свинина"], "Молочная продукция": ["Молоко"]}}],
+    )
+
+    @model_validator(mode="after")
+    def check_depth(self) -> Self:
+        if len(self.levels()) > MAX_ACTIVITY_DEPTH:
+            raise ValueError(f"Достигнут максимальный уровень вложенности ({MAX_ACTIVITY_DEPTH} уровня).")
+        return self
+
+    def levels(self) -> list[list[tuple[str, int | None]]]:
+        """Узлы по уровням: (имя, индекс родителя в предыдущем уровне)."""
+        levels: list[list[tuple[str, int | None]]] = []
+        nodes: list[tuple[str, ActivityHierarchy | None, int | None]] = [
+            (name, children, None) for name, children in self.root.items()
+        ]
+        while nodes:
+            levels.append([(name, parent) for name, _, parent in nodes])
+            next_nodes = []
+            for index, (_, children, _) in enumerate(nodes):
+                if isinstance(children, dict):
+                    next_nodes.extend((name, grandchildren, index) for name, grandchildren in children.items())
+                elif children:
+                    next_nodes.extend((name, None, index) for name in children)
+            nodes = next_nodes
+        return levels
+
+
+class ActivityTreeImportResult(BaseModel):
+    created: int = Field(description="Создано деятельностей", examples=[21])
+    levels: list[int] = Field(description="Создано на каждом уровне, начиная с корней", examples=[[3, 8, 10]])
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+from collections.abc import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dao.database import async_session_maker
+from app.models import Activity, ActivityTreeVersion
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityTree:
+    """
+    Неизменяемый снимок дерева деятельностей: родитель, глубина (корень — 0), дети и индекс по имени.
+
+    Снимок не меняется после публикации; изменения порождают новый снимок, который подменяется целиком.
+    """
+
+    __slots__ = ("names", "parents", "depths", "children", "by_name")
+
+    def __init__(self, rows: Iterable[tuple[int, str, int | None]]):
+        self.names: dict[int, str] = {}
+        self.parents: dict[int, int | None] = {}
+        for activity_id, name, parent_id in rows:
+            self.names[activity_id] = name
+            self.parents[activity_id] = parent_id
+
+        children: dict[int, list[int]] = {}
+        by_name: dict[str, list[int]] = {}
+        for activity_id, parent_id in self.parents.items():
+            by_name.setdefault(self.names[activity_id], []).append(activity_id)
+            if parent_id is not None:
+                children.setdefault(parent_id, []).append(activity_id)
+        self.children: dict[int, tuple[int, ...]] = {key: tuple(sorted(ids)) for key, ids in children.items()}
+        self.by_name: dict[str, tuple[int, ...]] = {key: tuple(sorted(ids)) for key, ids in by_name.items()}
+
+        # глубины обходом от корней; узлы с потерянным родителем считаются корнями
+        self.depths: dict[int, int] = {}
+        stack = [(activity_id, 0) for activity_id, parent_id in self.parents.items() if parent_id not in self.parents]
+        while stack:
+            activity_id, depth = stack.pop()
+            self.depths[activity_id] = depth
+            stack.extend((child_id, depth + 1) for child_id in self.children.get(activity_id, ()))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, activity_id: int) -> bool:
+        return activity_id in self.names
+
+    def ids_by_name(self, name: str) -> tuple[int, ...]:
+        return self.by_name.get(name, ())
+
+    def subtree(self, activity_ids: Iterable[int]) -> list[int]:
+        """Узлы вместе со всеми потомками."""
+        result = []
+        stack = list(activity_ids)
+        while stack:
+            activity_id = stack.pop()
+            result.append(activity_id)
+            stack.extend(self.children.get(activity_id, ()))
+        return result
+
+    def with_changes(
+        self,
+        upserts: Iterable[tuple[int, str, int | None]] = (),
+        deleted_ids: Iterable[int] = (),
+    ) -> "ActivityTree":
+        """
+        Новый снимок с добавленными/изменёнными (id, name, parent_id) и без удалённых узлов.
+
+        Словари копируются, а пересчитываются только затронутые узлы: списки детей и имён, глубины
+        перенесённых поддеревьев.
+        """
+        tree = ActivityTree([])
+        tree.names, tree.parents, tree.depths = dict(self.names), dict(self.parents), dict(self.depths)
+        tree.children, tree.by_name = dict(self.children), dict(self.by_name)
+        # узлы, глубина которых могла измениться вместе с поддеревом
+        moved: list[int] = []
+        for activity_id in deleted_ids:
+            if activity_id in tree.names:
+                tree._unlink(activity_id)
+                del tree.names[activity_id], tree.parents[activity_id], tree.depths[activity_id]
+                moved.extend(tree.children.get(activity_id, ()))  # потерявшие родителя считаются корнями
+        for activity_id, name, parent_id in upserts:
+            known = activity_id in tree.names
+            if known and (tree.names[activity_id], tree.parents[activity_id]) == (name, parent_id):
+                continue
+            if known:
+                tree._unlink(activity_id)
+            tree.names[activity_id], tree.parents[activity_id] = name, parent_id
+            tree.by_name[name] = _with_id(tree.by_name.get(name, ()), activity_id)
+            if parent_id is not None:
+                tree.children[parent_id] = _with_id(tree.children.get(parent_id, ()), activity_id)
+            moved.append(activity_id)
+
+        stack = [(activity_id, tree._depth(activity_id)) for activity_id in moved if activity_id in tree.names]
+        seen = set()  # цикл в parent_id отклоняет БД, но обход не должен на нём зависнуть
+        while stack:
+            activity_id, depth = stack.pop()
+            tree.depths[activity_id] = depth
+            seen.add(activity_id)
+            stack.extend(
+                (child_id, depth + 1) for child_id in tree.children.get(activity_id, ()) if child_id not in seen
+            )
+        return tree
+
+    def _depth(self, activity_id: int) -> int:
+        # подъёмом по родителям, не по сохранённым глубинам: родитель тоже мог быть перенесён
+        depth = 0
+        parent_id = self.parents[activity_id]
+        while parent_id in self.names and depth < len(self.names):
+            depth += 1
+            parent_id = self.parents[parent_id]
+        return depth
+
+    def _unlink(self, activity_id: int) -> None:
+        # убрать узел из индекса по имени и из детей родителя (только у нового, ещё не опубликованного снимка)
+        name, parent_id = self.names[activity_id], self.parents[activity_id]
+        self.by_name[name] = tuple(i for i in self.by_name[name] if i != activity_id)
+        if not self.by_name[name]:
+            del self.by_name[name]
+        if parent_id is not None and parent_id in self.children:
+            self.children[parent_id] = tuple(i for i in self.children[parent_id] if i != activity_id)
+            if not self.children[parent_id]:
+                del self.children[parent_id]
+
+
+def _with_id(ids: tuple[int, ...], activity_id: int) -> tuple[int, ...]:
+    return tuple(sorted({*ids, activity_id}))
+
+
+class ActivityTreeStore:
+    """
+    Снимок дерева деятельностей на процесс; читатели берут self.tree, запись подменяет его целиком.
+
+    version — версия дерева в БД (activity_tree_version), которой соответствует снимок; None — не загружен.
+    Изменения транзакции применяются одним снимком после коммита. Пока версия в БД другая (писал другой
+    процесс или запись прошла мимо ActivityDao), запросы идут в БД; если коммит увеличил версию не с version,
+    снимок перечитывается в фоне.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.tree = ActivityTree([])
+        self.version: int | None = None
+        self._reload: asyncio.Task | None = None
+
+    async def load(self, session: AsyncSession) -> None:
+        # версия читается до строк: запись между ними даст снимок новее версии — он просто не будет использован
+        version = await session.scalar(select(ActivityTreeVersion.version))
+        result = await session.execute(select(Activity.id, Activity.name, Activity.parent_id))
+        self.tree = ActivityTree(result.all())
+        self.version = version
+        self.ready = True
+        logger.info(f"Дерево деятельностей загружено: {len(self.tree)} узлов, версия {version}")
+
+    def apply(
+        self,
+        upserts: Iterable[tuple[int, str, int | None]] = (),
+        deleted_ids: Iterable[int] = (),
+        version: int | None = None,
+    ) -> None:
+        """Применить изменения закоммиченной транзакции; version — версия дерева после неё."""
+        if not self.ready:
+            return
+        self.tree = self.tree.with_changes(upserts, deleted_ids)
+        if version is not None and self.version is not None and version == self.version + 1:
+            self.version = version
+        else:
+            logger.info(f"Снимок дерева деятельностей отстал от БД (версия {self.version}), перечитываем")
+            self.reload_in_background()
+
+    def reload_in_background(self) -> None:
+        if self._reload is None or self._reload.done():
+            self._reload = asyncio.get_running_loop().create_task(load_activity_tree())
+
+
+activity_tree = ActivityTreeStore()
+
+
+async def load_activity_tree() -> None:
+    """Загрузка дерева при старте; без БД приложение стартует, а иерархия читается из БД."""
+    try:
+        async with async_session_maker() as session:
+            await activity_tree.load(session)
+    except Exception as e:
+        logger.error(f"Дерево деятельностей не загружено, иерархия будет читаться из БД: {e!r}")
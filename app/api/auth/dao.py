@@ -25,18 +25,16 @@ class UsersDAO(BaseDAO):
 
     @classmethod
     async def register_user(cls, user_data: SUserRegister, session: AsyncSession) -> RUserResponse:
-        # Проверка существования пользователя
-        existing_user = await cls.find_one_or_none(session=session, filters=EmailModel(email=user_data.email))
-        if existing_user:
-            logger.info(f"Пользователь с email {user_data.email} уже существует!")
-            raise UserAlreadyExistsException
-
         # Подготовка данных для добавления
         user_data_dict = user_data.model_dump()
         user_data_dict.pop("confirm_password", None)
 
-        # Добавление пользователя
-        await cls.add(session=session, values=SUserAddDB(**user_data_dict))
+        # Добавление пользователя одним запросом: ON CONFLICT DO NOTHING по email и телефону (уникальные),
+        # без предварительного SELECT и гонки между проверкой и вставкой
+        user = await cls.upsert(session=session, values=SUserAddDB(**user_data_dict))
+        if user is None:
+            logger.info(f"Пользователь с email {user_data.email} уже существует!")
+            raise UserAlreadyExistsException
         logger.info(f"Пользователь с email {user_data.email} успешно добавлен!")
 
         return RUserResponse(message="Вы успешно зарегистрированы!")
@@ -15,6 +15,7 @@ from app.api.auth.schemas import (
     AUserBearerResponse,
 )
 from app.api.auth.utils import set_tokens, authenticate_user, create_tokens
+from app.dao.pagination import PageParams
 from app.dependencies.auth_dep import (
     get_current_user_cookie,
     check_refresh_token,
@@ -22,6 +23,7 @@ from app.dependencies.auth_dep import (
     get_current_admin_user_cookie,
 )
 from app.dependencies.dao_dep import get_session_with_commit, get_session_without_commit
+from app.dependencies.pagination_dep import get_page_params
 from app.exceptions import IncorrectEmailOrPasswordException
 from app.models import User
 
@@ -82,11 +84,15 @@ async def get_me(user_data: User = Depends(get_current_user_cookie)):
     response_model=list[SUserInfo],
 )
 async def get_all_users(
+    response: Response,
+    page: PageParams = Depends(get_page_params),
     session: AsyncSession = Depends(get_session_with_commit),
     user_data: User = Depends(get_current_admin_user_cookie),
     # user_data: User = Depends(get_current_admin_user_bearer),
 ):
-    return await UsersDAO.find_all(session)
+    users_page = await UsersDAO.paginate_keyset(session, page)
+    response.headers.update(users_page.headers)
+    return users_page.items
 
 
 @cookie_auth_router.post(
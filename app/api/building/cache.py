@@ -0,0 +1,178 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import NamedTuple
+
+from app.api.building.geo import haversine_m, METERS_PER_DEGREE
+from app.api.building.schemas import OrgBuildResponse
+from app.core.settings import APP_CONFIG, GeoConfig
+
+logger = logging.getLogger(__name__)
+
+# Оценка памяти записи кэша: накладные расходы записи + одна организация в ответе
+_ENTRY_BYTES = 512
+_ORG_BYTES = 1024
+
+
+class CacheKey(NamedTuple):
+    latitude: float  # центр, привязанный к сетке
+    longitude: float
+    radius: float  # радиус, округлённый вверх до шага
+    limit: int
+
+
+class CachedOrg(NamedTuple):
+    org: OrgBuildResponse
+    latitude: float  # координаты здания: расстояние до точки запроса считается заново
+    longitude: float
+    distance: float  # от центра ячейки, без округления
+
+
+class _Entry(NamedTuple):
+    expires_at: float
+    results: list[CachedOrg]
+    building_ids: frozenset[int]  # здания, просмотренные при поиске
+    org_ids: frozenset[int]
+    activity_names: frozenset[str]  # названия деятельностей в ответе
+    size: int
+
+
+class GeoCache:
+    """
+    LRU-кэш результатов радиусного поиска с TTL и ограничением по памяти.
+
+    Координаты запроса привязываются к сетке grid_deg, радиус округляется вверх до radius_step_m,
+    поэтому запросы с дрожащими координатами попадают в одну запись. Запись хранит организации от центра
+    ячейки в радиусе, увеличенном ещё на полудиагональ ячейки, вместе с координатами зданий: расстояния
+    до настоящей точки запроса пересчитываются при чтении.
+
+    Запись сбрасывается, если изменилось просмотренное при поиске здание, организация из ответа
+    или деятельность, чьё название есть в ответе, либо новое/перемещённое здание попало в её круг.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        grid_deg: float = 0.0005,
+        radius_step_m: float = 100.0,
+        ttl_s: float = 60.0,
+        max_bytes: int = 32 * 1024 * 1024,
+    ):
+        self.enabled = enabled
+        self.grid_deg = grid_deg
+        self.radius_step_m = radius_step_m
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # растёт при каждой инвалидации: результат, посчитанный до записи в БД, в кэш не кладём
+        self.version = 0
+        self.memory_bytes = 0
+        self._entries: OrderedDict[CacheKey, _Entry] = OrderedDict()
+
+    @classmethod
+    def from_config(cls, config: GeoConfig) -> "GeoCache":
+        return cls(
+            enabled=config.cache_enabled,
+            grid_deg=config.cache_grid_deg,
+            radius_step_m=config.cache_radius_step_m,
+            ttl_s=config.cache_ttl_s,
+            max_bytes=config.cache_max_bytes,
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def half_diagonal_m(self) -> float:
+        """Оценка сверху расстояния от точки до центра её ячейки."""
+        return math.sqrt(2) * self.grid_deg / 2 * METERS_PER_DEGREE
+
+    def key(self, latitude: float, longitude: float, radius: float, limit: int) -> CacheKey:
+        return CacheKey(
+            round(round(latitude / self.grid_deg) * self.grid_deg, 9),
+            round(round(longitude / self.grid_deg) * self.grid_deg, 9),
+            math.ceil(radius / self.radius_step_m) * self.radius_step_m,
+            limit,
+        )
+
+    def get(self, key: CacheKey) -> list[CachedOrg] | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._pop(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.results
+
+    def put(
+        self,
+        key: CacheKey,
+        results: list[CachedOrg],
+        building_ids: Iterable[int],
+        version: int,
+    ) -> None:
+        if version != self.version:
+            return  # за время поиска в БД что-то записали
+        self._pop(key)
+        size = _ENTRY_BYTES + _ORG_BYTES * len(results)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = _Entry(
+            expires_at=time.monotonic() + self.ttl_s,
+            results=results,
+            building_ids=frozenset(building_ids),
+            org_ids=frozenset(result.org.id for result in results),
+            activity_names=frozenset(activity.name for result in results for activity in result.org.activities),
+            size=size,
+        )
+        self.memory_bytes += size
+        while self.memory_bytes > self.max_bytes:
+            self._pop(next(iter(self._entries)))
+
+    def invalidate(
+        self,
+        building_ids: Iterable[int] = (),
+        org_ids: Iterable[int] = (),
+        points: Iterable[tuple[float, float]] = (),
+        activity_names: Iterable[str] = (),
+    ) -> None:
+        """
+        Сбросить записи, затронутые изменением зданий, организаций, зданий в точках (lat, lon)
+        или деятельностей с названиями activity_names.
+        """
+        self.version += 1
+        building_ids, org_ids, points = set(building_ids), set(org_ids), list(points)
+        activity_names = set(activity_names)
+        stale = [
+            key
+            for key, entry in self._entries.items()
+            if not entry.building_ids.isdisjoint(building_ids)
+            or not entry.org_ids.isdisjoint(org_ids)
+            or not entry.activity_names.isdisjoint(activity_names)
+            or any(haversine_m(key.latitude, key.longitude, lat, lon) <= key.radius for lat, lon in points)
+        ]
+        for key in stale:
+            self._pop(key)
+        self.invalidations += len(stale)
+        if stale:
+            logger.info(f"Кэш геопоиска: сброшено записей {len(stale)}")
+
+    def clear(self) -> None:
+        self.version += 1
+        self._entries.clear()
+        self.memory_bytes = 0
+
+    def _pop(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.memory_bytes -= entry.size
+
+
+geo_cache = GeoCache.from_config(APP_CONFIG.geo)
@@ -1,160 +1,482 @@
+import heapq
 import logging
-import math
+from collections.abc import AsyncIterator, Iterable
+from contextlib import aclosing
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import column, Float, func, Integer, or_, Row, Select, select, values
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from starlette import status
 
+from app.api.organization import projection
 from app.api.organization.schemas import ActivityBase
-from app.api.building.schemas import OrgBuildResponse
+from app.api.building.cache import CachedOrg, geo_cache
+from app.api.building.geo import (
+    bounding_box,
+    cluster_cell_deg,
+    haversine_m,
+    planar_closer_deg,
+    planar_lower_bound_m,
+    viewport_boxes,
+    within_polygon,
+    within_radius,
+)
+from app.api.building.index import building_index
+from app.api.building.schemas import (
+    AreaQuery,
+    BatchRadiusQuery,
+    ClusterResponse,
+    OrgBuildResponse,
+    ProbeResult,
+    RadiusProbe,
+)
 from app.dao.base import BaseDAO
-from app.models import Building, Organization
+from app.dao.hooks import after_commit
+from app.dao.pagination import decode_cursor, encode_cursor, keyset, Page, PageParams, to_page
+from app.models import Activity, Building, Organization
 
 
 logger = logging.getLogger(__name__)
 
+NEAREST_BATCH_SIZE = 256  # строк за один fetch серверного курсора при поиске ближайших через БД
+
 
 class BuildingDao(BaseDAO):
     model = Building
 
     @classmethod
-    async def get_organizations_by_id(cls, session: AsyncSession, building_id: int) -> list[OrgBuildResponse]:
-        query = (
-            select(cls.model)
-            .options(
-                selectinload(cls.model.organizations),
-                selectinload(
-                    cls.model.organizations,
-                    Organization.activities,
-                ),  # если ну указано # lazy='selectin' в Organization
-            )
-            .where(cls.model.id == building_id)
-        )
-
-        result = await session.execute(query)
-        building = result.scalar_one_or_none()
+    async def get_organizations_by_id(cls, session: AsyncSession, building_id: int, page: PageParams) -> Page[str]:
+        # JSON-массив OrgBuildResponse собирает Postgres; возвращаем готовое тело ответа
+        organizations = projection.organizations
+        query = projection.organization_json_rows().where(organizations.c.building_id == building_id)
+        result_page = await projection.fetch_json(session, query, page)
 
-        if not building:
+        # пустой ответ отличаем от несуществующего здания
+        building = select(projection.buildings.c.id).where(projection.buildings.c.id == building_id)
+        if result_page.items == "[]" and not await projection.fetch_rows(session, building):
             logger.warning("Организации не найдены.")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Организации не найдены.")
 
-        results = [
-            OrgBuildResponse(
-                id=organizations.id,
-                created_at=organizations.created_at,
-                name=organizations.name,
-                phone_numbers=organizations.phone_numbers,
-                address=building.address,
-                activities=organizations.activities,
-            )
-            for organizations in building.organizations
-        ]
+        logger.info(f"Организации в здании building_id: {building_id}, ответ {len(result_page.items)} символов")
 
-        logger.info(f"Найдено организаций: {len(results)}, в здании building_id: {building_id}")
+        return result_page
 
-        return results
+    @classmethod
+    def _after_add(cls, session: AsyncSession, instances: list[Building | Row]) -> None:
+        points = [(building.id, building.latitude, building.longitude) for building in instances]
+        after_commit(session, lambda: building_index.add(points))
+        after_commit(session, lambda: geo_cache.invalidate(points=[(lat, lon) for _, lat, lon in points]))
 
-    # по хорошему переписать
-    # @classmethod
-    # async def get_orgs_within_radius(
-    #     cls, session: AsyncSession, latitude: float, longitude: float, radius: float
-    # ) -> list[OrgBuildResponse]:
-    #     radius_in_degrees = radius / 111000  # 1 градус ~ 111 км
-    #
-    #     lat_min = latitude - radius_in_degrees
-    #     lat_max = latitude + radius_in_degrees
-    #     lon_min = longitude - radius_in_degrees / math.cos(math.radians(latitude))
-    #     lon_max = longitude + radius_in_degrees / math.cos(math.radians(latitude))
-    #
-    #     building_query = select(cls.model).where(
-    #         cls.model.latitude.between(lat_min, lat_max), cls.model.longitude.between(lon_min, lon_max)
-    #     )
-    #
-    #     building_result = await session.execute(building_query)
-    #     buildings = building_result.scalars().all()
-    #
-    #     if not buildings:
-    #         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Здания не найдены в заданном радиусе.")
-    #
-    #     building_ids = [building.id for building in buildings]
-    #
-    #     org_query = (
-    #         select(Organization)
-    #         .where(Organization.building_id.in_(building_ids))
-    #         .options(
-    #             selectinload(Organization.building),
-    #             selectinload(Organization.activities),
-    #         )
-    #     )
-    #
-    #     org_result = await session.execute(org_query)
-    #     organizations = org_result.scalars().all()
-    #
-    #     if not organizations:
-    #         raise HTTPException(
-    #             status_code=status.HTTP_404_NOT_FOUND, detail="Организации не найдены в заданном радиусе."
-    #         )
-    #
-    #     results = [
-    #         OrgBuildResponse(
-    #             id=org.id,
-    #             created_at=org.created_at,
-    #             name=org.name,
-    #             phone_numbers=org.phone_numbers,
-    #             address=org.building.address,
-    #             activities=org.activities,
-    #         )
-    #         for org in organizations
-    #     ]
-    #
-    #     return results
     @classmethod
-    async def get_orgs_within_radius(
+    def _after_update(cls, session: AsyncSession, rows: list[Row]) -> None:
+        building_ids = [row.id for row in rows]
+        points = [(row.latitude, row.longitude) for row in rows]
+        moved = [(row.id, row.latitude, row.longitude) for row in rows]
+        after_commit(session, lambda: building_index.move(moved))
+        after_commit(session, lambda: geo_cache.invalidate(building_ids=building_ids, points=points))
+
+    @classmethod
+    def _after_delete(cls, session: AsyncSession, rows: list[Row]) -> None:
+        building_ids = [row.id for row in rows]
+        after_commit(session, lambda: building_index.remove(building_ids))
+        after_commit(session, lambda: geo_cache.invalidate(building_ids=building_ids))
+
+    @staticmethod
+    def _box(lat_min: float, lat_max: float, lon_min: float, lon_max: float):
+        return func.box(func.point(lon_min, lat_min), func.point(lon_max, lat_max))
+
+    @classmethod
+    async def _iter_nearest_buildings(
         cls,
         session: AsyncSession,
         latitude: float,
         longitude: float,
-        radius: float,
-    ) -> list[OrgBuildResponse]:
-        radius_in_degrees = radius / 111000  # 1 градус ~ 111 км
+        radius: float | None = None,
+        min_distance: float = 0.0,
+    ) -> AsyncIterator[tuple[int, float]]:
+        # здания (building_id, расстояние) от ближайшего к дальнему, не дальше radius; min_distance — граница
+        # снизу (курсор страницы): здания ближе неё могут быть пропущены без обхода
+        if building_index.ready:
+            for building_id, distance in building_index.iter_nearest(latitude, longitude, min_distance):
+                if radius is not None and distance > radius:
+                    return
+                yield building_id, distance
+            return
+
+        # без индекса в памяти: GiST-скан по возрастанию <-> (расстояние в плоскости lon/lat);
+        # здание отдаём, как только все непрочитанные заведомо дальше него по большому кругу
+        planar = cls.model.location.op("<->", return_type=Float)(func.point(longitude, latitude))
+        query = select(cls.model.id, cls.model.latitude, cls.model.longitude, planar).order_by(planar)
+        if radius is not None:
+            query = query.where(cls.model.location.op("<@")(cls._box(*bounding_box(latitude, longitude, radius))))
+        if min_distance > 0:
+            # заведомо более близкие здания отбрасывает сам индексный скан, в приложение они не передаются
+            query = query.where(planar >= planar_closer_deg(min_distance))
 
-        lat_min = latitude - radius_in_degrees
-        lat_max = latitude + radius_in_degrees
-        lon_min = longitude - radius_in_degrees / math.cos(math.radians(latitude))
-        lon_max = longitude + radius_in_degrees / math.cos(math.radians(latitude))
+        result = await session.stream(query.execution_options(yield_per=NEAREST_BATCH_SIZE))
+        pending: list[tuple[float, int]] = []
+        try:
+            async for building_id, lat, lon, planar_distance in result:
+                heapq.heappush(pending, (haversine_m(latitude, longitude, lat, lon), building_id))
+                bound = planar_lower_bound_m(latitude, longitude, planar_distance)
+                while pending and pending[0][0] <= bound:
+                    distance, nearest_id = heapq.heappop(pending)
+                    if radius is not None and distance > radius:
+                        return
+                    yield nearest_id, distance
+        finally:
+            await result.close()
 
-        org_query = (
+        while pending:
+            distance, nearest_id = heapq.heappop(pending)
+            if radius is not None and distance > radius:
+                return
+            yield nearest_id, distance
+
+    @staticmethod
+    def _orgs_query(building_ids: Iterable[int], activity: str | None = None) -> Select:
+        query = (
             select(Organization)
-            .join(Organization.building)
-            .outerjoin(Organization.activities)
-            .where(Building.latitude.between(lat_min, lat_max), Building.longitude.between(lon_min, lon_max))
+            .where(Organization.building_id.in_(building_ids))
             .options(
                 selectinload(Organization.building),
                 selectinload(Organization.activities),
             )
         )
+        if activity:
+            query = query.where(Organization.activities.any(Activity.name == activity))
+        return query
+
+    @staticmethod
+    def _to_response(org: Organization, distance: float | None = None) -> OrgBuildResponse:
+        return OrgBuildResponse(
+            id=org.id,
+            created_at=org.created_at,
+            name=org.name,
+            phone_numbers=org.phone_numbers,
+            address=org.building.address,
+            activities=[ActivityBase(name=org_activity.name) for org_activity in org.activities],
+            distance_m=round(distance, 1) if distance is not None else None,
+        )
 
-        org_result = await session.execute(org_query)
-        organizations = org_result.scalars().all()
+    @staticmethod
+    def _sort_key(distance: float, org_id: int) -> tuple[float, int]:
+        # тот же порядок, что у курсора: расстояние, округлённое как в ответе (distance_m), затем id
+        return round(distance, 1), org_id
 
-        if not organizations:
+    @classmethod
+    async def _load_orgs(
+        cls,
+        session: AsyncSession,
+        distances: dict[int, float],
+        activity: str | None = None,
+    ) -> list[tuple[Organization, float]]:
+        # организации зданий из distances с расстоянием до здания
+        if not distances:
+            return []
+
+        org_result = await session.execute(cls._orgs_query(distances, activity))
+        return [(org, distances[org.building_id]) for org in org_result.scalars().all()]
+
+    @classmethod
+    async def _collect_nearest_orgs(
+        cls,
+        session: AsyncSession,
+        buildings: AsyncIterator[tuple[int, float]],
+        limit: int,
+        activity: str | None = None,
+        after: tuple[float, int] | None = None,
+    ) -> list[tuple[Organization, float]]:
+        # здания читаются пачками от ближайших, пачка растёт вдвое, пока не набрано limit организаций;
+        # затем дочитываются здания с тем же округлённым расстоянием, что у limit-й: при равенстве
+        # порядок решает id. after — курсор (distance_m, id): только организации строго после него
+        results: list[tuple[Organization, float]] = []
+        batch: dict[int, float] = {}
+        batch_size = limit
+        last_key: tuple[float, int] | None = None
+        async with aclosing(buildings):
+            async for building_id, distance in buildings:
+                if after is not None and round(distance, 1) < after[0]:
+                    continue
+                if last_key is not None and round(distance, 1) > last_key[0]:
+                    break
+                batch[building_id] = distance
+                if len(batch) >= batch_size:
+                    results = cls._merge_orgs(results, await cls._load_orgs(session, batch, activity), after)
+                    if len(results) >= limit:
+                        last_key = cls._sort_key(results[limit - 1][1], results[limit - 1][0].id)
+                    batch, batch_size = {}, batch_size * 2
+
+        results = cls._merge_orgs(results, await cls._load_orgs(session, batch, activity), after)
+        return results[:limit]
+
+    @classmethod
+    def _merge_orgs(
+        cls,
+        results: list[tuple[Organization, float]],
+        loaded: list[tuple[Organization, float]],
+        after: tuple[float, int] | None,
+    ) -> list[tuple[Organization, float]]:
+        if after is not None:
+            loaded = [(org, distance) for org, distance in loaded if cls._sort_key(distance, org.id) > after]
+        return sorted(results + loaded, key=lambda item: cls._sort_key(item[1], item[0].id))
+
+    @staticmethod
+    async def _record_buildings(
+        buildings: AsyncIterator[tuple[int, float]],
+        seen: set[int],
+    ) -> AsyncIterator[tuple[int, float]]:
+        # запоминает просмотренные здания: от них зависит закэшированный результат
+        async with aclosing(buildings):
+            async for building_id, distance in buildings:
+                seen.add(building_id)
+                yield building_id, distance
+
+    @classmethod
+    async def get_orgs_within_radius(
+        cls,
+        session: AsyncSession,
+        latitude: float,
+        longitude: float,
+        radius: float,
+        limit: int = 100,
+        cursor: str | None = None,
+    ) -> Page[list[OrgBuildResponse]]:
+        # страница — limit организаций после курсора (distance_m, id); лишняя организация — признак продолжения
+        after = decode_cursor(cursor, float, int) if cursor else None
+        results = None
+        if geo_cache.enabled and after is None:
+            # в кэше только первые страницы
+            results = await cls._orgs_within_radius_cached(session, latitude, longitude, radius, limit + 1)
+        if results is None:
+            # страница после курсора начинается с его расстояния: distance_m округлено до 0.1 м
+            min_distance = max(0.0, after[0] - 0.1) if after is not None else 0.0
+            buildings = cls._iter_nearest_buildings(session, latitude, longitude, radius, min_distance)
+            nearest = await cls._collect_nearest_orgs(session, buildings, limit + 1, after=after)
+            results = [cls._to_response(org, distance) for org, distance in nearest]
+
+        if not results:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Организации не найдены в заданном радиусе.",
             )
 
-        results = [
-            OrgBuildResponse(
-                id=org.id,
-                created_at=org.created_at,
-                name=org.name,
-                phone_numbers=org.phone_numbers,
-                address=org.building.address,
-                activities=[ActivityBase(name=activity.name) for activity in org.activities],
+        logger.info(f"Найдено организаций: {len(results)} в радиусе {radius} м")
+        items = results[:limit]
+        next_cursor = encode_cursor(items[-1].distance_m, items[-1].id) if len(results) > limit else None
+        return Page(items, next_cursor)
+
+    @classmethod
+    async def _orgs_within_radius_cached(
+        cls,
+        session: AsyncSession,
+        latitude: float,
+        longitude: float,
+        radius: float,
+        limit: int,
+    ) -> list[OrgBuildResponse] | None:
+        """
+        Первые limit организаций в круге через кэш; None — запись не даёт точного ответа для этой точки.
+
+        Запись ищется от центра ячейки в радиусе key.radius + полудиагональ ячейки, то есть покрывает
+        круг запроса для любой точки ячейки. Расстояния пересчитываются от настоящей точки запроса;
+        если запись обрезана на limit организаций, точен только её префикс: организация, не попавшая
+        в запись, от точки запроса не ближе, чем bound.
+        """
+        key = geo_cache.key(latitude, longitude, radius, limit)
+        cached = geo_cache.get(key)
+        if cached is None:
+            version = geo_cache.version
+            seen: set[int] = set()
+            search_radius = key.radius + geo_cache.half_diagonal_m
+            buildings = cls._iter_nearest_buildings(session, key.latitude, key.longitude, search_radius)
+            nearest = await cls._collect_nearest_orgs(session, cls._record_buildings(buildings, seen), limit)
+            cached = [
+                CachedOrg(cls._to_response(org), org.building.latitude, org.building.longitude, distance)
+                for org, distance in nearest
+            ]
+            geo_cache.put(key, cached, seen, version)
+
+        bound = radius
+        if len(cached) >= limit:
+            # запись обрезана по округлённому расстоянию: пропущенные здания от центра не ближе last_distance
+            last_distance = round(cached[-1].distance, 1) - 0.05
+            bound = min(radius, last_distance - haversine_m(latitude, longitude, key.latitude, key.longitude))
+        hits = []
+        for result in cached:
+            distance = haversine_m(latitude, longitude, result.latitude, result.longitude)
+            if distance <= radius:
+                hits.append((cls._sort_key(distance, result.org.id), result.org))
+        hits.sort(key=lambda hit: hit[0])
+        if bound < radius:
+            # пропущенные организации дальше bound: их округлённое расстояние не меньше round(bound, 1)
+            hits = [hit for hit in hits if hit[0][0] < round(bound, 1)]
+            if len(hits) < limit:
+                return None
+        return [org.model_copy(update={"distance_m": sort_key[0]}) for sort_key, org in hits[:limit]]
+
+    @classmethod
+    async def get_nearest_orgs(
+        cls,
+        session: AsyncSession,
+        latitude: float,
+        longitude: float,
+        k: int,
+        activity: str | None = None,
+    ) -> list[OrgBuildResponse]:
+        buildings = cls._iter_nearest_buildings(session, latitude, longitude)
+        nearest = await cls._collect_nearest_orgs(session, buildings, k, activity)
+        results = [cls._to_response(org, distance) for org, distance in nearest]
+
+        if not results:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Организации не найдены.")
+
+        logger.info(f"Найдено ближайших организаций: {len(results)} (k={k}, activity={activity})")
+        return results
+
+    @classmethod
+    async def get_orgs_within_area(cls, session: AsyncSession, area: AreaQuery) -> Page[list[OrgBuildResponse]]:
+        rings = area.geometry.coordinates if area.geometry else None
+        if rings:
+            lons = [lon for lon, _ in rings[0]]
+            lats = [lat for _, lat in rings[0]]
+            boxes = [(min(lats), max(lats), min(lons), max(lons))]
+        else:
+            boxes = viewport_boxes(*area.bbox)
+
+        # 1) префильтр по GiST: location <@ box; достаём только координаты зданий
+        building_query = select(cls.model.id, cls.model.latitude, cls.model.longitude).where(
+            or_(*[cls.model.location.op("<@")(cls._box(*box)) for box in boxes]),
+        )
+        building_result = await session.execute(building_query)
+        candidates = building_result.all()
+
+        # 2) для полигона — точная проверка попадания; для bbox <@ box уже точен
+        building_ids = within_polygon(rings, candidates) if rings else [building.id for building in candidates]
+        logger.info(f"Зданий в прямоугольнике: {len(candidates)}, в области: {len(building_ids)}")
+
+        rows_page = Page([])
+        if building_ids:
+            page = PageParams(area.cursor, area.limit, area.with_total)
+            org_result = await session.execute(keyset(cls._orgs_query(building_ids), [Organization.id], page, int))
+            rows_page = to_page(org_result.all(), page, lambda row: (row[0].id,))
+
+        if not rows_page.items:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Организации не найдены в заданной области.",
             )
-            for org in organizations
-        ]
 
+        return rows_page._replace(items=[cls._to_response(row[0]) for row in rows_page.items])
+
+    @classmethod
+    async def _buildings_for_probes(
+        cls,
+        session: AsyncSession,
+        probes: list[RadiusProbe],
+    ) -> list[dict[int, float]]:
+        # для каждой точки — здания в её радиусе {building_id: расстояние}
+        if building_index.ready:
+            return [dict(building_index.within_radius(p.latitude, p.longitude, p.radius)) for p in probes]
+
+        # один запрос на все точки: VALUES с прямоугольниками, соединённый со зданиями по GiST (<@ box)
+        probe_boxes = values(
+            column("probe", Integer),
+            column("lat_min", Float),
+            column("lat_max", Float),
+            column("lon_min", Float),
+            column("lon_max", Float),
+            name="probe_boxes",
+        ).data([(i, *bounding_box(p.latitude, p.longitude, p.radius)) for i, p in enumerate(probes)])
+        box = cls._box(probe_boxes.c.lat_min, probe_boxes.c.lat_max, probe_boxes.c.lon_min, probe_boxes.c.lon_max)
+        query = select(probe_boxes.c.probe, cls.model.id, cls.model.latitude, cls.model.longitude).join(
+            cls.model,
+            cls.model.location.op("<@")(box),
+        )
+        result = await session.execute(query)
+
+        candidates: list[list[tuple[int, float, float]]] = [[] for _ in probes]
+        for probe, building_id, lat, lon in result:
+            candidates[probe].append((building_id, lat, lon))
+        return [dict(within_radius(p.latitude, p.longitude, p.radius, points)) for p, points in zip(probes, candidates)]
+
+    @classmethod
+    async def get_orgs_within_radius_batch(cls, session: AsyncSession, batch: BatchRadiusQuery) -> list[ProbeResult]:
+        probe_buildings = await cls._buildings_for_probes(session, batch.probes)
+        building_ids = set().union(*probe_buildings)
+        logger.info(f"Пакетный радиусный поиск: точек {len(batch.probes)}, зданий {len(building_ids)}")
+        if not building_ids:
+            return [ProbeResult(count=0, organizations=None if batch.counts_only else []) for _ in batch.probes]
+
+        if batch.counts_only:
+            query = (
+                select(Organization.building_id, func.count())
+                .where(Organization.building_id.in_(building_ids))
+                .group_by(Organization.building_id)
+            )
+            counts = dict((await session.execute(query)).all())
+            return [
+                ProbeResult(count=sum(counts.get(building_id, 0) for building_id in buildings))
+                for buildings in probe_buildings
+            ]
+
+        # организации всех зданий загружаются один раз и раскладываются по точкам
+        org_result = await session.execute(cls._orgs_query(building_ids))
+        orgs_by_building: dict[int, list[Organization]] = {}
+        for org in org_result.scalars().all():
+            orgs_by_building.setdefault(org.building_id, []).append(org)
+
+        results = []
+        for buildings in probe_buildings:
+            organizations = [org for building_id in buildings for org in orgs_by_building.get(building_id, [])]
+            organizations.sort(key=lambda org: (buildings[org.building_id], org.id))
+            results.append(
+                ProbeResult(
+                    count=len(organizations),
+                    organizations=[
+                        cls._to_response(org, buildings[org.building_id]) for org in organizations[: batch.limit]
+                    ],
+                ),
+            )
         return results
+
+    @classmethod
+    async def get_clusters(
+        cls,
+        session: AsyncSession,
+        min_lon: float,
+        min_lat: float,
+        max_lon: float,
+        max_lat: float,
+        zoom: int,
+    ) -> list[ClusterResponse]:
+        # организации в окне карты, сгруппированные по ячейкам сетки; центр кластера — среднее по организациям
+        cell = cluster_cell_deg(zoom)
+        row = func.floor(cls.model.latitude / cell).label("row")
+        col = func.floor(cls.model.longitude / cell).label("col")
+        query = (
+            select(
+                func.avg(cls.model.latitude),
+                func.avg(cls.model.longitude),
+                func.count(Organization.id),
+                func.count(cls.model.id.distinct()),
+            )
+            .join(Organization, Organization.building_id == cls.model.id)
+            .where(
+                or_(
+                    *[
+                        cls.model.location.op("<@")(cls._box(*box))
+                        for box in viewport_boxes(min_lon, min_lat, max_lon, max_lat)
+                    ],
+                ),
+            )
+            .group_by(row, col)
+        )
+        result = await session.execute(query)
+        clusters = [
+            ClusterResponse(latitude=latitude, longitude=longitude, count=count, buildings=buildings)
+            for latitude, longitude, count, buildings in result
+        ]
+        logger.info(f"Кластеров: {len(clusters)} (zoom={zoom}, ячейка {cell:.5f}°)")
+        return clusters
@@ -0,0 +1,156 @@
+"""Геометрия на сфере для поиска зданий по координатам."""
+
+import math
+from collections.abc import Iterable
+
+EARTH_RADIUS_M = 6_371_008.8  # средний радиус Земли (IUGG)
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+# Кластеры на карте: ячеек на сторону тайла (256 px) — один кластер на ~64 px экрана
+CLUSTER_CELLS_PER_TILE = 4
+
+
+def bounding_box(latitude: float, longitude: float, radius: float) -> tuple[float, float, float, float]:
+    """
+    Прямоугольник (lat_min, lat_max, lon_min, lon_max), гарантированно содержащий круг радиуса radius (м).
+
+    Если круг задевает полюс или антимеридиан, долгота не ограничивается.
+    """
+    delta_lat = radius / METERS_PER_DEGREE
+    lat_min = max(latitude - delta_lat, -90.0)
+    lat_max = min(latitude + delta_lat, 90.0)
+
+    if lat_min <= -90.0 or lat_max >= 90.0:
+        return lat_min, lat_max, -180.0, 180.0
+
+    # максимальное отклонение по долготе достигается на широте касания, а не в центре круга
+    angular_radius = radius / EARTH_RADIUS_M
+    ratio = math.sin(angular_radius) / math.cos(math.radians(latitude))
+    if ratio >= 1:
+        return lat_min, lat_max, -180.0, 180.0
+    delta_lon = math.degrees(math.asin(ratio))
+
+    lon_min = longitude - delta_lon
+    lon_max = longitude + delta_lon
+    if lon_min < -180.0 or lon_max > 180.0:
+        return lat_min, lat_max, -180.0, 180.0
+    return lat_min, lat_max, lon_min, lon_max
+
+
+def cluster_cell_deg(zoom: int) -> float:
+    """Размер ячейки кластеризации в градусах для уровня масштаба карты (тайлы 256 px, 0 — весь мир)."""
+    return 360.0 / (2**zoom * CLUSTER_CELLS_PER_TILE)
+
+
+def viewport_boxes(
+    min_lon: float,
+    min_lat: float,
+    max_lon: float,
+    max_lat: float,
+) -> list[tuple[float, float, float, float]]:
+    """Прямоугольники (lat_min, lat_max, lon_min, lon_max) для bbox GeoJSON; min_lon > max_lon — через антимеридиан."""
+    if min_lon <= max_lon:
+        return [(min_lat, max_lat, min_lon, max_lon)]
+    return [(min_lat, max_lat, min_lon, 180.0), (min_lat, max_lat, -180.0, max_lon)]
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Расстояние по большому кругу в метрах."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    h = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(h)))
+
+
+def planar_lower_bound_m(latitude: float, longitude: float, planar: float) -> float:
+    """
+    Нижняя граница расстояния (м) по большому кругу от центра до любой точки, которая удалена
+    от него не меньше чем на planar градусов в плоскости (lon, lat) — как считает оператор <-> в Postgres.
+
+    У такой точки либо |dlat| >= planar/√2, либо |dlon| >= planar/√2 (с учётом перехода
+    через антимеридиан), а широта во втором случае ограничена — отсюда оценка гаверсинуса.
+    """
+    half = planar / math.sqrt(2)
+    h_lat = math.sin(math.radians(min(half, 180.0)) / 2) ** 2
+
+    delta_lon = max(0.0, min(half, 180.0 - abs(longitude)))
+    max_lat = min(90.0, abs(latitude) + half)
+    h_lon = (
+        math.cos(math.radians(latitude)) * math.cos(math.radians(max_lat)) * math.sin(math.radians(delta_lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(max(0.0, min(h_lat, h_lon)))))
+
+
+def planar_closer_deg(distance: float) -> float:
+    """
+    Точка, удалённая от центра в плоскости (lon, lat) меньше чем на столько градусов, заведомо ближе distance (м)
+    по большому кругу.
+
+    Путь по меридиану, затем по параллели не длиннее |dlat| + |dlon| (в радианах, умножить на радиус),
+    а это не больше √2 * planar.
+    """
+    return distance / (math.sqrt(2) * METERS_PER_DEGREE)
+
+
+def within_radius(
+    latitude: float,
+    longitude: float,
+    radius: float,
+    points: Iterable[tuple[int, float, float]],
+) -> list[tuple[int, float]]:
+    """
+    Уточнение кандидатов из bbox: оставляет точки (id, lat, lon) внутри круга.
+
+    Возвращает пары (id, расстояние в метрах), отсортированные по расстоянию.
+    Тригонометрия центра считается один раз на весь набор кандидатов.
+    """
+    phi = math.radians(latitude)
+    cos_phi = math.cos(phi)
+    sin, cos, radians = math.sin, math.cos, math.radians
+    # сравниваем гаверсинусы, чтобы не считать asin для отброшенных точек
+    h_max = math.sin(min(radius / EARTH_RADIUS_M, math.pi) / 2) ** 2
+
+    hits = []
+    for point_id, lat, lon in points:
+        phi2 = radians(lat)
+        h = sin((phi2 - phi) / 2) ** 2 + cos_phi * cos(phi2) * sin(radians(lon - longitude) / 2) ** 2
+        if h <= h_max:
+            hits.append((point_id, 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(h)))))
+
+    hits.sort(key=lambda hit: (hit[1], hit[0]))
+    return hits
+
+
+def within_polygon(
+    rings: list[list[tuple[float, float]]],
+    points: Iterable[tuple[int, float, float]],
+) -> list[int]:
+    """
+    Уточнение кандидатов: id точек (id, lat, lon) внутри полигона.
+
+    rings — кольца GeoJSON в координатах [lon, lat]: первое внешнее, остальные — дырки
+    (правило чёт-нечет). Рёбра готовятся один раз и сортируются по нижней широте,
+    поэтому для каждой точки просматриваются только рёбра ниже неё.
+    """
+    edges = []
+    for ring in rings:
+        closed = ring if ring[0] == ring[-1] else [*ring, ring[0]]
+        for (x1, y1), (x2, y2) in zip(closed, closed[1:]):
+            if y1 != y2:
+                edges.append((min(y1, y2), max(y1, y2), x1, y1, (x2 - x1) / (y2 - y1)))
+    edges.sort()
+
+    inside_ids = []
+    for point_id, lat, lon in points:
+        inside = False
+        for y_min, y_max, x1, y1, slope in edges:
+            if y_min > lat:
+                break
+            if lat < y_max and lon < x1 + (lat - y1) * slope:
+                inside = not inside
+        if inside:
+            inside_ids.append(point_id)
+    return inside_ids
@@ -0,0 +1,362 @@
+import asyncio
+import heapq
+import logging
+import math
+import threading
+from array import array
+from collections.abc import Iterable, Iterator
+from operator import itemgetter
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.building.geo import EARTH_RADIUS_M
+from app.dao.database import async_session_maker
+from app.models import Building
+
+logger = logging.getLogger(__name__)
+
+
+def _to_unit_vector(latitude: float, longitude: float) -> tuple[float, float, float]:
+    phi = math.radians(latitude)
+    lam = math.radians(longitude)
+    cos_phi = math.cos(phi)
+    return cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi)
+
+
+def _chord_to_meters(chord_sq: float) -> float:
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(chord_sq) / 2))
+
+
+def _radius_to_chord_sq(radius: float) -> float:
+    return (2 * math.sin(min(radius / EARTH_RADIUS_M, math.pi) / 2)) ** 2
+
+
+class _KDTree:
+    """
+    Неизменяемое неявное KD-дерево.
+
+    Узел диапазона [lo, hi) — его середина, ось разбиения чередуется по глубине (x, y, z).
+    Координаты лежат в одном плоском array('d') (x, y, z подряд), id — в array('q'),
+    отдельных объектов на узел нет.
+    """
+
+    __slots__ = ("coords", "ids", "box")
+
+    def __init__(self, points: list[tuple[float, float, float, int]]):
+        stack = [(0, len(points), 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if hi - lo < 2:
+                continue
+            points[lo:hi] = sorted(points[lo:hi], key=itemgetter(axis))
+            mid = (lo + hi) // 2
+            next_axis = (axis + 1) % 3
+            stack.append((lo, mid, next_axis))
+            stack.append((mid + 1, hi, next_axis))
+
+        self.coords = array("d", [value for point in points for value in point[:3]])
+        self.ids = array("q", [point[3] for point in points])
+        # рамка всех точек: (min, max) по каждой оси
+        self.box = tuple((min(values), max(values)) for values in list(zip(*points))[:3]) if points else ()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.coords.itemsize * len(self.coords) + self.ids.itemsize * len(self.ids)
+
+    def within(self, query: tuple[float, float, float], chord_sq: float) -> list[tuple[int, float]]:
+        coords, ids = self.coords, self.ids
+        qx, qy, qz = query
+        hits = []
+        stack = [(0, len(ids), 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            base = 3 * mid
+            dx, dy, dz = qx - coords[base], qy - coords[base + 1], qz - coords[base + 2]
+            dist_sq = dx * dx + dy * dy + dz * dz
+            if dist_sq <= chord_sq:
+                hits.append((ids[mid], dist_sq))
+
+            diff = query[axis] - coords[base + axis]
+            next_axis = (axis + 1) % 3
+            # слева координаты <= разделителя, справа >=
+            if diff <= 0 or diff * diff <= chord_sq:
+                stack.append((lo, mid, next_axis))
+            if diff >= 0 or diff * diff <= chord_sq:
+                stack.append((mid + 1, hi, next_axis))
+        return hits
+
+    def nearest(self, query: tuple[float, float, float], min_chord_sq: float = 0.0) -> Iterator[tuple[float, int]]:
+        """
+        Точки (хорда^2, id) не ближе min_chord_sq по возрастанию расстояния; обход ленивый, best-first.
+
+        Узел несёт рамку своих точек по разделителям предков: узел, целиком лежащий ближе min_chord_sq,
+        не раскрывается — следующая страница начинается с границы, а не обходит все более близкие точки.
+        """
+        coords, ids = self.coords, self.ids
+        # в куче узлы (нижняя граница, 1, lo, hi, ось, рамка) и точки (расстояние, 0, id, 0, 0, None)
+        heap = [(0.0, 1, 0, len(ids), 0, self.box)] if len(ids) else []
+        while heap:
+            key, is_node, lo, hi, axis, box = heapq.heappop(heap)
+            if not is_node:
+                yield key, lo
+                continue
+
+            mid = (lo + hi) // 2
+            base = 3 * mid
+            dx, dy, dz = query[0] - coords[base], query[1] - coords[base + 1], query[2] - coords[base + 2]
+            dist_sq = dx * dx + dy * dy + dz * dz
+            if dist_sq >= min_chord_sq:
+                heapq.heappush(heap, (dist_sq, 0, ids[mid], 0, 0, None))
+
+            split = coords[base + axis]
+            diff = query[axis] - split
+            next_axis = (axis + 1) % 3
+            low, high = box[axis]
+            # слева координаты <= разделителя, справа >=
+            left = (lo, mid, box[:axis] + ((low, split),) + box[axis + 1 :])
+            right = (mid + 1, hi, box[:axis] + ((split, high),) + box[axis + 1 :])
+            near, far = (left, right) if diff <= 0 else (right, left)
+            if near[0] < near[1] and not (min_chord_sq and _max_dist_sq(query, near[2]) < min_chord_sq):
+                heapq.heappush(heap, (key, 1, near[0], near[1], next_axis, near[2]))
+            if far[0] < far[1] and not (min_chord_sq and _max_dist_sq(query, far[2]) < min_chord_sq):
+                # нижняя граница — расстояние до рамки, не только до последнего разделителя
+                far_key = max(key, diff * diff, _min_dist_sq(query, far[2]))
+                heapq.heappush(heap, (far_key, 1, far[0], far[1], next_axis, far[2]))
+
+
+def _min_dist_sq(query: tuple[float, float, float], box: tuple[tuple[float, float], ...]) -> float:
+    # квадрат расстояния до ближайшей точки рамки (0 — запрос внутри)
+    (x_low, x_high), (y_low, y_high), (z_low, z_high) = box
+    qx, qy, qz = query
+    dx = x_low - qx if qx < x_low else qx - x_high if qx > x_high else 0.0
+    dy = y_low - qy if qy < y_low else qy - y_high if qy > y_high else 0.0
+    dz = z_low - qz if qz < z_low else qz - z_high if qz > z_high else 0.0
+    return dx * dx + dy * dy + dz * dz
+
+
+def _max_dist_sq(query: tuple[float, float, float], box: tuple[tuple[float, float], ...]) -> float:
+    # квадрат расстояния до самого дальнего угла рамки
+    (x_low, x_high), (y_low, y_high), (z_low, z_high) = box
+    qx, qy, qz = query
+    return (
+        max((qx - x_low) ** 2, (qx - x_high) ** 2)
+        + max((qy - y_low) ** 2, (qy - y_high) ** 2)
+        + max((qz - z_low) ** 2, (qz - z_high) ** 2)
+    )
+
+
+class BuildingIndex:
+    """
+    Пространственный индекс зданий в памяти процесса.
+
+    Точки хранятся как единичные векторы: хорда между ними монотонна расстоянию по большому кругу,
+    поэтому поиск точен и у полюсов, и через антимеридиан. Новые и перемещённые здания попадают
+    в небольшой буфер, который просматривается линейно, а удалённые и перемещённые скрываются в дереве
+    по id; когда изменений становится больше доли дерева, дерево перестраивается в фоне и подменяется
+    целиком.
+    """
+
+    def __init__(self, rebuild_ratio: float = 0.25, min_rebuild_size: int = 1024):
+        self.rebuild_ratio = rebuild_ratio
+        self.min_rebuild_size = min_rebuild_size
+        self.ready = False
+        # дерево, буфер и скрытые в дереве id подменяются одним кортежем, чтобы читатель не увидел их вразнобой
+        self._state: tuple[_KDTree, list[tuple[float, float, float, int]], frozenset[int]] = (
+            _KDTree([]),
+            [],
+            frozenset(),
+        )
+        self._lock = threading.Lock()
+        self._rebuild_task: asyncio.Task | None = None
+        # по записи на идущую перестройку или загрузку: точки буфера и скрытые id, появившиеся с её начала
+        self._recorders: list[tuple[list[tuple[float, float, float, int]], set[int]]] = []
+
+    def __len__(self) -> int:
+        tree, buffer, removed = self._state
+        # removed может содержать id, которых в дереве нет: оценка снизу
+        return max(0, len(tree) - len(removed)) + len(buffer)
+
+    @property
+    def buffered(self) -> int:
+        return len(self._state[1])
+
+    @property
+    def removed(self) -> int:
+        return len(self._state[2])
+
+    @property
+    def memory_bytes(self) -> int:
+        tree, buffer, removed = self._state
+        # элемент буфера: указатель + кортеж из 4 элементов + 3 float + int; элемент множества id — ~60 байт
+        return tree.memory_bytes + len(buffer) * (8 + 88 + 3 * 24 + 32) + len(removed) * 60
+
+    def build(self, points: Iterable[tuple[int, float, float]]) -> None:
+        """Построить индекс заново по точкам (id, lat, lon)."""
+        self._state = (
+            _KDTree([(*_to_unit_vector(lat, lon), point_id) for point_id, lat, lon in points]),
+            [],
+            frozenset(),
+        )
+        self.ready = True
+
+    async def load(self, session: AsyncSession) -> None:
+        """
+        Загрузить координаты всех зданий из БД.
+
+        Изменения, пришедшие во время загрузки, после подмены остаются в буфере и скрытыми в новом дереве:
+        снимок БД мог их уже содержать или ещё нет, так здание не теряется и не дублируется.
+        """
+        recorder = ([], set())
+        with self._lock:
+            self._recorders.append(recorder)
+        try:
+            result = await session.stream(select(Building.id, Building.latitude, Building.longitude))
+            points = [(*_to_unit_vector(lat, lon), point_id) async for point_id, lat, lon in result]
+            tree = await asyncio.to_thread(_KDTree, points)
+        finally:
+            with self._lock:
+                self._recorders.remove(recorder)
+
+        with self._lock:
+            added, hidden = recorder
+            buffer = self._changed_points(added)
+            self._state = (tree, buffer, frozenset(hidden | {point[3] for point in buffer}))
+        self.ready = True
+        logger.info(f"Индекс зданий загружен: {len(self)} точек, {self.memory_bytes / 1024:.1f} КБ")
+
+    def add(self, points: Iterable[tuple[int, float, float]]) -> None:
+        """Добавить новые здания (id, lat, lon) без перестройки дерева."""
+        if not self.ready:
+            return
+        new_points = [(*_to_unit_vector(lat, lon), point_id) for point_id, lat, lon in points]
+        self._replace(set(), new_points)
+
+    def move(self, points: Iterable[tuple[int, float, float]]) -> None:
+        """Новые координаты (id, lat, lon) изменённых зданий: старая точка скрывается, новая идёт в буфер."""
+        if not self.ready:
+            return
+        new_points = [(*_to_unit_vector(lat, lon), point_id) for point_id, lat, lon in points]
+        self._replace({point[3] for point in new_points}, new_points)
+
+    def remove(self, building_ids: Iterable[int]) -> None:
+        """Убрать удалённые здания."""
+        if not self.ready:
+            return
+        self._replace(set(building_ids), [])
+
+    def _replace(self, building_ids: set[int], new_points: list[tuple[float, float, float, int]]) -> None:
+        with self._lock:
+            tree, buffer, removed = self._state
+            kept = [point for point in buffer if point[3] not in building_ids] if building_ids else buffer
+            self._state = (tree, kept + new_points, removed | building_ids)
+            for added, hidden in self._recorders:
+                added.extend(new_points)
+                hidden.update(building_ids)
+        self._check_rebuild()
+
+    def _changed_points(self, added: list[tuple[float, float, float, int]]) -> list[tuple[float, float, float, int]]:
+        # точки из added, которые всё ещё в буфере (их не успели убрать или переместить); под self._lock
+        added_points = {id(point) for point in added}
+        return [point for point in self._state[1] if id(point) in added_points]
+
+    def within_radius(self, latitude: float, longitude: float, radius: float) -> list[tuple[int, float]]:
+        """Пары (id, расстояние в метрах) внутри круга, по возрастанию расстояния."""
+        tree, buffer, removed = self._state
+        query = _to_unit_vector(latitude, longitude)
+        chord_sq = _radius_to_chord_sq(radius)
+
+        hits = tree.within(query, chord_sq)
+        if removed:
+            hits = [hit for hit in hits if hit[0] not in removed]
+        qx, qy, qz = query
+        for x, y, z, point_id in buffer:
+            dist_sq = (qx - x) ** 2 + (qy - y) ** 2 + (qz - z) ** 2
+            if dist_sq <= chord_sq:
+                hits.append((point_id, dist_sq))
+
+        hits.sort(key=lambda hit: (hit[1], hit[0]))
+        return [(point_id, _chord_to_meters(dist_sq)) for point_id, dist_sq in hits]
+
+    def iter_nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        min_distance: float = 0.0,
+    ) -> Iterator[tuple[int, float]]:
+        """
+        Здания (id, расстояние в метрах) не ближе min_distance, от ближайшего к дальнему; читать столько,
+        сколько нужно.
+        """
+        tree, buffer, removed = self._state
+        query = _to_unit_vector(latitude, longitude)
+        qx, qy, qz = query
+        min_chord_sq = _radius_to_chord_sq(min_distance) if min_distance > 0 else 0.0
+        buffered = sorted(
+            hit
+            for hit in (((qx - x) ** 2 + (qy - y) ** 2 + (qz - z) ** 2, point_id) for x, y, z, point_id in buffer)
+            if hit[0] >= min_chord_sq
+        )
+        in_tree = (hit for hit in tree.nearest(query, min_chord_sq) if hit[1] not in removed)
+        for dist_sq, point_id in heapq.merge(in_tree, buffered):
+            yield point_id, _chord_to_meters(dist_sq)
+
+    def _check_rebuild(self) -> None:
+        tree, buffer, removed = self._state
+        if len(buffer) + len(removed) > max(self.min_rebuild_size, len(tree) * self.rebuild_ratio):
+            self._schedule_rebuild()
+
+    def _schedule_rebuild(self) -> None:
+        if self._rebuild_task and not self._rebuild_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._rebuild()
+            return
+        self._rebuild_task = loop.create_task(asyncio.to_thread(self._rebuild))
+
+    def _rebuild(self) -> None:
+        recorder = ([], set())
+        with self._lock:
+            tree, buffer, removed = self._state
+            self._recorders.append(recorder)
+        try:
+            coords, ids = tree.coords, tree.ids
+            points = buffer[:]
+            points.extend(
+                (coords[3 * i], coords[3 * i + 1], coords[3 * i + 2], ids[i])
+                for i in range(len(ids))
+                if ids[i] not in removed
+            )
+            new_tree = _KDTree(points)
+
+            with self._lock:
+                if self._state[0] is not tree:
+                    return  # индекс успели загрузить заново
+                # изменения во время перестройки: новые точки (если их не успели убрать) остаются в буфере,
+                # скрытые id — скрытыми, в том числе в новом дереве
+                added, hidden = recorder
+                self._state = (new_tree, self._changed_points(added), frozenset(hidden))
+        finally:
+            with self._lock:
+                self._recorders.remove(recorder)
+        logger.info(f"Индекс зданий перестроен: {len(self)} точек, {self.memory_bytes / 1024:.1f} КБ")
+
+
+building_index = BuildingIndex()
+
+
+async def load_building_index() -> None:
+    """Загрузка индекса при старте; без БД приложение стартует, а поиск идёт через SQL."""
+    try:
+        async with async_session_maker() as session:
+            await building_index.load(session)
+    except Exception as e:
+        logger.error(f"Индекс зданий не загружен, радиусный поиск пойдёт через БД: {e!r}")
@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Query, Depends
+from fastapi import APIRouter, Query, Depends, Response
 from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
+from app.api.building.cache import geo_cache
 from app.api.building.dao import BuildingDao
-from app.api.building.schemas import OrgBuildResponse
+from app.api.building.index import building_index
+from app.api.building.schemas import (
+    AreaQuery,
+    BatchRadiusQuery,
+    BuildingIndexStats,
+    ClusterResponse,
+    GeoCacheStats,
+    OrgBuildResponse,
+    ProbeResult,
+)
+from app.dao.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, PageParams
 from app.dependencies.dao_dep import get_session_without_commit
+from app.dependencies.pagination_dep import get_page_params
 
 router = APIRouter(
     prefix="/buildings",
@@ -20,8 +32,14 @@ router = APIRouter(
     response_model=list[OrgBuildResponse],
     summary="Получить список организаций в здании",
 )
-async def get_organizations(building_id: int, session: AsyncSession = Depends(get_session_without_commit)):
-    return await BuildingDao.get_organizations_by_id(session, building_id)
+async def get_organizations(
+    building_id: int,
+    page: PageParams = Depends(get_page_params),
+    session: AsyncSession = Depends(get_session_without_commit),
+):
+    # тело ответа уже сериализовано в Postgres — отдаём как есть, без валидации и повторной сериализации
+    result_page = await BuildingDao.get_organizations_by_id(session, building_id, page)
+    return Response(content=result_page.items, media_type="application/json", headers=result_page.headers)
 
 
 @router.get(
@@ -29,12 +47,117 @@ async def get_organizations(building_id: int, session: AsyncSession = Depends(ge
     response_model=list[OrgBuildResponse],
     response_class=ORJSONResponse,
     status_code=status.HTTP_200_OK,
-    summary="список организаций, которые находятся в заданном радиусе/прямоугольной",
+    summary="список организаций в заданном радиусе (м), отсортированный по расстоянию",
 )
 async def get_organizations_within_radius(
-    latitude: float = Query(..., example="55.972044"),
-    longitude: float = Query(..., example="37.297443"),
-    radius: float = Query(..., example="9"),
+    response: Response,
+    latitude: float = Query(..., ge=-90, le=90, example="55.972044"),
+    longitude: float = Query(..., ge=-180, le=180, example="37.297443"),
+    radius: float = Query(..., gt=0, example="9"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+    cursor: str | None = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+    session: AsyncSession = Depends(get_session_without_commit),
+):
+    result_page = await BuildingDao.get_orgs_within_radius(session, latitude, longitude, radius, limit, cursor)
+    response.headers.update(result_page.headers)
+    return result_page.items
+
+
+@router.post(
+    "/organizations/within-radius/batch",
+    response_model=list[ProbeResult],
+    response_class=ORJSONResponse,
+    status_code=status.HTTP_200_OK,
+    summary="пакетный радиусный поиск: организации или их количество для каждой точки, в порядке запроса",
+)
+async def get_organizations_within_radius_batch(
+    batch: BatchRadiusQuery,
+    session: AsyncSession = Depends(get_session_without_commit),
+):
+    return await BuildingDao.get_orgs_within_radius_batch(session, batch)
+
+
+@router.get(
+    "/organizations/nearest",
+    response_model=list[OrgBuildResponse],
+    response_class=ORJSONResponse,
+    status_code=status.HTTP_200_OK,
+    summary="k ближайших организаций к точке",
+)
+async def get_nearest_organizations(
+    latitude: float = Query(..., ge=-90, le=90, example="55.972044"),
+    longitude: float = Query(..., ge=-180, le=180, example="37.297443"),
+    k: int = Query(10, ge=1, le=100, description="Сколько организаций вернуть"),
+    activity: str | None = Query(None, example="Еда", description="Только организации с этим видом деятельности"),
     session: AsyncSession = Depends(get_session_without_commit),
 ):
-    return await BuildingDao.get_orgs_within_radius(session, latitude, longitude, radius)
+    return await BuildingDao.get_nearest_orgs(session, latitude, longitude, k, activity)
+
+
+@router.post(
+    "/organizations/within-area",
+    response_model=list[OrgBuildResponse],
+    response_class=ORJSONResponse,
+    status_code=status.HTTP_200_OK,
+    summary="список организаций внутри полигона GeoJSON или прямоугольника (bbox)",
+)
+async def get_organizations_within_area(
+    area: AreaQuery,
+    response: Response,
+    session: AsyncSession = Depends(get_session_without_commit),
+):
+    result_page = await BuildingDao.get_orgs_within_area(session, area)
+    response.headers.update(result_page.headers)
+    return result_page.items
+
+
+@router.get(
+    "/organizations/clusters",
+    response_model=list[ClusterResponse],
+    response_class=ORJSONResponse,
+    status_code=status.HTTP_200_OK,
+    summary="кластеры организаций в окне карты для заданного масштаба",
+)
+async def get_organization_clusters(
+    min_lon: float = Query(..., ge=-180, le=180, example="37.3", description="min_lon > max_lon — через антимеридиан"),
+    min_lat: float = Query(..., ge=-90, le=90, example="55.5"),
+    max_lon: float = Query(..., ge=-180, le=180, example="37.9"),
+    max_lat: float = Query(..., ge=-90, le=90, example="56.0"),
+    zoom: int = Query(..., ge=0, le=22, example="10", description="Уровень масштаба карты"),
+    session: AsyncSession = Depends(get_session_without_commit),
+):
+    return await BuildingDao.get_clusters(session, min_lon, min_lat, max_lon, max_lat, zoom)
+
+
+@router.get(
+    "/index/stats",
+    response_model=BuildingIndexStats,
+    response_class=ORJSONResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Состояние индекса зданий в памяти",
+)
+async def get_building_index_stats():
+    return BuildingIndexStats(
+        ready=building_index.ready,
+        size=len(building_index),
+        buffered=building_index.buffered,
+        memory_bytes=building_index.memory_bytes,
+    )
+
+
+@router.get(
+    "/cache/stats",
+    response_model=GeoCacheStats,
+    response_class=ORJSONResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Счётчики кэша радиусного поиска",
+)
+async def get_geo_cache_stats():
+    return GeoCacheStats(
+        enabled=geo_cache.enabled,
+        entries=len(geo_cache),
+        memory_bytes=geo_cache.memory_bytes,
+        hits=geo_cache.hits,
+        misses=geo_cache.misses,
+        invalidations=geo_cache.invalidations,
+    )
@@ -1,6 +1,11 @@
-from pydantic import Field, BaseModel, ConfigDict, field_validator
+from pydantic import Field, BaseModel, ConfigDict, field_validator, model_validator
 import re
 from datetime import datetime
+from typing import Literal, Self
+
+from app.dao.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+MAX_BATCH_PROBES = 1000  # точек в одном пакетном запросе
 
 
 class BaseModelConfig(BaseModel):
@@ -53,3 +58,92 @@ class ActivityBase(BaseModelConfig):
 class OrgBuildResponse(OrganizationBase, ResponseSchema):
     address: str = Field(description="Название здания", examples=["Блюхера, 32/1"])
     activities: list[ActivityBase]
+    distance_m: float | None = Field(
+        default=None,
+        description="Расстояние до здания в метрах (только для геопоиска)",
+        examples=[350.5],
+    )
+
+
+class BuildingIndexStats(BaseModel):
+    ready: bool = Field(description="Индекс загружен и обслуживает радиусный поиск")
+    size: int = Field(description="Количество зданий в индексе")
+    buffered: int = Field(description="Здания, добавленные после последней перестройки дерева")
+    memory_bytes: int = Field(description="Оценка занимаемой памяти в байтах")
+
+
+class GeoCacheStats(BaseModel):
+    enabled: bool = Field(description="Кэш радиусного поиска включён")
+    entries: int = Field(description="Записей в кэше")
+    memory_bytes: int = Field(description="Оценка занимаемой памяти в байтах")
+    hits: int = Field(description="Попадания")
+    misses: int = Field(description="Промахи")
+    invalidations: int = Field(description="Записи, сброшенные из-за изменений в БД")
+
+
+class ClusterResponse(BaseModel):
+    latitude: float = Field(description="Центр кластера (среднее по организациям)", examples=[55.75])
+    longitude: float = Field(description="Центр кластера (среднее по организациям)", examples=[37.62])
+    count: int = Field(description="Организаций в кластере", examples=[42])
+    buildings: int = Field(description="Зданий в кластере", examples=[7])
+
+
+class PolygonGeometry(BaseModel):
+    type: Literal["Polygon"] = "Polygon"
+    coordinates: list[list[tuple[float, float]]] = Field(
+        min_length=1,
+        description="Кольца GeoJSON в координатах [lon, lat]: первое внешнее, остальные — вырезы",
+        examples=[[[[37.0, 55.0], [38.0, 55.0], [38.0, 56.0], [37.0, 56.0], [37.0, 55.0]]]],
+    )
+
+    @field_validator("coordinates")
+    def validate_rings(cls, v):
+        for ring in v:
+            if len(ring) < 3:
+                raise ValueError("Кольцо полигона должно содержать не меньше 3 точек")
+            for lon, lat in ring:
+                if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+                    raise ValueError("Координаты должны быть в формате [lon, lat] в градусах")
+        return v
+
+
+class AreaQuery(BaseModel):
+    geometry: PolygonGeometry | None = Field(default=None, description="Полигон GeoJSON")
+    bbox: tuple[float, float, float, float] | None = Field(
+        default=None,
+        description="Прямоугольник GeoJSON [min_lon, min_lat, max_lon, max_lat]; min_lon > max_lon — через антимеридиан",
+        examples=[[37.5, 55.6, 37.7, 55.8]],
+    )
+    limit: int = Field(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы")
+    cursor: str | None = Field(default=None, description="Курсор следующей страницы из заголовка X-Next-Cursor")
+    with_total: bool = Field(default=False, description="Вернуть общее число организаций в заголовке X-Total-Count")
+
+    @model_validator(mode="after")
+    def check_area(self) -> Self:
+        if (self.geometry is None) == (self.bbox is None):
+            raise ValueError("Нужно указать ровно одно из полей: geometry или bbox")
+        if self.bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = self.bbox
+            if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+                raise ValueError("bbox должен быть в формате [min_lon, min_lat, max_lon, max_lat]")
+        return self
+
+
+class RadiusProbe(BaseModel):
+    latitude: float = Field(ge=-90, le=90, examples=[55.972044])
+    longitude: float = Field(ge=-180, le=180, examples=[37.297443])
+    radius: float = Field(gt=0, description="Радиус в метрах", examples=[500])
+
+
+class BatchRadiusQuery(BaseModel):
+    probes: list[RadiusProbe] = Field(min_length=1, max_length=MAX_BATCH_PROBES, description="Точки поиска")
+    counts_only: bool = Field(default=False, description="Вернуть только количество организаций по каждой точке")
+    limit: int = Field(default=100, ge=1, le=1000, description="Максимум организаций на одну точку")
+
+
+class ProbeResult(BaseModel):
+    count: int = Field(description="Всего организаций в радиусе точки")
+    organizations: list[OrgBuildResponse] | None = Field(
+        default=None,
+        description="Организации по возрастанию расстояния (не больше limit); нет при counts_only",
+    )
@@ -0,0 +1,144 @@
+"""
+Потоковая выгрузка всех организаций с адресом здания и видами деятельности.
+
+Сессия открывается внутри генератора ответа и живёт, пока клиент читает. Строки идут по id одним
+запросом (снимок на момент его начала), виды деятельности — коррелированным подзапросом по индексу,
+поэтому первые строки уходят сразу, без агрегации всей таблицы. CSV отдаёт сам Postgres через
+COPY ... TO STDOUT; NDJSON — серверный курсор по готовым JSON-строкам (в текстовом COPY обратные слэши
+JSON экранировались бы повторно). В памяти — не больше EXPORT_QUEUE_CHUNKS кусков или EXPORT_BATCH_ROWS строк.
+"""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+
+from sqlalchemy import cast, ColumnElement, func, literal, ScalarSelect, select, Select, Text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from app.api.importer.schemas import PHONE_SEPARATOR
+from app.api.organization.projection import (
+    activities,
+    buildings,
+    CREATED_AT_FORMAT,
+    EMPTY_JSON_ARRAY,
+    organization_activity,
+    organizations,
+)
+from app.dao.base import BaseDAO
+from app.dao.database import async_session_maker
+from app.models import Organization
+
+logger = logging.getLogger(__name__)
+
+# строк NDJSON за одно чтение серверного курсора
+EXPORT_BATCH_ROWS = 1000
+# кусков COPY, которые ждут отправки клиенту; COPY ждёт, пока клиент не прочитает
+EXPORT_QUEUE_CHUNKS = 16
+# списки в ячейке CSV — через тот же разделитель, что у номеров в импорте
+LIST_SEPARATOR = PHONE_SEPARATOR
+
+
+def _activity_names(aggregate: ColumnElement) -> ScalarSelect:
+    # виды деятельности одной организации; organizations коррелирует с внешним запросом
+    return (
+        select(aggregate)
+        .select_from(organization_activity)
+        .join(activities, activities.c.id == organization_activity.c.activity_id)
+        .where(organization_activity.c.organization_id == organizations.c.id)
+        .scalar_subquery()
+    )
+
+
+def export_rows(phone_numbers: ColumnElement, activity_names: ColumnElement) -> Select:
+    """Все организации по id; представление номеров и видов деятельности задаёт формат."""
+    return (
+        select(
+            organizations.c.id,
+            func.to_char(organizations.c.created_at, CREATED_AT_FORMAT).label("created_at"),
+            organizations.c.name,
+            phone_numbers.label("phone_numbers"),
+            organizations.c.building_id,
+            buildings.c.address,
+            buildings.c.latitude,
+            buildings.c.longitude,
+            activity_names.label("activities"),
+        )
+        .select_from(organizations)
+        .join(buildings, buildings.c.id == organizations.c.building_id)
+        .order_by(organizations.c.id)
+    )
+
+
+def csv_rows() -> Select:
+    """Номера и виды деятельности — строкой через ";", как их принимает импорт."""
+    phones = (
+        func.jsonb_array_elements_text(organizations.c.phone_numbers)
+        .table_valued(
+            "value",
+            with_ordinality="position",
+        )
+        .render_derived()
+    )
+    phone_numbers = select(
+        func.string_agg(phones.c.value, aggregate_order_by(literal(LIST_SEPARATOR), phones.c.position)),
+    ).scalar_subquery()
+    activity_names = _activity_names(
+        func.string_agg(activities.c.name, aggregate_order_by(literal(LIST_SEPARATOR), activities.c.id)),
+    )
+    return export_rows(phone_numbers, activity_names)
+
+
+def ndjson_rows() -> Select:
+    """Одна колонка — JSON-объект организации текстом; номера и виды деятельности — массивами."""
+    activity_names = _activity_names(
+        func.coalesce(func.json_agg(aggregate_order_by(activities.c.name, activities.c.id)), EMPTY_JSON_ARRAY),
+    )
+    rows = export_rows(organizations.c.phone_numbers, activity_names)
+    fields = [part for column in rows.selected_columns for part in (literal(column.name), column)]
+    return rows.with_only_columns(cast(func.json_build_object(*fields), Text))
+
+
+class ExportDao(BaseDAO):
+    model = Organization
+
+    @classmethod
+    async def stream_csv(cls) -> AsyncIterator[bytes]:
+        """CSV с заголовком через COPY ... TO STDOUT."""
+        sql = str(csv_rows().compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+        queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=EXPORT_QUEUE_CHUNKS)
+        logger.info("Выгрузка организаций в CSV")
+
+        async with async_session_maker() as session:
+            connection = await session.connection()
+            driver_connection = (await connection.get_raw_connection()).driver_connection
+
+            async def write(data: bytearray) -> None:
+                await queue.put(bytes(data))  # asyncpg отдаёт bytearray, StreamingResponse ждёт bytes
+
+            async def copy() -> None:
+                try:
+                    await driver_connection.copy_from_query(sql, output=write, format="csv", header=True)
+                finally:
+                    # при отмене клиент уже ушёл: ждать места в очереди некому
+                    if not asyncio.current_task().cancelling():
+                        await queue.put(None)
+
+            task = asyncio.create_task(copy())
+            try:
+                while (chunk := await queue.get()) is not None:
+                    yield chunk
+                await task  # ошибка COPY — после уже отправленных кусков
+            finally:
+                if not task.done():
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+
+    @classmethod
+    async def stream_ndjson(cls) -> AsyncIterator[bytes]:
+        """NDJSON: по объекту на строку, пачками по EXPORT_BATCH_ROWS через серверный курсор."""
+        logger.info("Выгрузка организаций в NDJSON")
+        async with async_session_maker() as session:
+            result = await session.stream(ndjson_rows(), execution_options={"yield_per": EXPORT_BATCH_ROWS})
+            async for lines in result.scalars().partitions():
+                yield "".join(f"{line}\n" for line in lines).encode()
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from starlette import status
+
+from app.api.export.dao import ExportDao
+from app.api.export.schemas import ExportFormat, MEDIA_TYPES
+
+router = APIRouter(
+    prefix="/export",
+    tags=["Экспорт"],
+)
+
+
+@router.get(
+    "/organizations",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    summary="выгрузка всех организаций с адресом и видами деятельности потоком в CSV/NDJSON",
+)
+async def export_organizations(
+    format: ExportFormat = Query("csv", description="csv — с заголовком, ndjson — JSON-объект на строку"),
+):
+    # сессию открывает сам поток: зависимость закрыла бы её до отправки тела
+    chunks = ExportDao.stream_csv() if format == "csv" else ExportDao.stream_ndjson()
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="organizations.{format}"'},
+    )
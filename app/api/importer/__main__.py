@@ -0,0 +1,50 @@
+"""
+Массовый импорт из файла: python -m app.api.importer {buildings,organizations,links} FILE [--format ndjson]
+
+Загружает так же, как POST /import/{kind}, напрямую в БД. Индексы в памяти уже запущенных экземпляров
+приложения (здания, подсказки) увидят новые данные после перезапуска.
+"""
+
+import argparse
+import asyncio
+import sys
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import get_args
+
+from fastapi import HTTPException
+
+from app.api.importer.dao import IMPORT_DAOS
+from app.api.importer.schemas import ImportFormat, ImportKind
+from app.dao.database import async_session_maker
+
+READ_SIZE = 1024 * 1024
+
+
+async def _read_file(path: Path) -> AsyncIterator[bytes]:
+    with path.open("rb") as file:
+        while chunk := await asyncio.to_thread(file.read, READ_SIZE):
+            yield chunk
+
+
+async def main(kind: ImportKind, path: Path, fmt: ImportFormat, skip_invalid: bool) -> int:
+    async with async_session_maker() as session:
+        try:
+            result = await IMPORT_DAOS[kind].import_stream(session, _read_file(path), fmt, skip_invalid)
+        except HTTPException as e:
+            print(e.detail, file=sys.stderr)
+            return 1
+        await session.commit()
+    print(result.model_dump_json(indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.api.importer", description="Массовый импорт из CSV/NDJSON")
+    parser.add_argument("kind", choices=get_args(ImportKind))
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=get_args(ImportFormat), help="по умолчанию — по расширению файла")
+    parser.add_argument("--skip-invalid", action="store_true", help="отбросить невалидные строки")
+    args = parser.parse_args()
+    fmt = args.format or ("ndjson" if args.path.suffix in (".ndjson", ".jsonl") else "csv")
+    sys.exit(asyncio.run(main(args.kind, args.path, fmt, args.skip_invalid)))
@@ -0,0 +1,303 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterable, Callable, Coroutine
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import (
+    Boolean,
+    cast,
+    Column,
+    ColumnElement,
+    delete,
+    exists,
+    Float,
+    func,
+    insert,
+    Integer,
+    literal_column,
+    MetaData,
+    select,
+    Table,
+    Text,
+    text,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert, REGCLASS
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.types import TypeEngine
+from starlette import status
+
+from app.api.building.cache import geo_cache
+from app.api.building.index import building_index, load_building_index
+from app.api.importer.reader import iter_rows
+from app.api.importer.schemas import (
+    BuildingImportRow,
+    ImportFormat,
+    ImportKind,
+    ImportResult,
+    ImportRowError,
+    LinkImportRow,
+    OrganizationImportRow,
+)
+from app.api.suggest.index import load_suggest_index, suggest_index
+from app.core.settings import APP_CONFIG
+from app.dao.base import BaseDAO
+from app.dao.hooks import after_commit
+from app.models import Activity, Building, Organization, OrganizationActivity
+
+logger = logging.getLogger(__name__)
+
+# сколько ошибок по строкам попадает в ответ; остальные только считаются
+MAX_REPORTED_ERRORS = 100
+
+# фоновые перезагрузки индексов: ссылка держится, пока задача не завершится
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _reload_in_background(loader: Callable[[], Coroutine]) -> None:
+    task = asyncio.get_running_loop().create_task(loader())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+class BulkImportDao(BaseDAO):
+    """
+    Массовый импорт из CSV/NDJSON: строки валидируются кусками по import_chunk_size и грузятся COPY во
+    временную таблицу, затем одним INSERT ... SELECT переносятся в целевую.
+
+    Строки с ключом (conflict) добавляются или обновляются, повтор ключа в файле — побеждает последняя
+    строка; строки без id добавляются с id из последовательности. Ссылки на несуществующие записи
+    проверяются до слияния. Всё — в транзакции сессии: при ошибке ничего не загружается.
+    """
+
+    kind: ImportKind
+    row_schema: type[BaseModel]
+    # поля строки файла = колонки временной таблицы, в порядке COPY
+    staging_columns: tuple[tuple[str, TypeEngine], ...]
+    conflict: tuple[str, ...] = ("id",)
+    # колонка -> таблица, на id которой она ссылается
+    references: dict[str, Table] = {}
+
+    @classmethod
+    def _staging_table(cls) -> Table:
+        return Table(
+            f"import_{cls.model.__tablename__}",
+            MetaData(),
+            Column("line", Integer, nullable=False),
+            *[Column(name, type_) for name, type_ in cls.staging_columns],
+            prefixes=["TEMPORARY"],
+            postgresql_on_commit="DROP",
+        )
+
+    @classmethod
+    def _source_columns(cls, staging: Table) -> list[ColumnElement]:
+        """Значения колонок целевой таблицы из временной, в порядке staging_columns."""
+        return [staging.c[name] for name, _ in cls.staging_columns]
+
+    @classmethod
+    def _after_import(cls, session: AsyncSession) -> None:
+        # затронуто может быть что угодно: кэш геопоиска сбрасывается целиком
+        after_commit(session, geo_cache.clear)
+
+    @classmethod
+    async def import_stream(
+        cls,
+        session: AsyncSession,
+        chunks: AsyncIterable[bytes],
+        fmt: ImportFormat,
+        skip_invalid: bool = False,
+        chunk_size: int | None = None,
+    ) -> ImportResult:
+        """
+        Загрузить поток байт файла. Без skip_invalid первая пачка с ошибками прерывает импорт (HTTP 422 со
+        списком ошибок), со skip_invalid невалидные строки и строки с висячими ссылками отбрасываются.
+        """
+        chunk_size = chunk_size or APP_CONFIG.db.import_chunk_size
+        names = [name for name, _ in cls.staging_columns]
+        logger.info(f"Импорт {cls.model.__name__} ({fmt}), пачками по {chunk_size} строк")
+
+        connection = await session.connection()
+        staging = cls._staging_table()
+        await connection.run_sync(staging.create)
+        driver_connection = (await connection.get_raw_connection()).driver_connection
+
+        rows = skipped = 0
+        errors: list[ImportRowError] = []
+        records: list[tuple] = []
+        async for line_no, row in iter_rows(chunks, fmt, cls.row_schema):
+            rows += 1
+            if isinstance(row, str):
+                skipped += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(ImportRowError(line=line_no, error=row))
+                continue
+            records.append((line_no, *(getattr(row, name) for name in names)))
+            if len(records) >= chunk_size:
+                if errors and not skip_invalid:
+                    break
+                await driver_connection.copy_records_to_table(staging.name, records=records, columns=["line", *names])
+                records.clear()
+        if errors and not skip_invalid:
+            cls._reject(errors)
+        if records:
+            await driver_connection.copy_records_to_table(staging.name, records=records, columns=["line", *names])
+            records.clear()
+        # временные таблицы автоочистка не анализирует, а без статистики план слияния хуже
+        await connection.execute(text(f"ANALYZE {staging.name}"))
+
+        try:
+            for column, target in cls.references.items():
+                dangling = ~exists().where(target.c.id == staging.c[column])
+                result = await connection.execute(
+                    select(staging.c.line, staging.c[column])
+                    .where(dangling)
+                    .order_by(staging.c.line)
+                    .limit(MAX_REPORTED_ERRORS),
+                )
+                missing = [
+                    ImportRowError(line=line, error=f"{column}: нет записи с id {value}") for line, value in result
+                ]
+                if not missing:
+                    continue
+                if not skip_invalid:
+                    cls._reject(missing)
+                errors.extend(missing[: MAX_REPORTED_ERRORS - len(errors)])
+                skipped += (await connection.execute(delete(staging).where(dangling))).rowcount
+
+            inserted, updated = await cls._merge(connection, staging)
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при импорте {cls.model.__name__}: {e}")
+            raise
+
+        logger.info(
+            f"Импорт {cls.model.__name__}: строк {rows}, добавлено {inserted}, обновлено {updated}, "
+            f"отброшено {skipped}",
+        )
+        if inserted or updated:
+            cls._after_import(session)
+        return ImportResult(
+            kind=cls.kind,
+            rows=rows,
+            inserted=inserted,
+            updated=updated,
+            skipped=skipped,
+            errors=errors,
+        )
+
+    @classmethod
+    async def _merge(cls, connection: AsyncConnection, staging: Table) -> tuple[int, int]:
+        """Перенести строки из временной таблицы в целевую; возвращает (добавлено, обновлено)."""
+        table = cls.model.__table__
+        names = [name for name, _ in cls.staging_columns]
+        source = cls._source_columns(staging)
+        key = [staging.c[name] for name in cls.conflict]
+
+        keyed = (
+            select(*source)
+            .where(*[column.is_not(None) for column in key])
+            # повтор ключа в файле: ON CONFLICT не меняет строку дважды — оставляем последнюю
+            .distinct(*key)
+            .order_by(*key, staging.c.line.desc())
+        )
+        stmt = pg_insert(table).from_select(names, keyed)
+        update = [name for name in names if name not in cls.conflict]
+        if update:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=cls.conflict,
+                set_={name: stmt.excluded[name] for name in update},
+                where=tuple_(*[table.c[name] for name in update]).is_distinct_from(
+                    tuple_(*[stmt.excluded[name] for name in update]),
+                ),
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=cls.conflict)
+        # xmax = 0 только у только что вставленной версии строки; считаем в БД, не выгружая строки
+        merged = stmt.returning(literal_column("xmax = 0", Boolean).label("inserted")).cte("merged")
+        result = await connection.execute(
+            select(func.count().filter(merged.c.inserted), func.count().filter(~merged.c.inserted)),
+        )
+        inserted, updated = result.one()
+
+        if cls.conflict == ("id",):
+            if inserted:
+                # явные id не должны столкнуться с id, которые последовательность выдаст дальше;
+                # назад её не двигаем: уже выданные id (в т.ч. параллельными транзакциями) не выдаются повторно
+                sequence = func.pg_get_serial_sequence(table.name, "id")
+                last_value = func.pg_sequence_last_value(cast(sequence, REGCLASS))
+                await connection.execute(
+                    select(func.setval(sequence, func.greatest(func.max(table.c.id), last_value))),
+                )
+            generated = [(name, column) for name, column in zip(names, source) if name != "id"]
+            result = await connection.execute(
+                insert(table).from_select(
+                    [name for name, _ in generated],
+                    select(*[column for _, column in generated]).where(staging.c.id.is_(None)).order_by(staging.c.line),
+                ),
+            )
+            inserted += result.rowcount
+        return inserted, updated
+
+    @staticmethod
+    def _reject(errors: list[ImportRowError]) -> None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[error.model_dump() for error in errors],
+        )
+
+
+class BuildingImportDao(BulkImportDao):
+    kind = "buildings"
+    model = Building
+    row_schema = BuildingImportRow
+    staging_columns = (("id", Integer()), ("address", Text()), ("latitude", Float()), ("longitude", Float()))
+
+    @classmethod
+    def _after_import(cls, session: AsyncSession) -> None:
+        super()._after_import(session)
+        if building_index.ready:
+            after_commit(session, lambda: _reload_in_background(load_building_index))
+
+
+class OrganizationImportDao(BulkImportDao):
+    kind = "organizations"
+    model = Organization
+    row_schema = OrganizationImportRow
+    staging_columns = (
+        ("id", Integer()),
+        ("name", Text()),
+        ("phone_numbers", ARRAY(Text())),
+        ("building_id", Integer()),
+    )
+    references = {"building_id": Building.__table__}
+
+    @classmethod
+    def _source_columns(cls, staging: Table) -> list[ColumnElement]:
+        # во временной таблице номера — text[], в целевой — jsonb
+        return [
+            staging.c.id,
+            staging.c.name,
+            func.to_jsonb(staging.c.phone_numbers),
+            staging.c.building_id,
+        ]
+
+    @classmethod
+    def _after_import(cls, session: AsyncSession) -> None:
+        super()._after_import(session)
+        if suggest_index.ready:
+            after_commit(session, lambda: _reload_in_background(load_suggest_index))
+
+
+class LinkImportDao(BulkImportDao):
+    kind = "links"
+    model = OrganizationActivity
+    row_schema = LinkImportRow
+    staging_columns = (("organization_id", Integer()), ("activity_id", Integer()))
+    conflict = ("organization_id", "activity_id")
+    references = {"organization_id": Organization.__table__, "activity_id": Activity.__table__}
+
+
+IMPORT_DAOS: dict[str, type[BulkImportDao]] = {
+    dao.kind: dao for dao in (BuildingImportDao, OrganizationImportDao, LinkImportDao)
+}
@@ -0,0 +1,78 @@
+"""
+Потоковое чтение файла импорта: байты приходят кусками (тело запроса, файл), строки разбираются и
+валидируются по одной, в памяти — только текущий кусок и незаконченная строка.
+
+Одна запись — одна строка: в CSV первая строка — заголовок с именами полей, переводы строк внутри ячеек
+не поддерживаются; в NDJSON — JSON-объект на строку. Пустые строки пропускаются.
+"""
+
+import codecs
+import csv
+from collections.abc import AsyncIterable, AsyncIterator
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from starlette import status
+
+from app.api.importer.schemas import ImportFormat
+
+# защита от файла без переводов строк: незаконченная строка не растёт бесконечно
+MAX_LINE_LENGTH = 1024 * 1024
+
+# ключ для ячеек CSV сверх заголовка: модель строки отклоняет его как лишнее поле
+EXTRA_CELLS = "__extra__"
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, str]]:
+    """Пары (номер строки с 1, строка без перевода строки) из потока байт UTF-8."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    line_no = 0
+    tail = ""
+    async for chunk in chunks:
+        *lines, tail = (tail + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, line.rstrip("\r")
+        if len(tail) > MAX_LINE_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Строка {line_no + 1} длиннее {MAX_LINE_LENGTH} символов.",
+            )
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield line_no + 1, tail.rstrip("\r")
+
+
+def format_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, detail['loc'])) or 'строка'}: {detail['msg']}"
+        for detail in error.errors(include_url=False)
+    )
+
+
+async def iter_rows(
+    chunks: AsyncIterable[bytes],
+    fmt: ImportFormat,
+    row_schema: type[BaseModel],
+) -> AsyncIterator[tuple[int, BaseModel | str]]:
+    """Пары (номер строки, провалидированная строка или текст ошибки)."""
+    header: list[str] | None = None
+    async for line_no, line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            if fmt == "ndjson":
+                yield line_no, row_schema.model_validate_json(line)
+                continue
+            cells = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in cells]
+                continue
+            record = dict(zip(header, cells))
+            if len(cells) > len(header):
+                record[EXTRA_CELLS] = cells[len(header) :]
+            yield line_no, row_schema.model_validate(record)
+        except ValidationError as e:
+            yield line_no, format_error(e)
+        except csv.Error as e:
+            yield line_no, f"строка: {e}"
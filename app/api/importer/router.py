@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from app.api.importer.dao import IMPORT_DAOS
+from app.api.importer.schemas import ImportFormat, ImportKind, ImportResult
+from app.dependencies.auth_dep import get_current_admin_user_cookie
+from app.dependencies.dao_dep import get_session_with_commit
+from app.models import User
+
+router = APIRouter(
+    prefix="/import",
+    tags=["Импорт"],
+)
+
+
+@router.post(
+    "/{kind}",
+    response_model=ImportResult,
+    response_class=ORJSONResponse,
+    status_code=status.HTTP_200_OK,
+    summary="массовый импорт зданий, организаций или связей организация–деятельность из CSV/NDJSON в теле запроса",
+)
+async def import_rows(
+    kind: ImportKind,
+    request: Request,
+    format: ImportFormat = Query("csv", description="csv — с заголовком, ndjson — JSON-объект на строку"),
+    skip_invalid: bool = Query(False, description="Отбросить невалидные строки вместо отказа всего импорта"),
+    session: AsyncSession = Depends(get_session_with_commit),
+    # импорт заменяет строки по явным id — только администратор
+    user_data: User = Depends(get_current_admin_user_cookie),
+):
+    # тело читается потоком: в памяти только текущая пачка строк
+    return await IMPORT_DAOS[kind].import_stream(session, request.stream(), format, skip_invalid)
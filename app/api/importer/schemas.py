@@ -0,0 +1,65 @@
+import json
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from app.api.organization.schemas import BuildingCreate, OrganizationActivityCreate, OrganizationCreate
+
+ImportKind = Literal["buildings", "organizations", "links"]
+ImportFormat = Literal["csv", "ndjson"]
+
+# разделитель номеров в ячейке CSV: "2-222-222;3-333-333"
+PHONE_SEPARATOR = ";"
+
+
+class ImportRow(BaseModel):
+    """Строка файла импорта: лишние поля — ошибка, пустая ячейка CSV — отсутствующее значение."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def empty_to_none(cls, v):
+        return None if v == "" else v
+
+
+class BuildingImportRow(ImportRow, BuildingCreate):
+    id: int | None = Field(
+        default=None, ge=1, description="Без id здание добавляется, с id — добавляется или заменяется"
+    )
+
+
+class OrganizationImportRow(ImportRow, OrganizationCreate):
+    id: int | None = Field(
+        default=None,
+        ge=1,
+        description="Без id организация добавляется, с id — добавляется или заменяется",
+    )
+
+    @field_validator("phone_numbers", mode="before")
+    @classmethod
+    def split_phone_numbers(cls, v):
+        # в CSV номера приходят одной ячейкой: через ";" или JSON-массивом
+        if isinstance(v, str):
+            if v.lstrip().startswith("["):
+                return json.loads(v)
+            return [number.strip() for number in v.split(PHONE_SEPARATOR) if number.strip()]
+        return v
+
+
+class LinkImportRow(ImportRow, OrganizationActivityCreate):
+    pass
+
+
+class ImportRowError(BaseModel):
+    line: int = Field(description="Номер строки файла, начиная с 1")
+    error: str
+
+
+class ImportResult(BaseModel):
+    kind: ImportKind
+    rows: int = Field(description="Прочитано строк с данными")
+    inserted: int
+    updated: int
+    skipped: int = Field(description="Отброшено невалидных строк (skip_invalid)")
+    errors: list[ImportRowError] = Field(description="Первые ошибки по строкам")
@@ -1,11 +1,17 @@
 import logging
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import and_, func, or_, Row, select
 from sqlalchemy.orm import joinedload, selectinload
 
-from app.api.organization.schemas import OrganizationResponse
+from app.api.building.cache import geo_cache
+from app.core.phones import canonical_phone
+from app.api.organization.projection import fetch_rows, organization_rows, organizations, to_response
+from app.api.organization.schemas import OrganizationResponse, OrganizationSearchHit, OrganizationSearchPage
+from app.api.suggest.index import ORGANIZATION, suggest_index
 from app.dao.base import BaseDAO
+from app.dao.hooks import after_commit
+from app.dao.pagination import decode_cursor, encode_cursor, keyset, Page, PageParams, to_page
 from app.models import Organization, OrganizationActivity
 from fastapi import HTTPException, status
 
@@ -15,9 +21,52 @@ logger = logging.getLogger(__name__)
 class OrganizationActivityDao(BaseDAO):
     model = OrganizationActivity
 
+    # виды деятельности входят в ответ геопоиска — сбрасываем записи кэша с этими организациями
+    @classmethod
+    def _after_add(cls, session: AsyncSession, instances: list[OrganizationActivity | Row]) -> None:
+        org_ids = [link.organization_id for link in instances]
+        after_commit(session, lambda: geo_cache.invalidate(org_ids=org_ids))
+
+    @classmethod
+    def _after_update(cls, session: AsyncSession, rows: list[Row]) -> None:
+        org_ids = [row.organization_id for row in rows]
+        after_commit(session, lambda: geo_cache.invalidate(org_ids=org_ids))
+
+    @classmethod
+    def _after_delete(cls, session: AsyncSession, rows: list[Row]) -> None:
+        org_ids = [row.organization_id for row in rows]
+        after_commit(session, lambda: geo_cache.invalidate(org_ids=org_ids))
+
 
 class OrganizationDao(BaseDAO):
     model = Organization
+    old_columns = ("name",)
+
+    # кэш геопоиска: новая организация меняет ответ только там, где её здание уже просматривалось
+    @classmethod
+    def _after_add(cls, session: AsyncSession, instances: list[Organization | Row]) -> None:
+        building_ids = [org.building_id for org in instances]
+        names = [org.name for org in instances]
+        after_commit(session, lambda: geo_cache.invalidate(building_ids=building_ids))
+        after_commit(session, lambda: suggest_index.add(ORGANIZATION, names))
+
+    @classmethod
+    def _after_update(cls, session: AsyncSession, rows: list[Row]) -> None:
+        org_ids = [row.id for row in rows]
+        building_ids = [row.building_id for row in rows]
+        after_commit(session, lambda: geo_cache.invalidate(building_ids=building_ids, org_ids=org_ids))
+        # подсказки: старое название уходит, новое добавляется
+        renamed = [(row.old_name, row.name) for row in rows if row.old_name != row.name]
+        if renamed:
+            after_commit(session, lambda: suggest_index.remove(ORGANIZATION, [old for old, _ in renamed]))
+            after_commit(session, lambda: suggest_index.add(ORGANIZATION, [new for _, new in renamed]))
+
+    @classmethod
+    def _after_delete(cls, session: AsyncSession, rows: list[Row]) -> None:
+        org_ids = [row.id for row in rows]
+        names = [row.name for row in rows]
+        after_commit(session, lambda: geo_cache.invalidate(org_ids=org_ids))
+        after_commit(session, lambda: suggest_index.remove(ORGANIZATION, names))
 
     # deprecated (для ознакомления)
     # @classmethod
@@ -59,54 +108,113 @@ class OrganizationDao(BaseDAO):
 
     @classmethod
     async def get_orgs_by_id(cls, session: AsyncSession, organization_id: int) -> OrganizationResponse:
-        query = (
-            select(cls.model)
-            .options(joinedload(cls.model.building), selectinload(cls.model.activities))
-            .where(cls.model.id == organization_id)
-        )
+        query = organization_rows().where(organizations.c.id == organization_id)
+        rows = await fetch_rows(session, query)
 
-        result = await session.execute(query)
-        organization = result.scalar_one_or_none()
-
-        if not organization:
+        if not rows:
             logger.info(f"Организация {organization_id} не найдена.")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Организация {organization_id} не найдена.",
             )
 
-        result = OrganizationResponse(
-            id=organization.id,
-            created_at=organization.created_at,
-            name=organization.name,
-            phone_numbers=organization.phone_numbers,
-            address=organization.building.address,
-            activities=organization.activities,
-        )
+        result = to_response(rows[0], OrganizationResponse)
         logger.info(f"Организация {organization_id} найдена. ")
         return result
 
+    @classmethod
+    async def get_orgs_by_ids(cls, session: AsyncSession, organization_ids: list[int]) -> list[OrganizationResponse]:
+        organizations = await cls.find_many_by_ids(
+            session,
+            organization_ids,
+            options=(selectinload(cls.model.building), selectinload(cls.model.activities)),
+        )
+        return [
+            OrganizationResponse(
+                id=organization.id,
+                created_at=organization.created_at,
+                name=organization.name,
+                phone_numbers=organization.phone_numbers,
+                address=organization.building.address,
+                activities=organization.activities,
+            )
+            for organization in organizations
+        ]
+
+    @classmethod
+    async def get_orgs_by_phone(
+        cls,
+        session: AsyncSession,
+        number: str,
+        page: PageParams = PageParams(),
+    ) -> Page[list[OrganizationResponse]]:
+        # номер в канонической форме ищется в phone_digits по GIN-индексу: 8-923-… и +7-923-… совпадают
+        digits = canonical_phone(number)
+        query = organization_rows().where(organizations.c.phone_digits.contains([digits]))
+        rows = await fetch_rows(session, keyset(query, [organizations.c.id], page, int))
+
+        if not rows:
+            logger.info(f"Организации с номером {number} не найдены.")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Организации не найдены.")
+
+        rows_page = to_page(rows, page, lambda row: (row.id,))
+        logger.info(f"Найдено организаций: {len(rows_page.items)} с номером {number}")
+        return rows_page._replace(items=[to_response(row, OrganizationResponse) for row in rows_page.items])
+
     @classmethod
     async def get_org_by_name(cls, session: AsyncSession, organization_name: str):
+        # по хорошему добавить уникальность/ из тестовых достаю 1й
         query = (
-            select(cls.model)
-            .options(joinedload(cls.model.building), selectinload(cls.model.activities))
-            .where(cls.model.name == organization_name)
+            organization_rows().where(organizations.c.name == organization_name).order_by(organizations.c.id).limit(1)
         )
-        result = await session.execute(query)
-        organization = result.scalars().first()  # по хорошему добавить уникальность/ из тестовых достаю 1й
+        rows = await fetch_rows(session, query)
 
-        if not organization:
+        if not rows:
             logger.info(f"Организация {organization_name} не найдена.")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Вид деятельности не найден.")
 
-        result = OrganizationResponse(
-            id=organization.id,
-            created_at=organization.created_at,
-            name=organization.name,
-            phone_numbers=organization.phone_numbers,
-            address=organization.building.address,
-            activities=organization.activities,
-        )
+        result = to_response(rows[0], OrganizationResponse)
         logger.info(f"Организация {organization_name} найдена. ")
         return result
+
+    @classmethod
+    async def search_orgs_by_name(
+        cls,
+        session: AsyncSession,
+        query: str,
+        limit: int = 20,
+        cursor: str | None = None,
+        min_score: float = 0.3,
+    ) -> OrganizationSearchPage:
+        # name %> query — есть слово, похожее на запрос не меньше порога; идёт по GIN-индексу pg_trgm.
+        # Кавычки и регистр триграммы не учитывают, поэтому “Рога” и "рога" равнозначны.
+        await session.execute(select(func.set_config("pg_trgm.word_similarity_threshold", str(min_score), True)))
+        score = func.word_similarity(query, cls.model.name)
+        stmt = (
+            select(cls.model, score)
+            .where(cls.model.name.op("%>")(query))
+            .options(joinedload(cls.model.building), selectinload(cls.model.activities))
+            .order_by(score.desc(), cls.model.id)
+            .limit(limit + 1)
+        )
+        if cursor:
+            last_score, last_id = decode_cursor(cursor, float, int)
+            stmt = stmt.where(or_(score < last_score, and_(score == last_score, cls.model.id > last_id)))
+
+        result = await session.execute(stmt)
+        rows = result.all()
+        items = [
+            OrganizationSearchHit(
+                id=organization.id,
+                created_at=organization.created_at,
+                name=organization.name,
+                phone_numbers=organization.phone_numbers,
+                address=organization.building.address,
+                activities=organization.activities,
+                score=organization_score,
+            )
+            for organization, organization_score in rows[:limit]
+        ]
+        next_cursor = encode_cursor(items[-1].score, items[-1].id) if len(rows) > limit else None
+        logger.info(f"Нечёткий поиск организаций '{query}': {len(items)} на странице")
+        return OrganizationSearchPage(items=items, next_cursor=next_cursor)
@@ -0,0 +1,116 @@
+"""
+Облегчённое чтение организаций: Core select() только нужных колонок, ответ строится из кортежей.
+
+Без ORM-сущностей, identity map и ленивой загрузки связей: запрос выполняется на соединении сессии,
+виды деятельности собираются в массив в том же запросе. Для списков ответ целиком собирает Postgres
+(json_agg) — приложение отдаёт полученный текст как тело ответа, не разбирая его; списки
+постраничные, по id (keyset).
+"""
+
+from typing import TypeVar
+
+from sqlalchemy import cast, func, null, Row, select, Select, Text, text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.building.schemas import OrgBuildResponse
+from app.api.organization.schemas import ActivityBase
+from app.dao.pagination import count_all, encode_cursor, keyset, Page, PageParams
+from app.models import Activity, Building, Organization, OrganizationActivity
+
+organizations = Organization.__table__
+buildings = Building.__table__
+organization_activity = OrganizationActivity.__table__
+activities = Activity.__table__
+
+R = TypeVar("R", bound=OrgBuildResponse)
+
+# как ResponseSchema.format_created_at: "%Y-%m-%d %H:%M"
+CREATED_AT_FORMAT = "YYYY-MM-DD HH24:MI"
+EMPTY_JSON_ARRAY = text("'[]'::json")
+
+
+def organization_rows() -> Select:
+    """(id, created_at, name, phone_numbers, address, [названия деятельностей]) — по строке на организацию."""
+    activity_names = func.array_remove(
+        func.array_agg(aggregate_order_by(activities.c.name, activities.c.id)),
+        None,
+    )
+    return (
+        select(
+            organizations.c.id,
+            organizations.c.created_at,
+            organizations.c.name,
+            organizations.c.phone_numbers,
+            buildings.c.address,
+            activity_names.label("activities"),
+        )
+        .select_from(organizations)
+        .join(buildings, buildings.c.id == organizations.c.building_id)
+        .outerjoin(organization_activity, organization_activity.c.organization_id == organizations.c.id)
+        .outerjoin(activities, activities.c.id == organization_activity.c.activity_id)
+        .group_by(organizations.c.id, buildings.c.address)
+    )
+
+
+def organization_json_rows() -> Select:
+    """Те же строки, что organization_rows(), но колонки уже в виде полей OrgBuildResponse в JSON."""
+    activity_objects = func.json_agg(
+        aggregate_order_by(func.json_build_object("name", activities.c.name), activities.c.id),
+    ).filter(activities.c.id.is_not(None))
+    return (
+        select(
+            organizations.c.id,
+            func.to_char(organizations.c.created_at, CREATED_AT_FORMAT).label("created_at"),
+            organizations.c.name,
+            organizations.c.phone_numbers,
+            buildings.c.address,
+            func.coalesce(activity_objects, EMPTY_JSON_ARRAY).label("activities"),
+            null().label("distance_m"),
+        )
+        .select_from(organizations)
+        .join(buildings, buildings.c.id == organizations.c.building_id)
+        .outerjoin(organization_activity, organization_activity.c.organization_id == organizations.c.id)
+        .outerjoin(activities, activities.c.id == organization_activity.c.activity_id)
+        .group_by(organizations.c.id, buildings.c.address)
+    )
+
+
+async def fetch_json(session: AsyncSession, query: Select, page: PageParams) -> Page[str]:
+    """
+    Страница query по id — готовым телом JSON-ответа: массив объектов (ключи — имена колонок) текстом.
+
+    Тело, признак следующей страницы и общее число (при with_total) приходят одним запросом.
+    """
+    rows = keyset(query, [query.selected_columns.id], page._replace(with_total=False), int).cte("rows")
+    page_rows = select(rows).order_by(rows.c.id).limit(page.limit).subquery("page")
+    payload = func.json_agg(aggregate_order_by(page_rows.table_valued(), page_rows.c.id))
+    has_more = select(func.count()).select_from(rows).scalar_subquery() > page.limit
+    total = count_all(query) if page.with_total else null()
+    stmt = select(cast(func.coalesce(payload, EMPTY_JSON_ARRAY), Text), func.max(page_rows.c.id), has_more, total)
+
+    connection = await session.connection()
+    result = await connection.execute(stmt)
+    body, last_id, more, total = result.one()
+    return Page(body, encode_cursor(last_id) if more else None, total)
+
+
+async def fetch_rows(session: AsyncSession, query: Select) -> list[Row]:
+    # Core-запрос на соединении сессии (в той же транзакции), минуя ORM
+    connection = await session.connection()
+    result = await connection.execute(query)
+    return result.all()
+
+
+def to_response(row: Row, response_class: type[R] = OrgBuildResponse, distance: float | None = None) -> R:
+    # лишние колонки (например, total при постраничном чтении) пропускаются
+    org_id, created_at, name, phone_numbers, address, activity_names, *_ = row
+    return response_class(
+        id=org_id,
+        created_at=created_at,
+        name=name,
+        phone_numbers=phone_numbers,
+        address=address,
+        activities=[ActivityBase(name=activity_name) for activity_name in activity_names],
+        distance_m=round(distance, 1) if distance is not None else None,
+    )
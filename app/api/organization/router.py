@@ -1,16 +1,66 @@
-from fastapi import APIRouter, status, Query, Depends
+from fastapi import APIRouter, HTTPException, status, Query, Depends, Response
 from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.organization.dao import OrganizationDao
-from app.api.organization.schemas import OrganizationResponse
+from app.core.phones import PHONE_PATTERN
+from app.api.organization.schemas import OrganizationResponse, OrganizationSearchPage
+from app.dao.pagination import PageParams
 from app.dependencies.dao_dep import get_session_without_commit
+from app.dependencies.pagination_dep import get_page_params
 
 router = APIRouter(
     prefix="/organizations",
     tags=["Организации"],
 )
 
+MAX_IDS = 100  # организаций в одном запросе по списку id
+
+
+def parse_ids(ids: str = Query(..., example="1,2,3", description=f"ID организаций через запятую, не больше {MAX_IDS}")):
+    try:
+        parsed = [int(organization_id) for organization_id in ids.split(",") if organization_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="ids — целые числа через запятую.")
+    if not parsed or len(parsed) > MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Нужно от 1 до {MAX_IDS} ID.",
+        )
+    return parsed
+
+
+@router.get(
+    "/",
+    status_code=status.HTTP_200_OK,
+    response_class=ORJSONResponse,
+    response_model=list[OrganizationResponse],
+    summary="Получить организации по списку id (в порядке запроса, ненайденные пропускаются)",
+)
+async def get_organizations_by_ids(
+    ids: list[int] = Depends(parse_ids),
+    db: AsyncSession = Depends(get_session_without_commit),
+):
+    return await OrganizationDao.get_orgs_by_ids(db, ids)
+
+
+@router.get(
+    "/by-phone",
+    status_code=status.HTTP_200_OK,
+    response_class=ORJSONResponse,
+    response_model=list[OrganizationResponse],
+    summary="Получить организации по номеру телефона (8-… и +7-… считаются одним номером)",
+)
+async def get_organizations_by_phone(
+    response: Response,
+    number: str = Query(..., pattern=PHONE_PATTERN, example="8-923-666-13-13"),
+    page: PageParams = Depends(get_page_params),
+    db: AsyncSession = Depends(get_session_without_commit),
+):
+    result_page = await OrganizationDao.get_orgs_by_phone(db, number, page)
+    response.headers.update(result_page.headers)
+    return result_page.items
+
 
 @router.get(
     "/search",
@@ -25,6 +75,23 @@ async def search_organization(
     return await OrganizationDao.get_org_by_name(db, name)
 
 
+@router.get(
+    "/search/fuzzy",
+    status_code=status.HTTP_200_OK,
+    response_class=ORJSONResponse,
+    response_model=OrganizationSearchPage,
+    summary="Нечёткий поиск организаций по названию: по убыванию сходства, постранично",
+)
+async def fuzzy_search_organizations(
+    q: str = Query(..., min_length=1, max_length=100, example="рога копыта"),
+    limit: int = Query(20, ge=1, le=100, description="Размер страницы"),
+    cursor: str | None = Query(None, description="next_cursor предыдущей страницы"),
+    min_score: float = Query(0.3, ge=0, le=1, description="Минимальное сходство"),
+    db: AsyncSession = Depends(get_session_without_commit),
+):
+    return await OrganizationDao.search_orgs_by_name(db, q, limit, cursor, min_score)
+
+
 @router.get(
     "/{organization_id}",
     status_code=status.HTTP_200_OK,
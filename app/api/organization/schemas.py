@@ -4,6 +4,7 @@ from datetime import datetime
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 from app.api.building.schemas import OrgBuildResponse
+from app.core.phones import PHONE_PATTERN
 
 
 class BaseModelConfig(BaseModel):
@@ -41,9 +42,8 @@ class OrganizationBase(BaseModelConfig):
 
     @field_validator("phone_numbers", mode="before")
     def validate_phone_numbers(cls, v):
-        pattern = r"^\+?\d-\d{3}-\d{3,4}(-\d{2,4}){0,2}$"
         for number in v:
-            if not re.match(pattern, number):
+            if not re.match(PHONE_PATTERN, number):
                 raise ValueError(
                     'Номер телефона должен быть в формате "X-XXX-XXXX", "X-XXX-XXXX-XXXX" или "X-XXX-XXXX-XXXX-XXXX", где X - цифра',
                 )
@@ -78,3 +78,16 @@ class FilterOrganization(BaseModelConfig):
 
 class OrganizationResponse(OrgBuildResponse):
     pass
+
+
+class OrganizationSearchHit(OrganizationResponse):
+    score: float = Field(
+        description="Сходство названия с запросом (pg_trgm word_similarity), от 0 до 1", examples=[0.83]
+    )
+
+
+class OrganizationSearchPage(BaseModel):
+    items: list[OrganizationSearchHit]
+    next_cursor: str | None = Field(
+        default=None, description="Курсор следующей страницы; null — это последняя страница"
+    )
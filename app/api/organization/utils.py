@@ -1,10 +1,12 @@
 import random
 
 from fastapi import HTTPException
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from app.api.activity.dao import ActivityDao
+from app.api.activity.schemas import ActivityTreeImport
 from app.api.building.dao import BuildingDao
 from app.api.organization.dao import OrganizationDao, OrganizationActivityDao
 from app.api.organization.schemas import BuildingCreate, ActivityCreate, OrganizationCreate, OrganizationActivityCreate
@@ -66,7 +68,7 @@ ACTIVITY_HIERARCHY = {
 class DataGenerator:
     def __init__(self, session: AsyncSession):
         self.session = session
-        self.buildings: list[BuildingCreate] = []
+        self.buildings: list[Row] = []  # строки INSERT ... RETURNING из BuildingDao.add
         self.activities: list[ActivityCreate] = []
         self.activity_map: dict = {}
 
@@ -92,24 +94,10 @@ class DataGenerator:
             self.buildings.append(building_response)
 
     async def create_activities(self) -> None:
-        for root_name, children in ACTIVITY_HIERARCHY.items():
-            root_activity = ActivityCreate(name=root_name)
-            root_activity_response = await ActivityDao.add_activity(self.session, root_activity)
-            self.activities.append(root_activity_response)
-            self.activity_map[root_activity_response.id] = None
-
-            for child_name, grandchildren in children.items():
-                child_activity = ActivityCreate(name=child_name, parent_id=root_activity_response.id)
-                child_activity_response = await ActivityDao.add_activity(self.session, child_activity)
-                self.activities.append(child_activity_response)
-                self.activity_map[child_activity_response.id] = root_activity_response.id
-
-                for grandchild_name in grandchildren:
-                    great_grandchild_activity = ActivityCreate(
-                        name=grandchild_name,
-                        parent_id=child_activity_response.id,
-                    )
-                    await ActivityDao.add_activity(self.session, great_grandchild_activity)
+        roots, children, _ = await ActivityDao.import_tree(self.session, ActivityTreeImport(ACTIVITY_HIERARCHY))
+        for activity in [*roots, *children]:
+            self.activities.append(activity)
+            self.activity_map[activity.id] = activity.parent_id
 
     async def create_organizations(self) -> None:
         for _ in range(random.randint(5, 10)):
@@ -121,13 +109,13 @@ class DataGenerator:
             organization_response = await OrganizationDao.add(self.session, organization)
 
             selected_activities = random.sample(self.activities, k=random.randint(1, 3))
-            for activity in selected_activities:
-                if isinstance(activity, Activity) and activity.id:
-                    organization_activity = OrganizationActivityCreate(
-                        organization_id=organization_response.id,
-                        activity_id=activity.id,
-                    )
-                    await OrganizationActivityDao.add(self.session, organization_activity)
+            links = [
+                OrganizationActivityCreate(organization_id=organization_response.id, activity_id=activity.id)
+                for activity in selected_activities
+                if isinstance(activity, Activity) and activity.id
+            ]
+            # повторный прогон не падает на uq_organization_activity
+            await OrganizationActivityDao.upsert_many(self.session, links, conflict=("organization_id", "activity_id"))
 
     async def create_initial_data(self) -> None:
         try:
@@ -0,0 +1,89 @@
+import logging
+
+from sqlalchemy import ColumnElement, Float, func, Row, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.activity.dao import ActivityDao
+from app.api.building.geo import bounding_box, EARTH_RADIUS_M
+from app.api.building.schemas import OrgBuildResponse
+from app.api.organization.projection import buildings, fetch_rows, organization_rows, organizations, to_response
+from app.api.search.schemas import DISTANCE, RELEVANCE, SearchFilters
+from app.dao.base import BaseDAO
+from app.dao.pagination import keyset, Page, PageParams, to_page
+from app.models import Organization
+
+logger = logging.getLogger(__name__)
+
+
+def haversine_sql(latitude: float, longitude: float) -> ColumnElement[float]:
+    """Расстояние (м) по большому кругу от точки до здания — то же, что geo.haversine_m, на стороне БД."""
+    phi = func.radians(buildings.c.latitude)
+    half_dlat = func.sin((phi - func.radians(latitude)) / 2)
+    half_dlon = func.sin(func.radians(buildings.c.longitude - longitude) / 2)
+    h = half_dlat * half_dlat + func.cos(func.radians(latitude)) * func.cos(phi) * half_dlon * half_dlon
+    return 2 * EARTH_RADIUS_M * func.asin(func.least(1.0, func.sqrt(h)), type_=Float)
+
+
+def like_prefix(prefix: str) -> str:
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+class SearchDao(BaseDAO):
+    model = Organization
+
+    @classmethod
+    def _search_query(cls, filters: SearchFilters) -> tuple[Select, ColumnElement | None]:
+        # все фильтры — в одном запросе; возвращает запрос и ключ сортировки (None — по id)
+        query = organization_rows().group_by(buildings.c.id)
+        sort_key = None
+
+        if filters.activity is not None:
+            # organization_activity по индексу activity_id; поддерево — из снимка дерева или closure
+            org_ids = ActivityDao.org_ids_by_activity_name(filters.activity, filters.include_descendants)
+            query = query.where(organizations.c.id.in_(org_ids))
+
+        if filters.geo is not None:
+            # префильтр по GiST: location <@ box, затем точное расстояние по большому кругу
+            geo = filters.geo
+            lat_min, lat_max, lon_min, lon_max = bounding_box(geo.latitude, geo.longitude, geo.radius)
+            box = func.box(func.point(lon_min, lat_min), func.point(lon_max, lat_max))
+            distance = haversine_sql(geo.latitude, geo.longitude)
+            query = query.where(buildings.c.location.op("<@")(box), distance <= geo.radius)
+            query = query.add_columns(distance.label("distance"))
+            if filters.order == DISTANCE:
+                sort_key = distance
+
+        if filters.name is not None:
+            # ILIKE 'prefix%' идёт по GIN-индексу pg_trgm на name
+            query = query.where(organizations.c.name.ilike(like_prefix(filters.name)))
+            if filters.order == RELEVANCE:
+                # похожие названия первыми: по убыванию similarity
+                sort_key = -func.similarity(organizations.c.name, filters.name, type_=Float)
+
+        return query, sort_key
+
+    @classmethod
+    async def search_orgs(
+        cls,
+        session: AsyncSession,
+        filters: SearchFilters,
+        page: PageParams = PageParams(),
+    ) -> Page[list[OrgBuildResponse]]:
+        query, sort_key = cls._search_query(filters)
+        columns, types = [organizations.c.id], [int]
+        if sort_key is not None:
+            query = query.add_columns(sort_key.label("sort_key"))
+            columns, types = [sort_key, organizations.c.id], [float, int]
+
+        def cursor_key(row: Row) -> tuple:
+            return (row.sort_key, row.id) if sort_key is not None else (row.id,)
+
+        rows = await fetch_rows(session, keyset(query, columns, page, *types))
+        rows_page = to_page(rows, page, cursor_key)
+        logger.info(
+            f"Комбинированный поиск {filters.model_dump(exclude_none=True)}: {len(rows_page.items)} организаций"
+        )
+        return rows_page._replace(
+            items=[to_response(row, distance=row.distance if filters.geo else None) for row in rows_page.items],
+        )
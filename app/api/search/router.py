@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from app.api.building.schemas import OrgBuildResponse
+from app.api.search.dao import SearchDao
+from app.api.search.schemas import GeoFilter, SearchFilters, SearchOrder
+from app.dao.pagination import PageParams
+from app.dependencies.dao_dep import get_session_without_commit
+from app.dependencies.pagination_dep import get_page_params
+
+router = APIRouter(
+    prefix="/search",
+    tags=["Поиск"],
+)
+
+
+def parse_filters(
+    activity: str | None = Query(None, example="Еда", description="Вид деятельности"),
+    include_descendants: bool = Query(True, description="Вместе со всеми вложенными видами деятельности"),
+    latitude: float | None = Query(None, ge=-90, le=90, example="55.972044"),
+    longitude: float | None = Query(None, ge=-180, le=180, example="37.297443"),
+    radius: float | None = Query(None, gt=0, example="2000", description="Радиус в метрах"),
+    name: str | None = Query(None, min_length=1, max_length=50, example="Рога", description="Начало названия"),
+    order: SearchOrder | None = Query(
+        None,
+        description="distance — по расстоянию, relevance — по похожести названия; по умолчанию — что применимо",
+    ),
+) -> SearchFilters:
+    geo_params = (latitude, longitude, radius)
+    if any(param is not None for param in geo_params) and None in geo_params:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="latitude, longitude и radius задаются вместе.",
+        )
+    try:
+        return SearchFilters(
+            activity=activity,
+            include_descendants=include_descendants,
+            geo=GeoFilter(latitude=latitude, longitude=longitude, radius=radius) if radius is not None else None,
+            name=name,
+            order=order,
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.errors()[0]["msg"].removeprefix("Value error, ")
+        )
+
+
+@router.get(
+    "/organizations",
+    status_code=status.HTTP_200_OK,
+    response_model=list[OrgBuildResponse],
+    response_class=ORJSONResponse,
+    summary="Организации по виду деятельности, радиусу и началу названия одним запросом",
+)
+async def search_organizations(
+    response: Response,
+    filters: SearchFilters = Depends(parse_filters),
+    page: PageParams = Depends(get_page_params),
+    session: AsyncSession = Depends(get_session_without_commit),
+):
+    result_page = await SearchDao.search_orgs(session, filters, page)
+    response.headers.update(result_page.headers)
+    return result_page.items
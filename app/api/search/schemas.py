@@ -0,0 +1,37 @@
+from typing import Literal, Self
+
+from pydantic import BaseModel, Field, model_validator
+
+DISTANCE = "distance"
+RELEVANCE = "relevance"
+
+SearchOrder = Literal["distance", "relevance"]
+
+
+class GeoFilter(BaseModel):
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+    radius: float = Field(gt=0, description="Радиус в метрах")
+
+
+class SearchFilters(BaseModel):
+    activity: str | None = Field(default=None, description="Вид деятельности")
+    include_descendants: bool = Field(default=True, description="Вместе со всеми вложенными видами деятельности")
+    geo: GeoFilter | None = None
+    name: str | None = Field(default=None, description="Начало названия организации")
+    order: SearchOrder | None = Field(
+        default=None,
+        description="distance — по расстоянию, relevance — по похожести названия; по умолчанию — что применимо",
+    )
+
+    @model_validator(mode="after")
+    def check_filters(self) -> Self:
+        if self.activity is None and self.geo is None and self.name is None:
+            raise ValueError("Нужен хотя бы один фильтр: activity, координаты с радиусом или name")
+        if self.order is None:
+            self.order = DISTANCE if self.geo else RELEVANCE if self.name else None
+        if self.order == DISTANCE and self.geo is None:
+            raise ValueError("Сортировка по расстоянию требует координат и радиуса")
+        if self.order == RELEVANCE and self.name is None:
+            raise ValueError("Сортировка по похожести требует name")
+        return self
@@ -0,0 +1,221 @@
+import heapq
+import logging
+import math
+import re
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dao.database import async_session_maker
+from app.models import Activity, Organization
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY = "activity"
+ORGANIZATION = "organization"
+
+# сколько уникальных названий с подходящим началом ранжируется на запрос: короткий префикс («о»)
+# совпадает с большей частью индекса, ранжируются первые по алфавиту кандидаты
+RANK_CANDIDATES = 1000
+
+# нижний порог числа свежих ключей для слияния в основной массив (иначе корень из его размера)
+MIN_RECENT_KEYS = 256
+
+# начало слова: после пробела или знака препинания/кавычки
+_WORD_START = re.compile(r"(?:^|[\s\"'«“(\-/])(?=\w)")
+
+
+def normalize(text: str) -> str:
+    return text.casefold().replace("ё", "е").strip()
+
+
+def _keys(name: str) -> set[str]:
+    # имя находится и по началу любого слова: «ООО “Рога и Копыта”» — по «рог» и «коп»
+    normalized = normalize(name)
+    return {normalized[match.end() :] for match in _WORD_START.finditer(normalized)} | {normalized}
+
+
+class SuggestIndex:
+    """
+    Индекс подсказок по началу слова в названиях деятельностей и организаций.
+
+    Отсортированный массив ключей (нормализованные хвосты названия от начала каждого слова)
+    с параллельным массивом значений (тип, название): поиск — бинарный поиск начала диапазона,
+    просмотр вперёд до RANK_CANDIDATES уникальных названий и выбор k лучших. Одинаковые названия
+    хранятся один раз со счётчиком.
+
+    Новые ключи сначала попадают в небольшой отсортированный массив свежих ключей (вставка в него
+    дешёвая), поиск читает оба; когда свежих становится больше корня из размера основного массива,
+    они сливаются в основной за один проход.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._keys: list[str] = []
+        self._values: list[tuple[str, str]] = []
+        self._recent_keys: list[str] = []
+        self._recent_values: list[tuple[str, str]] = []
+        self._counts: dict[tuple[str, str], int] = {}
+        # по списку на идущую загрузку: изменения с её начала, повторяются после подмены
+        self._recorders: list[list[tuple[bool, str, list[str]]]] = []
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    @property
+    def key_count(self) -> int:
+        return len(self._keys) + len(self._recent_keys)
+
+    def build(self, items: Iterable[tuple[str, str]]) -> None:
+        """Построить индекс заново по парам (тип, название)."""
+        counts: dict[tuple[str, str], int] = {}
+        for item in items:
+            counts[item] = counts.get(item, 0) + 1
+        entries = sorted((key, item) for item in counts for key in _keys(item[1]))
+        self._keys = [key for key, _ in entries]
+        self._values = [item for _, item in entries]
+        self._recent_keys, self._recent_values = [], []
+        self._counts = counts
+        self.ready = True
+
+    async def load(self, session: AsyncSession) -> None:
+        """
+        Загрузить названия из БД. Добавления и удаления, пришедшие во время загрузки, повторяются поверх
+        нового индекса; запись, закоммиченная в момент снимка, может попасть в счётчик дважды до следующей
+        загрузки.
+        """
+        changes = []
+        self._recorders.append(changes)
+        try:
+            activities = await session.scalars(select(Activity.name))
+            organizations = await session.scalars(select(Organization.name))
+        finally:
+            self._recorders.remove(changes)
+        self.build(
+            [
+                *((ACTIVITY, name) for name in activities),
+                *((ORGANIZATION, name) for name in organizations),
+            ],
+        )
+        for added, kind, names in changes:
+            (self._add if added else self._remove)(kind, names)
+        logger.info(f"Индекс подсказок загружен: {len(self)} названий, {self.key_count} ключей")
+
+    def add(self, kind: str, names: Iterable[str]) -> None:
+        names = list(names)
+        for changes in self._recorders:
+            changes.append((True, kind, names))
+        if self.ready:
+            self._add(kind, names)
+
+    def remove(self, kind: str, names: Iterable[str]) -> None:
+        names = list(names)
+        for changes in self._recorders:
+            changes.append((False, kind, names))
+        if self.ready:
+            self._remove(kind, names)
+
+    def _add(self, kind: str, names: list[str]) -> None:
+        new_entries = []
+        for name in names:
+            item = (kind, name)
+            self._counts[item] = self._counts.get(item, 0) + 1
+            if self._counts[item] == 1:
+                new_entries.extend((key, item) for key in _keys(name))
+
+        recent_limit = max(MIN_RECENT_KEYS, math.isqrt(len(self._keys)))
+        if len(self._recent_keys) + len(new_entries) > recent_limit:
+            # пачка (массовая загрузка) или переполнение свежих: всё сливается в основной массив
+            entries = sorted([*zip(self._recent_keys, self._recent_values), *new_entries])
+            self._recent_keys, self._recent_values = [], []
+            self._merge(entries)
+            return
+        for key, item in new_entries:
+            index = bisect_left(self._recent_keys, key)
+            self._recent_keys.insert(index, key)
+            self._recent_values.insert(index, item)
+
+    def _merge(self, entries: list[tuple[str, tuple[str, str]]]) -> None:
+        # слияние отсортированной пачки с основным массивом за один проход: между позициями вставки
+        # копируются срезы, без сдвига хвоста массива на каждый ключ
+        old_keys, old_values = self._keys, self._values
+        keys: list[str] = []
+        values: list[tuple[str, str]] = []
+        start = 0
+        for key, item in entries:
+            index = bisect_left(old_keys, key, start)
+            keys += old_keys[start:index]
+            values += old_values[start:index]
+            keys.append(key)
+            values.append(item)
+            start = index
+        keys += old_keys[start:]
+        values += old_values[start:]
+        self._keys, self._values = keys, values
+
+    def _remove(self, kind: str, names: list[str]) -> None:
+        for name in names:
+            item = (kind, name)
+            count = self._counts.get(item, 0)
+            if count > 1:
+                self._counts[item] = count - 1
+                continue
+            if not count:
+                continue
+            del self._counts[item]
+            for key in _keys(name):
+                for keys, values in ((self._recent_keys, self._recent_values), (self._keys, self._values)):
+                    index = bisect_left(keys, key)
+                    while index < len(keys) and keys[index] == key and values[index] != item:
+                        index += 1
+                    if index < len(keys) and keys[index] == key:
+                        del keys[index]
+                        del values[index]
+                        break
+
+    def _range(self, keys: list[str], values: list[tuple[str, str]], prefix: str) -> Iterator:
+        index = bisect_left(keys, prefix)
+        while index < len(keys) and keys[index].startswith(prefix):
+            yield keys[index], values[index]
+            index += 1
+
+    def suggest(self, query: str, limit: int = 10) -> list[tuple[str, str, int]]:
+        """
+        До limit уникальных (тип, название, количество) с началом слова query, лучшие первыми:
+        точное совпадение названия, затем совпадение с начала названия, затем по популярности
+        (числу одноимённых записей), затем более короткие и по алфавиту.
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        counts = self._counts
+        # название -> совпадает ли query с его началом (а не с началом следующего слова)
+        candidates: dict[tuple[str, str], bool] = {}
+        matches = heapq.merge(
+            self._range(self._keys, self._values, prefix),
+            self._range(self._recent_keys, self._recent_values, prefix),
+        )
+        for key, item in matches:
+            if len(candidates) >= RANK_CANDIDATES and item not in candidates:
+                break
+            candidates[item] = candidates.get(item, False) or len(key) == len(normalize(item[1]))
+
+        def rank(item: tuple[str, str]) -> tuple:
+            normalized = normalize(item[1])
+            return (normalized != prefix, not candidates[item], -counts[item], len(normalized), normalized, item)
+
+        return [(kind, name, counts[kind, name]) for kind, name in heapq.nsmallest(limit, candidates, key=rank)]
+
+
+suggest_index = SuggestIndex()
+
+
+async def load_suggest_index() -> None:
+    """Загрузка при старте; без БД приложение стартует, а подсказки пустые до перезапуска."""
+    try:
+        async with async_session_maker() as session:
+            await suggest_index.load(session)
+    except Exception as e:
+        logger.error(f"Индекс подсказок не загружен: {e!r}")
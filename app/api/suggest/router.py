@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import ORJSONResponse
+from starlette import status
+
+from app.api.suggest.index import suggest_index
+from app.api.suggest.schemas import SuggestItem
+
+router = APIRouter(
+    prefix="/suggest",
+    tags=["Подсказки"],
+)
+
+
+@router.get(
+    "/",
+    status_code=status.HTTP_200_OK,
+    response_model=list[SuggestItem],
+    response_class=ORJSONResponse,
+    summary="Подсказки по началу слова в названиях деятельностей и организаций (без обращения к БД)",
+)
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=50, example="рог"),
+    limit: int = Query(10, ge=1, le=50, description="Сколько подсказок вернуть"),
+):
+    return [SuggestItem(kind=kind, name=name, count=count) for kind, name, count in suggest_index.suggest(q, limit)]
@@ -0,0 +1,9 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class SuggestItem(BaseModel):
+    kind: Literal["activity", "organization"] = Field(description="Вид деятельности или организация")
+    name: str = Field(description="Название", examples=["ООО “Рога и Копыта”"])
+    count: int = Field(description="Сколько записей с таким названием", examples=[3])
@@ -8,6 +8,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, Response
 from fastapi.templating import Jinja2Templates
 
+from app.api.activity.tree import load_activity_tree
+from app.api.building.index import load_building_index
+from app.api.suggest.index import load_suggest_index
 from app.core.logger_config import configure_logging
 from app.core.settings import AppConfig
 from app.routes import router as routers_v1
@@ -23,6 +26,10 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI) -> AsyncGenerator[dict, None]:
     """Управление жизненным циклом приложения."""
     logger.info("Инициализация приложения...")
+    await load_activity_tree()
+    await load_suggest_index()
+    if app.state.config.geo.memory_index:
+        await load_building_index()
     yield
     logger.info("Завершение работы приложения...")
 
@@ -43,6 +50,7 @@ def create_app(config: AppConfig) -> FastAPI:
         debug=config.api.echo,
         lifespan=lifespan,
     )
+    app.state.config = config
 
     app.add_middleware(
         CORSMiddleware,
@@ -0,0 +1,15 @@
+import re
+
+# Форматы номеров, которые принимает OrganizationBase.validate_phone_numbers
+PHONE_PATTERN = r"^\+?\d-\d{3}-\d{3,4}(-\d{2,4}){0,2}$"
+
+# Каноническая форма номера — то же, что organization_phone_digits() в БД (должны совпадать):
+# только цифры, у 11-значного номера ведущая 8 заменяется на 7 (8-923-… и +7-923-… — один номер)
+PHONE_DIGITS_SQL = "organization_phone_digits(phone_numbers)"
+
+
+def canonical_phone(number: str) -> str:
+    digits = re.sub(r"\D", "", number)
+    if len(digits) == 11 and digits.startswith("8"):
+        digits = "7" + digits[1:]
+    return digits
@@ -24,6 +24,10 @@ class DbConfig(BaseModel):
 
     max_size: int = 1
     echo: bool = True
+    # строк в одном запросе BaseDAO.add_many (INSERT ... RETURNING) и bulk_update (UPDATE ... FROM VALUES)
+    bulk_chunk_size: int = 1000
+    # строк в одном COPY массового импорта (/import): столько провалидированных строк держится в памяти
+    import_chunk_size: int = 10_000
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -40,6 +44,17 @@ class DbConfig(BaseModel):
         return PostgresDsn(str(multi_host_url))
 
 
+class GeoConfig(BaseModel):
+    # KD-дерево зданий в памяти процесса; при False радиусный поиск идёт только через БД
+    memory_index: bool = True
+    # кэш радиусного поиска: координаты привязываются к сетке, радиус округляется вверх до шага
+    cache_enabled: bool = True
+    cache_grid_deg: float = 0.0005  # ~55 м по широте
+    cache_radius_step_m: float = 100.0
+    cache_ttl_s: float = 60.0
+    cache_max_bytes: int = 32 * 1024 * 1024
+
+
 class Api(BaseModel):
     project_name: str = "NebusApp"
     description: str = "NebusApp API 🚀"
@@ -53,6 +68,7 @@ class AppConfig(BaseSettings):
     db: DbConfig = DbConfig()
     environment: Environments = Environments.local
     api: Api = Api()
+    geo: GeoConfig = GeoConfig()
     SECRET_KEY: str = ""
     ALGORITHM: str = ""
 
@@ -1,13 +1,35 @@
 import logging
+from collections.abc import Sequence
 from typing import Generic, TypeVar
 
 from pydantic import BaseModel
-from sqlalchemy import update as sqlalchemy_update, delete as sqlalchemy_delete, func
+from sqlalchemy import (
+    update as sqlalchemy_update,
+    delete as sqlalchemy_delete,
+    any_,
+    bindparam,
+    Boolean,
+    cast,
+    column,
+    Column,
+    ColumnElement,
+    insert,
+    func,
+    Integer,
+    literal_column,
+    Row,
+    tuple_,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm.interfaces import ORMOption
 
+from app.core.settings import APP_CONFIG
 from .database import Base
+from .pagination import keyset, Page, PageParams, to_page
 
 # Объявляем типовой параметр T с ограничением, что это наследник Base
 T = TypeVar("T", bound=Base)
@@ -15,9 +37,63 @@ T = TypeVar("T", bound=Base)
 
 logger = logging.getLogger(__name__)
 
+MAX_QUERY_PARAMS = 32_767  # предел параметров одного запроса в протоколе Postgres
+
 
 class BaseDAO(Generic[T]):
     model: type[T]
+    # колонки, значения которых до изменения нужны _after_update: строки получают их как old_<имя>
+    old_columns: tuple[str, ...] = ()
+
+    @classmethod
+    def _after_add(cls, session: AsyncSession, instances: Sequence[T | Row]) -> None:
+        # хук для наследников: новые записи (экземпляры модели или строки RETURNING всех колонок) уже в БД,
+        # id известны, транзакция ещё не закоммичена
+        pass
+
+    @classmethod
+    def _columns(cls) -> list[Column]:
+        return list(cls.model.__table__.columns)
+
+    @classmethod
+    def _returning(cls) -> list[ColumnElement]:
+        # RETURNING для update, bulk_update и upsert_many: все колонки и old_<имя> по old_columns.
+        # Подзапрос в RETURNING видит снимок до запроса: для вставленной строки old_<имя> — NULL.
+        # Строка запроса — через literal_column: в RETURNING у INSERT SQLAlchemy подзапрос не коррелирует
+        table = cls.model.__table__
+        old = table.alias("old")
+        current_id = literal_column(f"{table.name}.id")
+        return [
+            *cls._columns(),
+            *(
+                select(old.c[name]).where(old.c.id == current_id).scalar_subquery().label(f"old_{name}")
+                for name in cls.old_columns
+            ),
+        ]
+
+    @staticmethod
+    def _chunk_rows(chunk_size: int | None, width: int) -> int:
+        # строк в одном запросе: не больше chunk_size и не больше MAX_QUERY_PARAMS параметров
+        return max(1, min(chunk_size or APP_CONFIG.db.bulk_chunk_size, MAX_QUERY_PARAMS // max(1, width)))
+
+    @staticmethod
+    def _group_by_keys(values_list: list[dict]) -> dict[tuple[str, ...], list[int]]:
+        # у всех строк одного executemany должен быть один набор колонок (model_dump(exclude_unset=True)
+        # даёт разные): позиции строк, сгруппированные по набору ключей
+        groups: dict[tuple[str, ...], list[int]] = {}
+        for position, record in enumerate(values_list):
+            groups.setdefault(tuple(sorted(record)), []).append(position)
+        return groups
+
+    @classmethod
+    def _after_update(cls, session: AsyncSession, rows: list[Row]) -> None:
+        # хук для наследников: строки после update/bulk_update (RETURNING всех колонок), до коммита
+        pass
+
+    @classmethod
+    def _after_delete(cls, session: AsyncSession, rows: list[Row]) -> None:
+        # хук для наследников: удалённые строки (RETURNING всех колонок), до коммита
+        pass
 
     @classmethod
     async def find_one_or_none_by_id(
@@ -38,6 +114,31 @@ class BaseDAO(Generic[T]):
             logger.error(f"Ошибка при поиске записи с ID {data_id}: {e}")
             raise
 
+    @classmethod
+    async def find_many_by_ids(
+        cls,
+        session: AsyncSession,
+        ids: Sequence[int],
+        options: Sequence[ORMOption] = (),
+    ) -> list[T]:
+        # Найти записи по списку ID одним запросом (id = ANY(:ids)); порядок — как в ids, ненайденные пропускаются
+        logger.info(f"Поиск {cls.model.__name__} по {len(ids)} ID")
+        if not ids:
+            return []
+        try:
+            query = (
+                select(cls.model)
+                .where(cls.model.id == any_(bindparam("ids", list(set(ids)), type_=ARRAY(Integer))))
+                .options(*options)
+            )
+            result = await session.execute(query)
+            records = {record.id: record for record in result.scalars().all()}
+            logger.info(f"Найдено {len(records)} записей {cls.model.__name__}.")
+            return [records[data_id] for data_id in ids if data_id in records]
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при поиске записей по списку ID: {e}")
+            raise
+
     @classmethod
     async def find_one_or_none(
         cls,
@@ -81,17 +182,27 @@ class BaseDAO(Generic[T]):
             raise
 
     @classmethod
-    async def add(cls, session: AsyncSession, values: BaseModel) -> T:
-        # Добавить одну запись
+    async def add(cls, session: AsyncSession, values: BaseModel, orm: bool = False) -> Row | T:
+        """
+        Добавить одну запись.
+
+        По умолчанию — INSERT ... RETURNING одним запросом: возвращается строка со всеми колонками таблицы
+        (id, created_at и вычисляемые колонки уже заполнены). orm=True — экземпляр модели в сессии (flush + refresh).
+        """
         values_dict = values.model_dump(exclude_unset=True)
         logger.info(
             f"Добавление записи {cls.model.__name__} с параметрами: {values_dict}",
         )
-        new_instance = cls.model(**values_dict)
-        session.add(new_instance)
         try:
-            await session.flush()
-            await session.refresh(new_instance)
+            if orm:
+                new_instance = cls.model(**values_dict)
+                session.add(new_instance)
+                await session.flush()
+                await session.refresh(new_instance)
+            else:
+                result = await session.execute(insert(cls.model).values(**values_dict).returning(*cls._columns()))
+                new_instance = result.one()
+            cls._after_add(session, [new_instance])
             logger.info(f"Запись {cls.model.__name__} успешно добавлена.")
             # todo при успешном коммитится так как TransactionSessionDep
         except SQLAlchemyError as e:
@@ -101,19 +212,130 @@ class BaseDAO(Generic[T]):
         return new_instance
 
     @classmethod
-    async def add_many(cls, session: AsyncSession, instances: list[BaseModel]):
+    async def add_many(
+        cls,
+        session: AsyncSession,
+        instances: list[BaseModel],
+        chunk_size: int | None = None,
+        orm: bool = False,
+    ) -> list[Row] | list[T]:
+        """
+        Добавить записи пачками по chunk_size: INSERT ... VALUES (...), (...) RETURNING на пачку,
+        записи с разным набором заданных полей — разными запросами; строки возвращаются в порядке instances.
+        orm=True — экземпляры модели через unit of work.
+        """
         values_list = [item.model_dump(exclude_unset=True) for item in instances]
         logger.info(f"Добавление нескольких записей {cls.model.__name__}. Количество: {len(values_list)}")
         try:
-            new_instances = [cls.model(**values) for values in values_list]
-            session.add_all(new_instances)
+            if orm:
+                new_instances = [cls.model(**values) for values in values_list]
+                session.add_all(new_instances)
+                await session.flush()
+            else:
+                new_instances = [None] * len(values_list)
+                stmt = insert(cls.model).returning(*cls._columns(), sort_by_parameter_order=True)
+                for names, positions in cls._group_by_keys(values_list).items():
+                    step = cls._chunk_rows(chunk_size, len(names))
+                    for start in range(0, len(positions), step):
+                        chunk = positions[start : start + step]
+                        result = await session.execute(stmt, [values_list[position] for position in chunk])
+                        for position, row in zip(chunk, result.all()):
+                            new_instances[position] = row
             logger.info(f"Успешно добавлено {len(new_instances)} записей.")
-            await session.flush()
+            cls._after_add(session, new_instances)
             return new_instances
         except SQLAlchemyError as e:
             logger.error(f"Ошибка при добавлении нескольких записей: {e}")
             raise
 
+    @classmethod
+    async def upsert(
+        cls,
+        session: AsyncSession,
+        values: BaseModel,
+        conflict: Sequence[str] | None = None,
+        update: Sequence[str] = (),
+    ) -> Row | None:
+        """Идемпотентная запись одной строки, см. upsert_many; None — строка уже была и не изменилась."""
+        rows = await cls.upsert_many(session, [values], conflict, update)
+        return rows[0] if rows else None
+
+    @classmethod
+    def _upsert_statement(cls, conflict: Sequence[str] | None, update: Sequence[str]):
+        # update — только колонки, заданные в группе записей: отсутствующая колонка в excluded — это default
+        # или NULL, и DO UPDATE затёр бы ею значение в БД. Без колонок обновления — DO NOTHING
+        stmt = pg_insert(cls.model)
+        if update:
+            table = cls.model.__table__
+            stmt = stmt.on_conflict_do_update(
+                index_elements=conflict,
+                set_={name: stmt.excluded[name] for name in update},
+                where=tuple_(*[table.c[name] for name in update]).is_distinct_from(
+                    tuple_(*[stmt.excluded[name] for name in update]),
+                ),
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=conflict)
+        # xmax = 0 только у только что вставленной версии строки: так отличаем INSERT от UPDATE
+        inserted = literal_column("xmax = 0", Boolean).label("inserted")
+        return stmt.returning(*cls._returning(), inserted, sort_by_parameter_order=True)
+
+    @classmethod
+    async def upsert_many(
+        cls,
+        session: AsyncSession,
+        records: list[BaseModel],
+        conflict: Sequence[str] | None = None,
+        update: Sequence[str] = (),
+        chunk_size: int | None = None,
+    ) -> list[Row]:
+        """
+        INSERT ... ON CONFLICT пачками по chunk_size, одним запросом на пачку; записи с разным набором
+        заданных полей — разными запросами.
+
+        conflict — колонки уникального ограничения; без update — DO NOTHING (conflict=None: по любому
+        ограничению), с update — DO UPDATE этих колонок, только если значения действительно отличаются;
+        колонки update, не заданные в записи, в БД не меняются. Возвращает вставленные и изменённые строки (RETURNING всех колонок и inserted); строки, которые уже
+        были в БД в том же виде, не пишутся и не возвращаются.
+        """
+        if update and not conflict:
+            raise ValueError("Для ON CONFLICT DO UPDATE нужны колонки конфликта.")
+        values_list = [record.model_dump(exclude_unset=True) for record in records]
+        if conflict:
+            # дубликаты ключа в одном INSERT: DO UPDATE не может изменить строку дважды — оставляем последний;
+            # строки без ключа не конфликтуют друг с другом — у каждой свой ключ object()
+            unique: dict[tuple, dict] = {}
+            for values in values_list:
+                key = tuple(values.get(name) for name in conflict)
+                unique[(object(),) if None in key else key] = values
+            values_list = list(unique.values())
+        logger.info(
+            f"Upsert записей {cls.model.__name__}: {len(values_list)}, конфликт: {conflict}, обновление: {update}",
+        )
+
+        try:
+            rows = []
+            for names, positions in cls._group_by_keys(values_list).items():
+                stmt = cls._upsert_statement(conflict, [name for name in update if name in names])
+                step = cls._chunk_rows(chunk_size, len(names))
+                for start in range(0, len(positions), step):
+                    chunk = [values_list[position] for position in positions[start : start + step]]
+                    result = await session.execute(stmt, chunk)
+                    rows.extend(result.all())
+            added = [row for row in rows if row.inserted]
+            updated = [row for row in rows if not row.inserted]
+            logger.info(
+                f"Добавлено {len(added)}, обновлено {len(updated)}, без изменений {len(values_list) - len(rows)}"
+            )
+            if added:
+                cls._after_add(session, added)
+            if updated:
+                cls._after_update(session, updated)
+            return rows
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при upsert записей: {e}")
+            raise
+
     @classmethod
     async def update(cls, session: AsyncSession, filters: BaseModel, values: BaseModel):
         filter_dict = filters.model_dump(exclude_unset=True)
@@ -124,12 +346,15 @@ class BaseDAO(Generic[T]):
                 sqlalchemy_update(cls.model)
                 .where(*[getattr(cls.model, k) == v for k, v in filter_dict.items()])
                 .values(**values_dict)
+                .returning(*cls._returning())
                 .execution_options(synchronize_session="fetch")
             )
             result = await session.execute(query)
-            logger.info(f"Обновлено {result.rowcount} записей.")
+            rows = result.all()
+            logger.info(f"Обновлено {len(rows)} записей.")
             await session.flush()
-            return result.rowcount
+            cls._after_update(session, rows)
+            return len(rows)
         except SQLAlchemyError as e:
             logger.error(f"Ошибка при обновлении записей: {e}")
             raise
@@ -142,11 +367,13 @@ class BaseDAO(Generic[T]):
             logger.error("Нужен хотя бы один фильтр для удаления.")
             raise ValueError("Нужен хотя бы один фильтр для удаления.")
         try:
-            query = sqlalchemy_delete(cls.model).filter_by(**filter_dict)
+            query = sqlalchemy_delete(cls.model).filter_by(**filter_dict).returning(*cls._columns())
             result = await session.execute(query)
-            logger.info(f"Удалено {result.rowcount} записей.")
+            rows = result.all()
+            logger.info(f"Удалено {len(rows)} записей.")
             await session.flush()
-            return result.rowcount
+            cls._after_delete(session, rows)
+            return len(rows)
         except SQLAlchemyError as e:
             logger.error(f"Ошибка при удалении записей: {e}")
             raise
@@ -166,23 +393,71 @@ class BaseDAO(Generic[T]):
             raise
 
     @classmethod
-    async def bulk_update(cls, session: AsyncSession, records: list[BaseModel]):
+    async def bulk_update(
+        cls,
+        session: AsyncSession,
+        records: list[BaseModel],
+        chunk_size: int | None = None,
+    ) -> int:
+        """Массовое обновление по id, см. bulk_update_chunks; возвращает общее число обновлённых строк."""
+        return sum(await cls.bulk_update_chunks(session, records, chunk_size))
+
+    @classmethod
+    async def bulk_update_chunks(
+        cls,
+        session: AsyncSession,
+        records: list[BaseModel],
+        chunk_size: int | None = None,
+    ) -> list[int]:
+        """
+        Массовое обновление по id: UPDATE ... FROM (VALUES ...) на пачку записей вместо запроса на запись.
+
+        Изменения одного id сливаются (более поздние перекрывают ранние), записи группируются по набору
+        изменённых колонок, группа выполняется пачками по chunk_size строк. Возвращает число обновлённых
+        строк по каждой пачке в порядке выполнения.
+        """
         logger.info(f"Массовое обновление записей {cls.model.__name__}")
+        changes: dict[int, dict] = {}
+        for record in records:
+            record_dict = record.model_dump(exclude_unset=True)
+            if "id" not in record_dict:
+                continue
+            record_id = record_dict.pop("id")
+            changes.setdefault(record_id, {}).update(record_dict)
+
+        groups: dict[tuple[str, ...], list[dict]] = {}
+        for record_id, update_data in changes.items():
+            if update_data:
+                groups.setdefault(tuple(sorted(update_data)), []).append({"id": record_id, **update_data})
+
+        table = cls.model.__table__
         try:
-            updated_count = 0
-            for record in records:
-                record_dict = record.model_dump(exclude_unset=True)
-                if "id" not in record_dict:
-                    continue
-
-                update_data = {k: v for k, v in record_dict.items() if k != "id"}
-                stmt = sqlalchemy_update(cls.model).filter_by(id=record_dict["id"]).values(**update_data)
-                result = await session.execute(stmt)
-                updated_count += result.rowcount
-
-            logger.info(f"Обновлено {updated_count} записей")
+            rows, rowcounts = [], []
+            for names, group in groups.items():
+                columns = [column(name, table.c[name].type) for name in ("id", *names)]
+                step = cls._chunk_rows(chunk_size, len(columns))
+                for start in range(0, len(group), step):
+                    chunk = group[start : start + step]
+                    data = values(*columns, name="data").data(
+                        [tuple(record[name] for name in ("id", *names)) for record in chunk],
+                    )
+                    stmt = (
+                        sqlalchemy_update(cls.model)
+                        .where(cls.model.id == data.c.id)
+                        # NULL в VALUES Postgres считает text: приводим к типу колонки
+                        .values({name: cast(data.c[name], table.c[name].type) for name in names})
+                        .returning(*cls._returning())
+                        .execution_options(synchronize_session="fetch")
+                    )
+                    result = await session.execute(stmt)
+                    chunk_rows = result.all()
+                    rows.extend(chunk_rows)
+                    rowcounts.append(len(chunk_rows))
+
+            logger.info(f"Обновлено {len(rows)} записей за {len(rowcounts)} запросов")
             await session.flush()
-            return updated_count
+            cls._after_update(session, rows)
+            return rowcounts
         except SQLAlchemyError as e:
             logger.error(f"Ошибка при массовом обновлении: {e}")
             raise
@@ -195,7 +470,7 @@ class BaseDAO(Generic[T]):
         page_size: int = 10,
         filters: BaseModel | None = None,
     ) -> list[T]:
-        # Пагинация записей
+        # Пагинация записей; OFFSET дорожает с номером страницы — для длинных списков paginate_keyset
         filter_dict = filters.model_dump(exclude_unset=True) if filters else {}
         logger.info(
             f"Пагинация записей {cls.model.__name__} по фильтру: {filter_dict}, страница: {page}, размер страницы: {page_size}",
@@ -211,3 +486,26 @@ class BaseDAO(Generic[T]):
         except SQLAlchemyError as e:
             logger.error(f"Ошибка при пагинации записей: {e}")
             raise
+
+    @classmethod
+    async def paginate_keyset(
+        cls,
+        session: AsyncSession,
+        page: PageParams = PageParams(),
+        filters: BaseModel | None = None,
+    ) -> Page[list[T]]:
+        # Keyset-пагинация по id: страница после курсора, без OFFSET
+        filter_dict = filters.model_dump(exclude_unset=True) if filters else {}
+        logger.info(
+            f"Пагинация записей {cls.model.__name__} по фильтру: {filter_dict}, курсор: {page.cursor}, размер страницы: {page.limit}",
+        )
+        try:
+            query = select(cls.model).filter_by(**filter_dict)
+            result = await session.execute(keyset(query, [cls.model.id], page, int))
+            rows_page = to_page(result.all(), page, lambda row: (row[0].id,))
+            records = [row[0] for row in rows_page.items]
+            logger.info(f"Найдено {len(records)} записей на странице.")
+            return rows_page._replace(items=records)
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при пагинации записей: {e}")
+            raise
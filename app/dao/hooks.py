@@ -0,0 +1,50 @@
+"""Колбэки, которые выполняются только после успешного коммита сессии."""
+
+import logging
+from collections.abc import Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+logger = logging.getLogger(__name__)
+
+_AFTER_COMMIT_KEY = "after_commit_callbacks"
+_STATE_KEY = "after_commit_state"
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Выполнить callback после коммита транзакции сессии; при откате он отбрасывается."""
+    session.sync_session.info.setdefault(_AFTER_COMMIT_KEY, []).append(callback)
+
+
+def commit_state(session: AsyncSession, key: str, callback: Callable[[dict], None]) -> dict:
+    """
+    Общий словарь транзакции по key: при первом обращении создаётся вместе с колбэком, который получит его
+    после коммита, — так изменения нескольких записей применяются один раз. При откате отбрасывается.
+    """
+    states = session.sync_session.info.setdefault(_STATE_KEY, {})
+    if key not in states:
+        state = states[key] = {}
+        after_commit(session, lambda: callback(state))
+    return states[key]
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session) -> None:
+    if session.in_nested_transaction():
+        return  # коммит SAVEPOINT, внешняя транзакция ещё может откатиться
+    session.info.pop(_STATE_KEY, None)
+    for callback in session.info.pop(_AFTER_COMMIT_KEY, []):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Ошибка в колбэке после коммита {callback!r}: {e}")
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_after_commit(session: Session, transaction: SessionTransaction) -> None:
+    # откат или закрытие корневой транзакции без коммита
+    if transaction.parent is None:
+        session.info.pop(_AFTER_COMMIT_KEY, None)
+        session.info.pop(_STATE_KEY, None)
@@ -0,0 +1,95 @@
+"""
+Keyset-пагинация: непрозрачный курсор с ключом сортировки последней записи страницы.
+
+Следующая страница — строки строго после курсора по (ключ сортировки, id), поэтому глубина страницы
+не влияет на стоимость запроса, в отличие от OFFSET.
+"""
+
+import base64
+import binascii
+import json
+from collections.abc import Callable, Sequence
+from typing import Any, Generic, NamedTuple, TypeVar
+
+from fastapi import HTTPException
+from sqlalchemy import ColumnElement, func, Row, ScalarSelect, select, Select, tuple_
+from starlette import status
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# тело списков остаётся массивом, курсор следующей страницы и общее число — в заголовках
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+def encode_cursor(*values: Any) -> str:
+    payload = json.dumps(values, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """Разобрать курсор и привести значения к ожидаемым типам; битый курсор — 400."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor)
+        return tuple(value_type(value) for value_type, value in zip(types, values))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор.")
+
+
+class PageParams(NamedTuple):
+    cursor: str | None = None
+    limit: int = DEFAULT_PAGE_SIZE
+    with_total: bool = False
+
+
+class Page(NamedTuple, Generic[T]):
+    items: T
+    next_cursor: str | None = None  # None — последняя страница
+    total: int | None = None  # только при with_total
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {}
+        if self.next_cursor is not None:
+            headers[NEXT_CURSOR_HEADER] = self.next_cursor
+        if self.total is not None:
+            headers[TOTAL_COUNT_HEADER] = str(self.total)
+        return headers
+
+
+def count_all(query: Select) -> ScalarSelect:
+    """Число строк query без курсора и лимита — подзапросом в том же запросе, что и страница."""
+    return select(func.count()).select_from(query.order_by(None).subquery()).scalar_subquery()
+
+
+def keyset(query: Select, columns: Sequence[ColumnElement], page: PageParams, *types: type) -> Select:
+    """
+    Страница query после page.cursor в порядке columns (последняя — id).
+
+    Строк на одну больше page.limit — по лишней видно, что есть следующая страница. При with_total
+    к каждой строке добавляется колонка total.
+    """
+    paged = query
+    if page.cursor:
+        paged = paged.where(tuple_(*columns) > tuple_(*decode_cursor(page.cursor, *types)))
+    paged = paged.order_by(*columns).limit(page.limit + 1)
+    if page.with_total:
+        paged = paged.add_columns(count_all(query).label("total"))
+    return paged
+
+
+def to_page(rows: Sequence[Row], page: PageParams, cursor_key: Callable[[Row], tuple]) -> Page[list[Row]]:
+    """Страница из результата keyset(); cursor_key — значения columns для строки."""
+    items = list(rows[: page.limit])
+    next_cursor = encode_cursor(*cursor_key(items[-1])) if len(rows) > page.limit else None
+    total = None
+    if page.with_total:
+        # по пустой странице после курсора общее число неизвестно
+        total = rows[0].total if rows else (0 if page.cursor is None else None)
+    return Page(items, next_cursor, total)
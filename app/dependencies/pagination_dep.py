@@ -0,0 +1,11 @@
+from fastapi import Query
+
+from app.dao.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, PageParams
+
+
+def get_page_params(
+    cursor: str | None = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+    with_total: bool = Query(False, description="Вернуть общее число записей в заголовке X-Total-Count"),
+) -> PageParams:
+    return PageParams(cursor, limit, with_total)
@@ -5,6 +5,8 @@
 from .building import *
 from .organization import *
 from .activity import *
+from .activity_closure import *
+from .activity_tree_version import *
 from .organization_activity import *
 from .auth import *
 
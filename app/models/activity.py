@@ -1,7 +1,7 @@
 import typing
 from typing import Optional
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.dao.database import Base
@@ -26,3 +26,5 @@ class Activity(Base):
         back_populates="activities",
         # lazy='joined',  # если  не указаны lazy="joined" и lazy="selectin", то подгружаем
     )
+
+    __table_args__ = (Index("ix_activities_name", "name"),)
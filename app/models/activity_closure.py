@@ -0,0 +1,20 @@
+from sqlalchemy import ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.dao.database import Base
+
+
+class ActivityClosure(Base):
+    """Замыкание дерева деятельностей: пара (предок, потомок) для каждого пути, включая (узел, узел)."""
+
+    __tablename__ = "activity_closure"
+
+    ancestor_id: Mapped[int] = mapped_column(ForeignKey("activities.id", ondelete="CASCADE"), nullable=False)
+    descendant_id: Mapped[int] = mapped_column(ForeignKey("activities.id", ondelete="CASCADE"), nullable=False)
+    depth: Mapped[int] = mapped_column(nullable=False)
+
+    __table_args__ = (
+        # поддерево: ancestor_id -> descendant_id без обращения к таблице
+        UniqueConstraint("ancestor_id", "descendant_id", name="uq_activity_closure"),
+        Index("ix_activity_closure_descendant_id", "descendant_id"),
+    )
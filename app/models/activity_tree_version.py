@@ -0,0 +1,16 @@
+from sqlalchemy import BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.dao.database import Base
+
+
+class ActivityTreeVersion(Base):
+    """
+    Версия дерева деятельностей: одна строка, триггер на activities увеличивает version один раз за транзакцию
+    (txid — транзакция последнего увеличения). По ней снимок дерева в памяти понимает, что отстал от БД.
+    """
+
+    __tablename__ = "activity_tree_version"
+
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    txid: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
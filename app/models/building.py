@@ -1,6 +1,8 @@
 import typing
 
+from sqlalchemy import Computed, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.types import UserDefinedType
 
 from app.dao.database import Base
 
@@ -8,15 +10,32 @@ if typing.TYPE_CHECKING:
     from app.models import Organization
 
 
+class Point(UserDefinedType):
+    """Встроенный тип Postgres point (без PostGIS)."""
+
+    cache_ok = True
+
+    def get_col_spec(self, **kw) -> str:
+        return "POINT"
+
+
 class Building(Base):
     __tablename__ = "buildings"
 
     address: Mapped[str] = mapped_column(nullable=False)
     latitude: Mapped[float] = mapped_column(nullable=False)
     longitude: Mapped[float] = mapped_column(nullable=False)
+    # point(lon, lat) под GiST-индекс: фильтр <@ box и сортировка ближайших <->; в ORM не загружается
+    location: Mapped[typing.Any] = mapped_column(
+        Point(),
+        Computed("point(longitude, latitude)", persisted=True),
+        deferred=True,
+    )
 
     organizations: Mapped[list["Organization"]] = relationship(
         "Organization",
         back_populates="building",
         # lazy='joined',  # если  не указаны lazy="joined" и lazy="selectin", то подгружаем
     )
+
+    __table_args__ = (Index("ix_buildings_location", "location", postgresql_using="gist"),)
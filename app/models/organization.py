@@ -1,8 +1,10 @@
 import typing
 
-from sqlalchemy import ForeignKey, JSON
+from sqlalchemy import Computed, ForeignKey, Index, Text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.phones import PHONE_DIGITS_SQL
 from app.dao.database import Base
 
 if typing.TYPE_CHECKING:
@@ -13,7 +15,14 @@ class Organization(Base):
     __tablename__ = "organizations"
 
     name: Mapped[str] = mapped_column(nullable=False)
-    phone_numbers: Mapped[list] = mapped_column(JSON)
+    phone_numbers: Mapped[list] = mapped_column(JSONB)
+    # номера в канонической форме (только цифры), считаются самой БД; под GIN-индекс поиска по номеру,
+    # в ORM не загружается
+    phone_digits: Mapped[list[str]] = mapped_column(
+        ARRAY(Text),
+        Computed(PHONE_DIGITS_SQL, persisted=True),
+        deferred=True,
+    )
     building_id: Mapped[int] = mapped_column(ForeignKey("buildings.id"))
 
     building: Mapped["Building"] = relationship(
@@ -27,3 +36,17 @@ class Organization(Base):
         back_populates="organizations",
         # lazy='selectin',  # если  не указаны lazy="joined" и lazy="selectin", то подгружаем
     )
+
+    __table_args__ = (
+        # нечёткий поиск по названию (pg_trgm): similarity / word_similarity, а также =, LIKE и ILIKE
+        Index(
+            "ix_organizations_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        # организации найденных зданий (геопоиск, комбинированный поиск) без полного скана
+        Index("ix_organizations_building_id", "building_id"),
+        # поиск организации по номеру: phone_digits @> ARRAY[номер]
+        Index("ix_organizations_phone_digits", "phone_digits", postgresql_using="gin"),
+    )
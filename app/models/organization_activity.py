@@ -1,6 +1,6 @@
 import typing
 
-from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy import ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.dao.database import Base
@@ -16,4 +16,7 @@ class OrganizationActivity(Base):
     organization_id: Mapped[int] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
     activity_id: Mapped[int] = mapped_column(ForeignKey("activities.id", ondelete="CASCADE"), nullable=False)
 
-    __table_args__ = (UniqueConstraint("organization_id", "activity_id", name="uq_organization_activity"),)
+    __table_args__ = (
+        UniqueConstraint("organization_id", "activity_id", name="uq_organization_activity"),
+        Index("ix_organization_activity_activity_id", "activity_id"),
+    )
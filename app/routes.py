@@ -5,6 +5,10 @@ from fastapi import APIRouter
 from app.api.organization.router import router as organization_router
 from app.api.activity.router import router as activity_router
 from app.api.building.router import router as building_router
+from app.api.suggest.router import router as suggest_router
+from app.api.search.router import router as search_router
+from app.api.importer.router import router as import_router
+from app.api.export.router import router as export_router
 from app.api.init_data_router import router as init_data_router
 from app.core.settings import APP_CONFIG
 
@@ -18,6 +22,10 @@ routers = (
     organization_router,
     activity_router,
     building_router,
+    suggest_router,
+    search_router,
+    import_router,
+    export_router,
 )
 for resource_router in routers:
     router.include_router(resource_router)
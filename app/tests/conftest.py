@@ -1,4 +1,4 @@
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, patch
 
 import pytest
 import pytest_asyncio
@@ -49,8 +49,14 @@ async def _app():
 async def client(_app):
     lifespan = LifespanManager(_app)
     httpx_client = AsyncClient(transport=ASGITransport(app=_app), base_url="http://testserver")
-    async with httpx_client as client, lifespan:
-        yield client
+    # загрузчики индексов в lifespan ходят в БД: без неё старт упирается в таймаут LifespanManager
+    with (
+        patch("app.application.load_activity_tree", AsyncMock()),
+        patch("app.application.load_suggest_index", AsyncMock()),
+        patch("app.application.load_building_index", AsyncMock()),
+    ):
+        async with httpx_client as client, lifespan:
+            yield client
 
 
 @pytest.fixture
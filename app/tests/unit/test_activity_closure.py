@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.api.activity.dao import ActivityDao
+
+
+@pytest.mark.asyncio
+async def test_parent_change_rebuilds_closure_of_moved_nodes():
+    paths = [
+        SimpleNamespace(ancestor_id=4, descendant_id=4, depth=0, _asdict=lambda: {"depth": 0}),
+        SimpleNamespace(ancestor_id=3, descendant_id=4, depth=1, _asdict=lambda: {"depth": 1}),
+    ]
+    session = MagicMock(execute=AsyncMock(return_value=MagicMock(all=MagicMock(return_value=paths))))
+    session.sync_session.info = {}
+    rows = [
+        SimpleNamespace(id=4, name="Говядина", parent_id=3, old_name="Говядина", old_parent_id=2),
+        SimpleNamespace(id=2, name="Мясо", parent_id=1, old_name="Мясная продукция", old_parent_id=1),
+    ]
+
+    ActivityDao._after_update(session, rows)
+    await ActivityDao._sync_closure(session)
+
+    select_paths, delete_old, insert_new = [call.args for call in session.execute.call_args_list]
+    assert "WITH RECURSIVE" in str(select_paths[0])
+    assert delete_old[0].compile().params == {"descendant_id_1": [4]}
+    assert insert_new[1] == [{"depth": 0}, {"depth": 1}]
+    # перенос уже учтён: повторный вызов ничего не делает
+    await ActivityDao._sync_closure(session)
+    assert session.execute.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_closure_rejects_fourth_level_and_cycles():
+    too_deep = SimpleNamespace(ancestor_id=1, descendant_id=4, depth=3)
+    session = MagicMock(execute=AsyncMock(return_value=MagicMock(all=MagicMock(return_value=[too_deep]))))
+    session.sync_session.info = {}
+
+    with pytest.raises(ValueError):
+        await ActivityDao._sync_closure(session, [4])
@@ -0,0 +1,132 @@
+import random
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql
+
+from app.api.activity.dao import ActivityDao
+from app.api.activity.schemas import ActivityTreeImport
+from app.api.activity.tree import ActivityTree, ActivityTreeStore
+from app.dao.hooks import _run_after_commit
+
+ROWS = [
+    (1, "Еда", None),
+    (2, "Мясная продукция", 1),
+    (3, "Молочная продукция", 1),
+    (4, "Говядина", 2),
+    (5, "Автомобили", None),
+    (6, "Запчасти", 5),
+    (7, "Мясная продукция", 5),  # одно имя в разных ветках
+]
+
+
+def test_depths_children_and_name_index():
+    tree = ActivityTree(ROWS)
+
+    assert [tree.depths[i] for i in (1, 2, 4, 6)] == [0, 1, 2, 1]
+    assert tree.children[1] == (2, 3)
+    assert tree.ids_by_name("Мясная продукция") == (2, 7)
+    assert tree.ids_by_name("Нет такого") == ()
+
+
+def test_subtree():
+    tree = ActivityTree(ROWS)
+
+    assert sorted(tree.subtree(tree.ids_by_name("Еда"))) == [1, 2, 3, 4]
+    assert sorted(tree.subtree(tree.ids_by_name("Мясная продукция"))) == [2, 4, 7]
+
+
+def test_with_changes_returns_new_snapshot():
+    tree = ActivityTree(ROWS)
+
+    changed = tree.with_changes(upserts=[(8, "Баранина", 2), (3, "Молоко", 2)], deleted_ids=[4])
+
+    assert changed.depths[8] == 2 and changed.depths[3] == 2
+    assert sorted(changed.subtree([1])) == [1, 2, 3, 8]
+    assert changed.ids_by_name("Молочная продукция") == ()
+    assert 4 in tree and 4 not in changed  # старый снимок не меняется
+
+
+def test_with_changes_matches_full_rebuild():
+    rng = random.Random(1)
+    tree = ActivityTree(ROWS)
+    rows = {row[0]: row for row in ROWS}
+    for _ in range(200):
+        upserts = [(rng.randint(1, 12), rng.choice(["А", "Б", "В"]), rng.choice([None, *rows])) for _ in range(2)]
+        upserts = [row for row in upserts if row[2] != row[0]]
+        deleted_ids = [rng.randint(1, 12)]
+        tree = tree.with_changes(upserts, deleted_ids)
+        for activity_id in deleted_ids:
+            rows.pop(activity_id, None)
+        rows.update((row[0], row) for row in upserts)
+
+        rebuilt = ActivityTree(rows.values())
+        # циклы (узел под своим потомком) в БД отклоняет замыкание — сравниваем только деревья без них
+        if len(rebuilt.depths) == len(rebuilt):
+            assert (tree.names, tree.parents, tree.children, tree.by_name) == (
+                rebuilt.names,
+                rebuilt.parents,
+                rebuilt.children,
+                rebuilt.by_name,
+            )
+            assert tree.depths == rebuilt.depths
+        else:
+            tree, rows = ActivityTree(ROWS), {row[0]: row for row in ROWS}
+
+
+def test_store_applies_only_next_version():
+    store = ActivityTreeStore()
+    store.tree, store.version, store.ready = ActivityTree(ROWS), 5, True
+
+    with patch.object(store, "reload_in_background") as reload:
+        store.apply(upserts=[(8, "Баранина", 2)], version=6)
+        assert (store.version, store.tree.depths[8], reload.called) == (6, 2, False)
+
+        store.apply(deleted_ids=[8], version=8)  # версию 7 записал другой процесс
+        assert (store.version, 8 in store.tree, reload.called) == (6, False, True)
+
+
+def test_tree_changes_are_applied_once_per_commit():
+    session = MagicMock()
+    session.sync_session.info = {}
+    session.sync_session.in_nested_transaction.return_value = False
+    rows = [SimpleNamespace(id=2, name="Мясо", parent_id=1, old_name="Мясо", old_parent_id=1)]
+
+    with patch("app.api.activity.dao.activity_tree") as store, patch("app.api.activity.dao.suggest_index"):
+        ActivityDao._after_add(session, [SimpleNamespace(id=8, name="Баранина", parent_id=2)])
+        ActivityDao._after_update(session, rows)
+        ActivityDao._after_delete(session, [SimpleNamespace(id=8, name="Баранина")])
+        ActivityDao._tree_state(session)["version"] = 3
+        _run_after_commit(session.sync_session)
+
+    store.apply.assert_called_once_with(upserts=[(2, "Мясо", 1)], deleted_ids=[8], version=3)
+
+
+def test_org_ids_fall_back_to_closure_when_snapshot_is_stale():
+    store = ActivityTreeStore()
+    store.tree, store.version = ActivityTree(ROWS), 5
+
+    with patch("app.api.activity.dao.activity_tree", store):
+        query = ActivityDao.org_ids_by_activity_name("Еда", include_descendants=True)
+    sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+    snapshot, closure = sql.split("UNION ALL")
+    assert "FROM activity_tree_version) = 5" in snapshot and "IN (1, 3, 2, 4)" in snapshot
+    assert "FROM activity_tree_version) != 5" in closure and "activity_closure" in closure
+
+
+def test_import_levels_keep_parent_indexes():
+    tree = ActivityTreeImport({"Еда": {"Мясная продукция": ["Говядина"], "Молоко": []}, "Автомобили": ["Грузовые"]})
+
+    assert tree.levels() == [
+        [("Еда", None), ("Автомобили", None)],
+        [("Мясная продукция", 0), ("Молоко", 0), ("Грузовые", 1)],
+        [("Говядина", 0)],
+    ]
+
+
+def test_import_rejects_fourth_level():
+    with pytest.raises(ValidationError):
+        ActivityTreeImport({"Еда": {"Мясная продукция": {"Говядина": ["Вырезка"]}}})
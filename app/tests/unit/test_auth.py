@@ -4,10 +4,10 @@ import pytest
 
 
 @pytest.mark.parametrize(
-    "email, user_in_db, expected_status, expected_message",
+    "email, user_created, expected_status, expected_message",
     [
-        ("user@example.com", None, 201, {"message": "Вы успешно зарегистрированы!"}),
-        ("user@example.com", MagicMock(), 409, {"detail": "Пользователь уже существует"}),
+        ("user@example.com", MagicMock(), 201, {"message": "Вы успешно зарегистрированы!"}),
+        ("user@example.com", None, 409, {"detail": "Пользователь уже существует"}),
     ],
     ids=["success", "user already exists"],
 )
@@ -15,7 +15,7 @@ import pytest
 async def test_register_user(
     client,
     email,
-    user_in_db,
+    user_created,
     expected_status,
     expected_message,
 ):
@@ -28,9 +28,9 @@ async def test_register_user(
         "confirm_password": "string",
     }
 
-    # with patch("app.api.auth.dao.UsersDAO.find_one_or_none", return_value=None):
-    with patch("app.api.auth.dao.UsersDAO.find_one_or_none") as mock_find:
-        mock_find.return_value = user_in_db
+    # None — ON CONFLICT DO NOTHING: такой пользователь уже есть
+    with patch("app.api.auth.dao.UsersDAO.upsert") as mock_upsert:
+        mock_upsert.return_value = user_created
 
         response = await client.post("/register", json=data)
         assert response.status_code == expected_status
@@ -0,0 +1,148 @@
+import random
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.api.building.geo import haversine_m
+from app.api.building import index as index_module
+from app.api.building.index import BuildingIndex
+
+
+def _random_points(count, seed=0):
+    rnd = random.Random(seed)
+    return [(i, rnd.uniform(55.0, 56.0), rnd.uniform(37.0, 38.0)) for i in range(1, count + 1)]
+
+
+def _brute_force(points, latitude, longitude, radius):
+    hits = [(i, haversine_m(latitude, longitude, lat, lon)) for i, lat, lon in points]
+    return sorted(((i, d) for i, d in hits if d <= radius), key=lambda hit: (hit[1], hit[0]))
+
+
+@pytest.mark.parametrize("radius", [500, 5_000, 30_000])
+def test_within_radius_matches_brute_force(radius):
+    points = _random_points(2_000)
+    index = BuildingIndex()
+    index.build(points)
+
+    hits = index.within_radius(55.5, 37.5, radius)
+    expected = _brute_force(points, 55.5, 37.5, radius)
+
+    assert [i for i, _ in hits] == [i for i, _ in expected]
+    assert [d for _, d in hits] == pytest.approx([d for _, d in expected], abs=1e-3)
+
+
+def test_within_radius_across_antimeridian():
+    index = BuildingIndex()
+    index.build([(1, 65.0, 179.99), (2, 65.0, -179.99), (3, 65.0, 170.0)])
+
+    assert [i for i, _ in index.within_radius(65.0, 180.0, 2_000)] == [1, 2]
+
+
+def test_add_goes_to_buffer_and_triggers_rebuild():
+    points = _random_points(100)
+    index = BuildingIndex(min_rebuild_size=10)
+    index.add(points[:5])
+    assert len(index) == 0  # до загрузки индекс не принимает точки
+
+    index.build(points[:50])
+    index.add(points[50:55])
+    assert (len(index), index.buffered) == (55, 5)
+
+    index.add(points[55:])  # буфер больше порога — синхронная перестройка вне event loop
+    assert (len(index), index.buffered) == (100, 0)
+    assert [i for i, _ in index.within_radius(55.5, 37.5, 20_000)] == [
+        i for i, _ in _brute_force(points, 55.5, 37.5, 20_000)
+    ]
+
+
+def test_iter_nearest_matches_brute_force():
+    points = _random_points(1_000, seed=1)
+    index = BuildingIndex()
+    index.build(points[:900])
+    index.add(points[900:])
+
+    nearest = index.iter_nearest(55.3, 37.8)
+    first = [next(nearest) for _ in range(25)]
+    expected = _brute_force(points, 55.3, 37.8, float("inf"))[:25]
+
+    assert [i for i, _ in first] == [i for i, _ in expected]
+    assert [d for _, d in first] == pytest.approx([d for _, d in expected], abs=1e-3)
+    assert len(list(index.iter_nearest(0, 0))) == 1_000
+
+
+def test_iter_nearest_seeks_from_min_distance():
+    points = _random_points(5_000, seed=2)
+    index = BuildingIndex()
+    index.build(points[:4_900])
+    index.add(points[4_900:])
+    expected = _brute_force(points, 55.5, 37.5, float("inf"))
+    min_distance = (expected[2_999][1] + expected[3_000][1]) / 2
+
+    nearest = index.iter_nearest(55.5, 37.5, min_distance)
+    page = [next(nearest) for _ in range(50)]
+
+    assert [i for i, _ in page] == [i for i, _ in expected[3_000:3_050]]
+
+
+def test_move_and_remove_before_and_after_rebuild():
+    points = _random_points(200, seed=2)
+    index = BuildingIndex(min_rebuild_size=1_000)
+    index.build(points)
+
+    moved = [(i, lat + 0.3, lon - 0.2) for i, lat, lon in points[:20]]
+    index.move(moved)
+    index.move(moved[:5])  # повторное перемещение не дублирует точку
+    index.remove([i for i, _, _ in points[20:40]] + [1])
+    expected_points = moved[1:] + points[40:]
+
+    for _ in range(2):
+        hits = index.within_radius(55.5, 37.5, 40_000)
+        assert [i for i, _ in hits] == [i for i, _ in _brute_force(expected_points, 55.5, 37.5, 40_000)]
+        assert sorted(i for i, _ in index.iter_nearest(55.5, 37.5)) == sorted(i for i, _, _ in expected_points)
+        index._rebuild()
+        assert (index.buffered, index.removed) == (0, 0)
+
+
+def test_changes_during_rebuild_are_kept(monkeypatch):
+    points = _random_points(100, seed=3)
+    index = BuildingIndex(min_rebuild_size=1_000)
+    index.build(points)
+    index.move([(1, 10.0, 10.0)])
+
+    build_tree = index_module._KDTree
+
+    def build_with_concurrent_writes(tree_points):
+        index.move([(1, 20.0, 20.0), (2, 20.0, 20.0)])
+        index.remove([3])
+        index.add([(101, 20.0, 20.0)])
+        return build_tree(tree_points)
+
+    monkeypatch.setattr(index_module, "_KDTree", build_with_concurrent_writes)
+    index._rebuild()
+
+    assert sorted(i for i, _ in index.within_radius(20.0, 20.0, 1_000)) == [1, 2, 101]
+    assert index.within_radius(10.0, 10.0, 1_000) == []
+    assert 3 not in {i for i, _ in index.iter_nearest(55.5, 37.5)}
+
+
+@pytest.mark.asyncio
+async def test_changes_during_load_are_kept():
+    points = _random_points(100, seed=4)
+    index = BuildingIndex()
+    index.build(points)
+
+    async def stream_with_concurrent_writes():
+        # снимок БД: здание 5 уже перенесено в (20, 20), здания 101 ещё нет
+        for point_id, lat, lon in points:
+            yield (point_id, 20.0, 20.0) if point_id == 5 else (point_id, lat, lon)
+            if point_id == 50:
+                index.move([(5, 20.0, 20.0)])
+                index.add([(101, 20.0, 20.0)])
+                index.remove([7])
+
+    session = MagicMock(stream=AsyncMock(return_value=stream_with_concurrent_writes()))
+    await index.load(session)
+
+    assert sorted(i for i, _ in index.within_radius(20.0, 20.0, 1_000)) == [5, 101]
+    assert 7 not in {i for i, _ in index.iter_nearest(55.5, 37.5)}
+    assert len(list(index.iter_nearest(55.5, 37.5))) == 100
@@ -0,0 +1,204 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy.dialects import postgresql
+
+from app.api.building.dao import BuildingDao
+from app.api.organization.schemas import BuildingCreate
+
+
+class BuildingUpdate(BaseModel):
+    id: int | None = None
+    latitude: float | None = None
+    longitude: float | None = None
+
+
+def _row(record_id: int, **values):
+    return SimpleNamespace(id=record_id, address="Блюхера, 32/1", latitude=None, longitude=None, **values)
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_groups_by_columns_and_chunks():
+    # пачки: (0, 1), (2, 3), (4,) с latitude; (10,) с latitude и longitude; id=3 в БД нет
+    returned = [[_row(0), _row(1)], [_row(2)], [_row(4)], [_row(10)]]
+    session = MagicMock(
+        execute=AsyncMock(side_effect=[MagicMock(all=MagicMock(return_value=rows)) for rows in returned]),
+        flush=AsyncMock(),
+    )
+    session.sync_session.info = {}
+    records = [BuildingUpdate(id=i, latitude=55.0 + i) for i in range(5)]
+    records += [
+        BuildingUpdate(id=10, latitude=1.0, longitude=2.0),
+        BuildingUpdate(id=10, latitude=3.0),  # поздние изменения того же id перекрывают ранние
+        BuildingUpdate(latitude=0.0),  # без id — пропускается
+    ]
+
+    with patch.object(BuildingDao, "_after_update") as after_update:
+        rowcounts = await BuildingDao.bulk_update_chunks(session, records, chunk_size=2)
+
+    statements = [call.args[0].compile(dialect=postgresql.dialect()) for call in session.execute.call_args_list]
+    sql = [str(statement) for statement in statements]
+    assert rowcounts == [2, 1, 1, 1]
+    assert all("FROM (VALUES" in statement for statement in sql)
+    assert "SET latitude=CAST(data.latitude AS FLOAT)" in sql[0] and "longitude" not in sql[0].split("FROM")[0]
+    assert "SET latitude=CAST(data.latitude AS FLOAT), longitude=CAST(data.longitude AS FLOAT)" in sql[-1]
+    assert [list(statement.params.values()) for statement in statements] == [
+        [0, 55.0, 1, 56.0],
+        [2, 57.0, 3, 58.0],
+        [4, 59.0],
+        [10, 3.0, 2.0],
+    ]
+    after_update.assert_called_once_with(session, [row for rows in returned for row in rows])
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_returns_total_and_sets_null():
+    session = MagicMock(
+        execute=AsyncMock(return_value=MagicMock(all=MagicMock(return_value=[_row(1)]))),
+        flush=AsyncMock(),
+    )
+    session.sync_session.info = {}
+
+    # у id=2 нет изменений — в запрос не попадает
+    updated = await BuildingDao.bulk_update(session, [BuildingUpdate(id=1, longitude=None), BuildingUpdate(id=2)])
+
+    (stmt,) = session.execute.call_args.args
+    assert updated == 1
+    # NULL в VALUES без приведения Postgres считает text и отклоняет присваивание
+    assert "SET longitude=CAST(data.longitude AS FLOAT)" in str(stmt.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_add_many_inserts_in_chunks_with_returning():
+    inserted = [SimpleNamespace(id=i, latitude=55.0, longitude=37.0) for i in range(3)]
+    session = MagicMock(
+        execute=AsyncMock(return_value=MagicMock(all=MagicMock(side_effect=[inserted[:2], inserted[2:]])))
+    )
+    session.sync_session.info = {}
+    records = [BuildingCreate(address=f"Блюхера, {i}", latitude=55.0, longitude=37.0) for i in range(3)]
+
+    rows = await BuildingDao.add_many(session, records, chunk_size=2)
+
+    assert rows == inserted
+    (first_stmt, first_chunk), (_, second_chunk) = [call.args for call in session.execute.call_args_list]
+    assert "RETURNING" in str(first_stmt.compile(dialect=postgresql.dialect()))
+    assert [len(first_chunk), len(second_chunk)] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_add_many_groups_records_by_set_fields():
+    session = MagicMock(
+        execute=AsyncMock(
+            side_effect=lambda stmt, chunk: MagicMock(
+                all=MagicMock(return_value=[SimpleNamespace(**{"id": 1, "longitude": None, **v}) for v in chunk])
+            ),
+        ),
+    )
+    session.sync_session.info = {}
+    records = [
+        BuildingUpdate(latitude=1.0),
+        BuildingUpdate(latitude=2.0, longitude=3.0),
+        BuildingUpdate(latitude=4.0),
+    ]
+
+    rows = await BuildingDao.add_many(session, records)
+
+    chunks = [call.args[1] for call in session.execute.call_args_list]
+    assert chunks == [[{"latitude": 1.0}, {"latitude": 4.0}], [{"latitude": 2.0, "longitude": 3.0}]]
+    assert [row.latitude for row in rows] == [1.0, 2.0, 4.0]
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_skips_unchanged_rows_and_dedupes_keys():
+    session = MagicMock(execute=AsyncMock(return_value=MagicMock(all=MagicMock(return_value=[]))))
+    session.sync_session.info = {}
+    records = [
+        BuildingUpdate(id=1, latitude=1.0),
+        BuildingUpdate(id=1, latitude=2.0),
+        BuildingUpdate(id=2, latitude=3.0),
+    ]
+
+    rows = await BuildingDao.upsert_many(session, records, conflict=("id",), update=("latitude",))
+
+    stmt, params = session.execute.call_args.args
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert rows == []
+    assert "ON CONFLICT (id) DO UPDATE SET latitude = excluded.latitude" in sql
+    assert "WHERE (buildings.latitude) IS DISTINCT FROM (excluded.latitude)" in sql
+    assert params == [{"id": 1, "latitude": 2.0}, {"id": 2, "latitude": 3.0}]
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_groups_records_by_set_fields():
+    session = MagicMock(execute=AsyncMock(return_value=MagicMock(all=MagicMock(return_value=[]))))
+    session.sync_session.info = {}
+    records = [
+        BuildingUpdate(id=1, latitude=1.0),
+        BuildingUpdate(latitude=2.0),  # без ключа: не сливается ни с такой же строкой, ни с id=1
+        BuildingUpdate(id=2, latitude=3.0, longitude=4.0),
+        BuildingUpdate(latitude=5.0),
+    ]
+
+    await BuildingDao.upsert_many(session, records, conflict=("id",))
+
+    chunks = [call.args[1] for call in session.execute.call_args_list]
+    assert chunks == [
+        [{"id": 1, "latitude": 1.0}],
+        [{"latitude": 2.0}, {"latitude": 5.0}],
+        [{"id": 2, "latitude": 3.0, "longitude": 4.0}],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_updates_only_columns_set_in_group():
+    session = MagicMock(execute=AsyncMock(return_value=MagicMock(all=MagicMock(return_value=[]))))
+    session.sync_session.info = {}
+    records = [
+        BuildingUpdate(id=1, latitude=1.0),
+        BuildingUpdate(id=2, longitude=2.0),  # latitude не задана: существующую не трогаем
+    ]
+
+    await BuildingDao.upsert_many(session, records, conflict=("id",), update=("latitude",))
+
+    (first, first_params), (second, second_params) = [call.args for call in session.execute.call_args_list]
+    first_sql = str(first.compile(dialect=postgresql.dialect()))
+    second_sql = str(second.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (id) DO UPDATE SET latitude = excluded.latitude" in first_sql
+    assert first_params == [{"id": 1, "latitude": 1.0}]
+    assert "ON CONFLICT (id) DO NOTHING" in second_sql and "latitude = excluded" not in second_sql
+    assert second_params == [{"id": 2, "longitude": 2.0}]
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_splits_inserted_and_updated_rows():
+    returned = [
+        SimpleNamespace(id=1, latitude=1.0, longitude=2.0, inserted=False),
+        SimpleNamespace(id=7, latitude=3.0, longitude=4.0, inserted=True),
+    ]
+    session = MagicMock(execute=AsyncMock(return_value=MagicMock(all=MagicMock(return_value=returned))))
+    session.sync_session.info = {}
+    records = [
+        BuildingUpdate(id=1, latitude=1.0, longitude=2.0),
+        BuildingUpdate(id=7, latitude=3.0, longitude=4.0),
+        BuildingUpdate(id=9, latitude=5.0, longitude=6.0),  # уже в БД в том же виде: не возвращается
+    ]
+
+    with (
+        patch.object(BuildingDao, "_after_add") as after_add,
+        patch.object(BuildingDao, "_after_update") as after_update,
+    ):
+        rows = await BuildingDao.upsert_many(session, records, conflict=("id",), update=("latitude", "longitude"))
+
+    (stmt, _) = session.execute.call_args.args
+    assert "xmax = 0 AS inserted" in str(stmt.compile(dialect=postgresql.dialect()))
+    assert rows == returned
+    after_add.assert_called_once_with(session, [returned[1]])
+    after_update.assert_called_once_with(session, [returned[0]])
+
+
+@pytest.mark.asyncio
+async def test_upsert_update_requires_conflict_target():
+    with pytest.raises(ValueError):
+        await BuildingDao.upsert(MagicMock(), BuildingUpdate(id=1, latitude=1.0), update=("latitude",))
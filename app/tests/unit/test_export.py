@@ -0,0 +1,44 @@
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.api.export.dao import csv_rows
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def test_csv_query_compiles_for_copy():
+    # COPY не принимает параметры: запрос целиком с литералами
+    sql = str(csv_rows().compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+    assert "%(" not in sql
+    assert sql.endswith("ORDER BY organizations.id")
+
+
+@pytest.mark.parametrize(
+    "export_format, method, media_type",
+    [
+        ("csv", "stream_csv", "text/csv; charset=utf-8"),
+        ("ndjson", "stream_ndjson", "application/x-ndjson"),
+    ],
+)
+@pytest.mark.asyncio
+async def test_export_streams_chunks(client, export_format, method, media_type):
+    with patch(f"app.api.export.dao.ExportDao.{method}", return_value=_chunks(b"id\n", b"1\n")):
+        response = await client.get("/v1/export/organizations", params={"format": export_format})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == media_type
+    assert f'filename="organizations.{export_format}"' in response.headers["content-disposition"]
+    assert response.content == b"id\n1\n"
+
+
+@pytest.mark.asyncio
+async def test_export_rejects_unknown_format(client):
+    response = await client.get("/v1/export/organizations", params={"format": "xml"})
+
+    assert response.status_code == 422
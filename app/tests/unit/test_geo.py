@@ -0,0 +1,149 @@
+import math
+
+import pytest
+
+from app.api.building.geo import (
+    bounding_box,
+    cluster_cell_deg,
+    EARTH_RADIUS_M,
+    haversine_m,
+    planar_closer_deg,
+    planar_lower_bound_m,
+    viewport_boxes,
+    within_polygon,
+    within_radius,
+)
+
+
+@pytest.mark.parametrize(
+    "lat1, lon1, lat2, lon2, expected",
+    [
+        (55.7558, 37.6173, 55.7558, 37.6173, 0),
+        (0, 0, 0, 1, 111_195),  # 1 градус по экватору
+        (55.7558, 37.6173, 59.9343, 30.3351, 634_000),  # Москва - Санкт-Петербург
+    ],
+)
+def test_haversine_m(lat1, lon1, lat2, lon2, expected):
+    assert haversine_m(lat1, lon1, lat2, lon2) == pytest.approx(expected, rel=1e-2, abs=1)
+
+
+def _destination(latitude, longitude, distance, bearing):
+    # точка на заданном расстоянии и азимуте от центра
+    phi, lam, theta = math.radians(latitude), math.radians(longitude), math.radians(bearing)
+    delta = distance / EARTH_RADIUS_M
+    phi2 = math.asin(math.sin(phi) * math.cos(delta) + math.cos(phi) * math.sin(delta) * math.cos(theta))
+    lam2 = lam + math.atan2(
+        math.sin(theta) * math.sin(delta) * math.cos(phi),
+        math.cos(delta) - math.sin(phi) * math.sin(phi2),
+    )
+    return math.degrees(phi2), math.degrees(lam2)
+
+
+@pytest.mark.parametrize(
+    "latitude, longitude, radius",
+    [
+        (55.97, 37.29, 1_000),
+        (70.0, 100.0, 50_000),
+        (-33.86, 151.2, 10_000),
+    ],
+)
+def test_bounding_box_contains_circle(latitude, longitude, radius):
+    lat_min, lat_max, lon_min, lon_max = bounding_box(latitude, longitude, radius)
+    for bearing in range(0, 360, 5):
+        lat, lon = _destination(latitude, longitude, radius, bearing)
+        assert lat_min - 1e-9 <= lat <= lat_max + 1e-9
+        assert lon_min - 1e-9 <= lon <= lon_max + 1e-9
+
+
+@pytest.mark.parametrize(
+    "latitude, longitude, radius",
+    [
+        (89.99, 0, 10_000),  # задевает полюс
+        (0, 179.99, 10_000),  # задевает антимеридиан
+    ],
+)
+def test_bounding_box_unbounded_longitude(latitude, longitude, radius):
+    _, _, lon_min, lon_max = bounding_box(latitude, longitude, radius)
+    assert (lon_min, lon_max) == (-180.0, 180.0)
+
+
+def test_within_radius_drops_bbox_corners_and_sorts():
+    latitude, longitude, radius = 55.0, 37.0, 1_000
+    lat_min, lat_max, lon_min, lon_max = bounding_box(latitude, longitude, radius)
+    points = [
+        (1, lat_max, lon_max),  # угол прямоугольника — вне круга
+        (2, latitude + 0.005, longitude),  # ~556 м
+        (3, latitude, longitude + 0.001),  # ~64 м
+        (4, lat_min, lon_min),  # угол прямоугольника — вне круга
+    ]
+    hits = within_radius(latitude, longitude, radius, points)
+
+    assert [point_id for point_id, _ in hits] == [3, 2]
+    assert hits[0][1] == pytest.approx(haversine_m(latitude, longitude, latitude, longitude + 0.001))
+
+
+@pytest.mark.parametrize(
+    "latitude, longitude",
+    [
+        (55.97, 37.29),
+        (-70.0, 10.0),
+        (64.7, 177.5),  # Чукотка: рядом антимеридиан
+    ],
+)
+def test_planar_lower_bound_never_exceeds_distance(latitude, longitude):
+    for a in range(-60, 61, 3):
+        for b in range(-180, 181, 4):
+            lat = max(-90.0, min(90.0, latitude + a / 2))
+            lon = ((longitude + b + 180) % 360) - 180
+            planar = math.hypot(lat - latitude, lon - longitude)
+            assert (
+                planar_lower_bound_m(latitude, longitude, planar) <= haversine_m(latitude, longitude, lat, lon) + 1e-6
+            )
+
+
+@pytest.mark.parametrize(
+    "latitude, longitude",
+    [
+        (55.97, 37.29),
+        (-70.0, 10.0),
+        (64.7, 177.5),
+    ],
+)
+def test_planar_closer_is_really_closer(latitude, longitude):
+    for a in range(-60, 61, 3):
+        for b in range(-180, 181, 4):
+            lat = max(-90.0, min(90.0, latitude + a / 50))
+            lon = ((longitude + b / 50 + 180) % 360) - 180
+            planar = math.hypot(lat - latitude, lon - longitude)
+            distance = haversine_m(latitude, longitude, lat, lon)
+            # точка, отброшенная фильтром planar < planar_closer_deg(d), действительно ближе d
+            assert planar_closer_deg(distance) <= planar + 1e-12
+
+
+def test_within_polygon_with_hole():
+    outer = [(37.0, 55.0), (38.0, 55.0), (38.0, 56.0), (37.0, 56.0), (37.0, 55.0)]
+    hole = [(37.4, 55.4), (37.6, 55.4), (37.6, 55.6), (37.4, 55.6), (37.4, 55.4)]
+    points = [
+        (1, 55.2, 37.2),  # внутри
+        (2, 55.5, 37.5),  # в дырке
+        (3, 55.5, 38.5),  # снаружи
+        (4, 55.9, 37.9),  # внутри
+    ]
+    assert within_polygon([outer, hole], points) == [1, 4]
+
+
+def test_within_polygon_concave_unclosed_ring():
+    # "П"-образный полигон без замыкающей точки
+    ring = [(0, 0), (3, 0), (3, 3), (2, 3), (2, 1), (1, 1), (1, 3), (0, 3)]
+    points = [(1, 2.0, 0.5), (2, 2.0, 1.5), (3, 2.0, 2.5), (4, 0.5, 1.5)]
+    assert within_polygon([ring], points) == [1, 3, 4]
+
+
+def test_cluster_cell_halves_with_each_zoom_level():
+    assert cluster_cell_deg(0) == 90.0
+    assert cluster_cell_deg(10) == pytest.approx(cluster_cell_deg(9) / 2)
+
+
+def test_viewport_boxes_split_at_antimeridian():
+    assert viewport_boxes(37.3, 55.5, 37.9, 56.0) == [(55.5, 56.0, 37.3, 37.9)]
+    assert viewport_boxes(170.0, -10.0, -170.0, 10.0) == [(-10.0, 10.0, 170.0, 180.0), (-10.0, 10.0, -180.0, -170.0)]
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.api.activity.dao import ActivityDao
+from app.api.building.cache import CachedOrg, GeoCache
+from app.api.building.schemas import OrgBuildResponse
+from app.dao.hooks import _run_after_commit
+
+
+def _org(org_id, distance, activities=()):
+    org = OrgBuildResponse(
+        id=org_id,
+        created_at="2024-01-01 00:00",
+        name=f"org {org_id}",
+        phone_numbers=["2-222-222"],
+        address="Блюхера, 32/1",
+        activities=[{"name": name} for name in activities],
+        distance_m=None,
+    )
+    return CachedOrg(org, 55.0, 37.0, distance)
+
+
+def test_key_snaps_jitter_and_buckets_radius():
+    cache = GeoCache(grid_deg=0.001, radius_step_m=100)
+
+    key = cache.key(55.97204, 37.29744, 230, 10)
+
+    assert key == cache.key(55.97196, 37.29712, 201, 10)
+    assert (key.latitude, key.longitude, key.radius) == (55.972, 37.297, 300)
+    assert key != cache.key(55.97204, 37.29744, 230, 20)
+
+
+def test_hit_miss_and_ttl():
+    cache = GeoCache(ttl_s=10)
+    key = cache.key(55.0, 37.0, 500, 10)
+    with patch("app.api.building.cache.time.monotonic", return_value=100.0):
+        assert cache.get(key) is None
+        cache.put(key, [_org(1, 50.0)], [1], cache.version)
+        assert [result.org.id for result in cache.get(key)] == [1]
+    with patch("app.api.building.cache.time.monotonic", return_value=111.0):
+        assert cache.get(key) is None
+
+    assert (cache.hits, cache.misses, len(cache)) == (1, 2, 0)
+
+
+def test_lru_eviction_by_memory():
+    cache = GeoCache(max_bytes=2 * (512 + 1024))
+    keys = [cache.key(55.0 + i, 37.0, 500, 10) for i in range(3)]
+    for i, key in enumerate(keys[:2]):
+        cache.put(key, [_org(i, 10.0)], [i], cache.version)
+    cache.get(keys[0])  # первая запись становится самой свежей
+    cache.put(keys[2], [_org(2, 10.0)], [2], cache.version)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert cache.memory_bytes <= cache.max_bytes
+
+
+def test_invalidate_by_buildings_orgs_and_points():
+    cache = GeoCache()
+    near = cache.key(55.0, 37.0, 500, 10)
+    far = cache.key(56.0, 38.0, 500, 10)
+    cache.put(near, [_org(1, 50.0)], [10, 11], cache.version)
+    cache.put(far, [_org(2, 50.0)], [20], cache.version)
+
+    cache.invalidate(building_ids=[11])
+    assert cache.get(near) is None and cache.get(far) is not None
+
+    cache.put(near, [_org(1, 50.0)], [10], cache.version)
+    cache.invalidate(org_ids=[2])
+    assert cache.get(far) is None and cache.get(near) is not None
+
+    cache.invalidate(points=[(55.002, 37.0)])  # новое здание в ~220 м от центра
+    assert cache.get(near) is None
+
+
+def test_activity_rename_and_delete_invalidate_by_name():
+    cache = GeoCache()
+    dairy = cache.key(55.0, 37.0, 500, 10)
+    meat = cache.key(56.0, 38.0, 500, 10)
+    session = MagicMock()
+    session.sync_session.info = {}
+    session.sync_session.in_nested_transaction.return_value = False
+    rows = [
+        SimpleNamespace(id=1, name="Молочка", old_name="Молочная продукция", parent_id=None, old_parent_id=None),
+        SimpleNamespace(id=2, name="Мясная продукция", old_name="Мясная продукция", parent_id=None, old_parent_id=None),
+    ]
+
+    with patch("app.api.activity.dao.geo_cache", cache):
+        cache.put(dairy, [_org(1, 50.0, ["Молочная продукция"])], [1], cache.version)
+        cache.put(meat, [_org(2, 50.0, ["Мясная продукция"])], [2], cache.version)
+        ActivityDao._after_update(session, rows)
+        _run_after_commit(session.sync_session)
+        assert cache.get(dairy) is None and cache.get(meat) is not None
+
+        ActivityDao._after_delete(session, rows[1:])
+        _run_after_commit(session.sync_session)
+        assert cache.get(meat) is None
+
+
+def test_put_is_skipped_after_concurrent_write():
+    cache = GeoCache()
+    key = cache.key(55.0, 37.0, 500, 10)
+    version = cache.version
+    cache.invalidate(points=[(0.0, 0.0)])
+    cache.put(key, [_org(1, 50.0)], [1], version)
+
+    assert cache.get(key) is None
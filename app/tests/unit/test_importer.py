@@ -0,0 +1,82 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.api.importer.reader import iter_lines, iter_rows
+from app.api.importer.schemas import BuildingImportRow, ImportResult, LinkImportRow, OrganizationImportRow
+from app.dependencies.auth_dep import get_current_admin_user_cookie
+
+
+async def _chunks(data: bytes, size: int = 3):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+async def _collect(iterator):
+    return [item async for item in iterator]
+
+
+@pytest.mark.asyncio
+async def test_lines_survive_chunk_boundaries():
+    # куски по 3 байта режут и строки, и двухбайтовые символы UTF-8
+    data = "﻿адрес\r\nдом 1\n\nпоследняя".encode()
+
+    lines = await _collect(iter_lines(_chunks(data)))
+
+    assert lines == [(1, "адрес"), (2, "дом 1"), (3, ""), (4, "последняя")]
+
+
+@pytest.mark.asyncio
+async def test_csv_rows_with_errors_keep_line_numbers():
+    data = (
+        "id,name,phone_numbers,building_id\n"
+        ',"ООО ""Рога""",2-222-222;8-923-666-13-13,1\n'
+        "\n"
+        "5,Копыта,1-1,1\n"
+        "6,Лишнее,2-222-222,1,x\n"
+    ).encode()
+
+    rows = await _collect(iter_rows(_chunks(data, 16), "csv", OrganizationImportRow))
+
+    assert [line for line, _ in rows] == [2, 4, 5]
+    first = rows[0][1]
+    assert (first.id, first.name, first.phone_numbers) == (None, 'ООО "Рога"', ["2-222-222", "8-923-666-13-13"])
+    assert rows[1][1].startswith("phone_numbers:")
+    assert "__extra__" in rows[2][1]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_rows():
+    data = b'{"organization_id": 1, "activity_id": 2}\n{"organization_id": 1\n{"organization_id": 1, "activity_id": 3}'
+
+    rows = await _collect(iter_rows(_chunks(data), "ndjson", LinkImportRow))
+
+    assert rows[0] == (1, LinkImportRow(organization_id=1, activity_id=2))
+    assert rows[1][0] == 2 and isinstance(rows[1][1], str)
+    assert rows[2] == (3, LinkImportRow(organization_id=1, activity_id=3))
+
+
+def test_row_schemas():
+    assert OrganizationImportRow.model_validate(
+        {"name": "a", "phone_numbers": '["2-222-222"]', "building_id": "3"},
+    ).phone_numbers == ["2-222-222"]
+    assert (
+        BuildingImportRow.model_validate({"id": "", "address": "Блюхера, 32/1", "latitude": "55", "longitude": "37"}).id
+        is None
+    )
+    with pytest.raises(ValueError):
+        BuildingImportRow.model_validate({"id": "0", "address": "Блюхера, 32/1", "latitude": "55", "longitude": "37"})
+
+
+@pytest.mark.asyncio
+async def test_import_requires_admin(_app, client):
+    body = b"address,latitude,longitude\n"
+    result = ImportResult(kind="buildings", rows=0, inserted=0, updated=0, skipped=0, errors=[])
+    with patch("app.api.importer.dao.BuildingImportDao.import_stream", return_value=result) as import_stream:
+        anonymous = await client.post("/v1/import/buildings", content=body)
+        _app.dependency_overrides[get_current_admin_user_cookie] = lambda: MagicMock()
+        admin = await client.post("/v1/import/buildings", content=body)
+
+    assert anonymous.status_code == 400  # нет токена
+    assert admin.status_code == 200
+    import_stream.assert_called_once()
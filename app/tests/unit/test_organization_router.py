@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.dao.pagination import Page
+
+
+@pytest.mark.parametrize(
+    "ids, expected_status, expected_ids",
+    [
+        ("3,1,2", 200, [3, 1, 2]),
+        ("5, 7,", 200, [5, 7]),
+        ("1,abc", 422, None),
+        (",".join(["1"] * 101), 422, None),
+    ],
+    ids=["order kept", "spaces and trailing comma", "not a number", "too many"],
+)
+@pytest.mark.asyncio
+async def test_get_organizations_by_ids(client, ids, expected_status, expected_ids):
+    with patch("app.api.organization.dao.OrganizationDao.get_orgs_by_ids", return_value=[]) as mock_get:
+        response = await client.get("/v1/organizations/", params={"ids": ids})
+
+    assert response.status_code == expected_status
+    if expected_ids is not None:
+        assert mock_get.call_args.args[1] == expected_ids
+    else:
+        mock_get.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "number, expected_status",
+    [
+        ("8-923-666-13-13", 200),
+        ("+7-923-666-13-13", 200),
+        ("2-222-222", 200),
+        ("89236661313", 422),
+        ("8-923", 422),
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_organizations_by_phone_accepts_schema_formats(client, number, expected_status):
+    with patch("app.api.organization.dao.OrganizationDao.get_orgs_by_phone", return_value=Page([])) as mock_get:
+        response = await client.get("/v1/organizations/by-phone", params={"number": number})
+
+    assert response.status_code == expected_status
+    assert mock_get.called == (expected_status == 200)
@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+from typing import NamedTuple
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.api.activity.dao import ActivityDao
+from app.api.building.dao import BuildingDao
+from app.dao.pagination import decode_cursor, encode_cursor, keyset, Page, PageParams, to_page
+from app.models import Organization
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(0.8333333134651184, 42)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, float, int) == (0.8333333134651184, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "не-base64", encode_cursor(1, 2, 3), encode_cursor("x", 1)])
+def test_bad_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, float, int)
+
+    assert exc_info.value.status_code == 400
+
+
+def test_keyset_filters_after_cursor_and_fetches_one_extra():
+    query = select(Organization.id, Organization.name)
+    page = PageParams(cursor=encode_cursor("Рога", 7), limit=20)
+
+    sql = str(
+        keyset(query, [Organization.name, Organization.id], page, str, int).compile(dialect=postgresql.dialect()),
+    )
+
+    assert "(organizations.name, organizations.id) > (%(param_1)s, %(param_2)s)" in sql
+    assert sql.endswith("ORDER BY organizations.name, organizations.id \n LIMIT %(param_3)s")
+
+
+def test_to_page_cursor_and_total_headers():
+    Row = NamedTuple("Row", [("id", int), ("total", int)])
+    rows = [Row(i, 5) for i in range(1, 4)]
+
+    page = to_page(rows, PageParams(limit=2, with_total=True), lambda row: (row[0],))
+    last = to_page(rows, PageParams(limit=3), lambda row: (row[0],))
+
+    assert [row[0] for row in page.items] == [1, 2]
+    assert decode_cursor(page.next_cursor, int) == (2,)
+    assert page.headers == {"X-Next-Cursor": page.next_cursor, "X-Total-Count": "5"}
+    assert last.next_cursor is None and last.headers == {}
+
+
+@pytest.mark.asyncio
+async def test_radius_pages_follow_rounded_cursor_order():
+    # A (id 10, 100.01 м) ближе B (id 5, 100.04 м), но оба в ответе 100.0 м: порядок по id, как у курсора
+    orgs = {1: SimpleNamespace(id=10, building_id=1), 2: SimpleNamespace(id=5, building_id=2)}
+
+    async def buildings():
+        for building_id, distance in ((1, 100.01), (2, 100.04)):
+            yield building_id, distance
+
+    async def load_orgs(session, distances, activity=None):
+        return [(orgs[building_id], distance) for building_id, distance in distances.items()]
+
+    with patch.object(BuildingDao, "_load_orgs", side_effect=load_orgs):
+        first = await BuildingDao._collect_nearest_orgs(None, buildings(), 1)
+        second = await BuildingDao._collect_nearest_orgs(None, buildings(), 1, after=(100.0, first[0][0].id))
+
+    assert [org.id for org, _ in first + second] == [5, 10]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("cursor", "exists", "status_code"),
+    [(encode_cursor(100), False, None), (None, True, None), (None, False, 404)],
+)
+async def test_empty_activity_page_is_404_only_for_unknown_activity(cursor, exists, status_code):
+    session = MagicMock(scalar=AsyncMock(return_value=exists))
+
+    with patch("app.api.activity.dao.fetch_json", AsyncMock(return_value=Page("[]"))):
+        try:
+            result_page = await ActivityDao.get_orgs_by_activity_name(session, "Еда", page=PageParams(cursor=cursor))
+        except HTTPException as e:
+            assert e.status_code == status_code
+        else:
+            assert status_code is None
+            assert (result_page.items, result_page.headers) == ("[]", {})
+    # существование проверяется только для первой страницы
+    assert session.scalar.await_count == (cursor is None)
@@ -0,0 +1,16 @@
+import pytest
+
+from app.core.phones import canonical_phone
+
+
+@pytest.mark.parametrize(
+    "number, expected",
+    [
+        ("2-222-222", "2222222"),
+        ("8-923-666-13-13", "79236661313"),
+        ("+7-923-666-13-13", "79236661313"),
+        ("8-800-5555-3535-12", "88005555353512"),
+    ],
+)
+def test_canonical_phone(number, expected):
+    assert canonical_phone(number) == expected
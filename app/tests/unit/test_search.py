@@ -0,0 +1,35 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.api.search.dao import like_prefix
+from app.dao.pagination import Page
+
+
+def test_like_prefix_escapes_wildcards():
+    assert like_prefix("50%_off\\") == "50\\%\\_off\\\\%"
+
+
+@pytest.mark.parametrize(
+    "params, expected_status, expected_order",
+    [
+        ({"activity": "Еда", "latitude": 55.7, "longitude": 37.6, "radius": 2000}, 200, "distance"),
+        ({"activity": "Еда", "name": "Рога"}, 200, "relevance"),
+        ({"activity": "Еда"}, 200, None),
+        ({}, 422, None),
+        ({"activity": "Еда", "latitude": 55.7}, 422, None),
+        ({"activity": "Еда", "order": "distance"}, 422, None),
+        ({"latitude": 55.7, "longitude": 37.6, "radius": 2000, "order": "relevance"}, 422, None),
+    ],
+    ids=["geo by distance", "name by relevance", "by id", "no filters", "partial geo", "no geo", "no name"],
+)
+@pytest.mark.asyncio
+async def test_search_filters(client, params, expected_status, expected_order):
+    with patch("app.api.search.router.SearchDao.search_orgs", return_value=Page([])) as mock_search:
+        response = await client.get("/v1/search/organizations", params=params)
+
+    assert response.status_code == expected_status
+    if expected_status == 200:
+        assert mock_search.call_args.args[1].order == expected_order
+    else:
+        mock_search.assert_not_called()
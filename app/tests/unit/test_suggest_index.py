@@ -0,0 +1,142 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.api.organization.dao import OrganizationDao
+from app.api.suggest.index import ACTIVITY, MIN_RECENT_KEYS, ORGANIZATION, SuggestIndex
+from app.dao.hooks import _run_after_commit
+
+
+def _index():
+    index = SuggestIndex()
+    index.build(
+        [
+            (ORGANIZATION, "ООО “Рога и Копыта”"),
+            (ORGANIZATION, "ООО “Рога и Копыта”"),
+            (ORGANIZATION, "ЗАО “Светлый путь”"),
+            (ACTIVITY, "Молочная продукция"),
+            (ACTIVITY, "Мясная продукция"),
+            (ACTIVITY, "Ёлки"),
+        ],
+    )
+    return index
+
+
+def test_suggest_by_word_start_case_insensitive():
+    index = _index()
+
+    assert index.suggest("рог") == [(ORGANIZATION, "ООО “Рога и Копыта”", 2)]
+    assert index.suggest("ПРОД") == [(ACTIVITY, "Мясная продукция", 1), (ACTIVITY, "Молочная продукция", 1)]
+    assert index.suggest("елк") == [(ACTIVITY, "Ёлки", 1)]
+    assert index.suggest("ога") == []
+
+
+def test_suggest_ranks_before_limit():
+    index = SuggestIndex()
+    index.build(
+        [
+            (ORGANIZATION, "Аптека на Ленина"),
+            (ORGANIZATION, "Аптека"),
+            (ORGANIZATION, "Аптеки города"),
+            (ORGANIZATION, "Аптеки города"),
+            (ORGANIZATION, "Городская аптека"),
+            (ORGANIZATION, "Городская аптека"),
+            (ORGANIZATION, "Городская аптека"),
+        ],
+    )
+
+    # точное совпадение, затем с начала названия по популярности и длине, затем с начала другого слова
+    assert [name for _, name, _ in index.suggest("аптека")] == ["Аптека", "Аптека на Ленина", "Городская аптека"]
+    assert [name for _, name, _ in index.suggest("апт", limit=3)] == ["Аптеки города", "Аптека", "Аптека на Ленина"]
+
+
+def test_suggest_limit_counts_unique_names():
+    index = _index()
+
+    assert len(index.suggest("м", limit=1)) == 1
+    assert index.suggest("ооо", limit=5) == [(ORGANIZATION, "ООО “Рога и Копыта”", 2)]
+
+
+def test_add_and_remove():
+    index = _index()
+    index.add(ORGANIZATION, ["ИП “Надежда”"])
+    index.add(ACTIVITY, [f"Вид {i}" for i in range(100)])  # пачка — в свежие ключи
+
+    assert index.suggest("надеж") == [(ORGANIZATION, "ИП “Надежда”", 1)]
+    assert len(index.suggest("вид", limit=50)) == 50
+    assert index.suggest("рог") == [(ORGANIZATION, "ООО “Рога и Копыта”", 2)]
+
+    index.remove(ORGANIZATION, ["ООО “Рога и Копыта”"])
+    assert index.suggest("коп") == [(ORGANIZATION, "ООО “Рога и Копыта”", 1)]
+    index.remove(ORGANIZATION, ["ООО “Рога и Копыта”"])
+    assert index.suggest("коп") == []
+
+
+def test_recent_keys_are_merged_into_main():
+    index = _index()
+    index.add(ORGANIZATION, ["Аптека"])
+    assert index._recent_keys
+
+    index.add(ACTIVITY, [f"Вид {i}" for i in range(MIN_RECENT_KEYS)])  # переполнение — одним слиянием
+
+    assert not index._recent_keys
+    assert index._keys == sorted(index._keys)
+    assert index.suggest("апт") == [(ORGANIZATION, "Аптека", 1)]
+    index.remove(ORGANIZATION, ["Аптека"])
+    assert index.suggest("апт") == []
+
+
+def test_add_is_ignored_until_loaded():
+    index = SuggestIndex()
+    index.add(ORGANIZATION, ["ИП “Надежда”"])
+
+    assert index.suggest("надеж") == []
+
+
+def test_rename_moves_suggestion_after_commit():
+    index = _index()
+    session = MagicMock()
+    session.sync_session.info = {}
+    session.sync_session.in_nested_transaction.return_value = False
+    rows = [
+        SimpleNamespace(id=1, building_id=1, name="ИП “Надежда”", old_name="ЗАО “Светлый путь”"),
+        SimpleNamespace(id=2, building_id=1, name="ООО “Рога и Копыта”", old_name="ООО “Рога и Копыта”"),
+    ]
+
+    with patch("app.api.organization.dao.suggest_index", index):
+        OrganizationDao._after_update(session, rows)
+        _run_after_commit(session.sync_session)
+
+    assert index.suggest("свет") == []
+    assert index.suggest("надеж") == [(ORGANIZATION, "ИП “Надежда”", 1)]
+    assert index.suggest("рог") == [(ORGANIZATION, "ООО “Рога и Копыта”", 2)]
+
+
+def test_update_returns_old_name():
+    # подзапрос в RETURNING видит строку до изменения
+    (*_, old_name) = OrganizationDao._returning()
+
+    sql = str(old_name.compile(dialect=postgresql.dialect()))
+
+    assert sql == '(SELECT "old".name \nFROM organizations AS "old" \nWHERE "old".id = organizations.id)'
+
+
+@pytest.mark.asyncio
+async def test_changes_during_load_are_replayed():
+    index = _index()
+
+    async def scalars(query):
+        if not index._recorders[0]:
+            # пока идёт чтение из БД: организацию добавили, деятельность удалили
+            index.add(ORGANIZATION, ["ИП “Надежда”"])
+            index.remove(ACTIVITY, ["Ёлки"])
+            return ["Ёлки", "Мясная продукция"]
+        return ["ЗАО “Светлый путь”"]
+
+    await index.load(MagicMock(scalars=AsyncMock(side_effect=scalars)))
+
+    assert index.suggest("надеж") == [(ORGANIZATION, "ИП “Надежда”", 1)]
+    assert index.suggest("елк") == []
+    assert index.suggest("свет") == [(ORGANIZATION, "ЗАО “Светлый путь”", 1)]
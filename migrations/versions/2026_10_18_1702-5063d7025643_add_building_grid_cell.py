@@ -0,0 +1,47 @@
+"""add building grid cell
+
+Revision ID: 5063d7025643
+Revises: 6d47811ec40d
+Create Date: 2026-10-18 17:02:26.943630
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5063d7025643'
+down_revision: Union[str, None] = '6d47811ec40d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # вычисляемая колонка: ADD COLUMN ... STORED сам заполняет её для существующих строк
+    op.add_column(
+        'buildings',
+        sa.Column(
+            'grid_cell',
+            sa.Integer(),
+            sa.Computed(
+                '(floor((latitude + 90) / 0.01::float8) * 36000 + floor((longitude + 180) / 0.01::float8))::integer',
+                persisted=True,
+            ),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        'ix_buildings_grid_cell',
+        'buildings',
+        ['grid_cell'],
+        unique=False,
+        postgresql_include=['latitude', 'longitude'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_buildings_grid_cell', table_name='buildings')
+    op.drop_column('buildings', 'grid_cell')
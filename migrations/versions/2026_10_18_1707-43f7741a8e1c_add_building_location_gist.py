@@ -0,0 +1,55 @@
+"""add building location gist
+
+Revision ID: 43f7741a8e1c
+Revises: 5063d7025643
+Create Date: 2026-10-18 17:07:26.848019
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '43f7741a8e1c'
+down_revision: Union[str, None] = '5063d7025643'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # встроенный point (без PostGIS); вычисляемая колонка заполняется для существующих строк при добавлении
+    op.execute(
+        'ALTER TABLE buildings ADD COLUMN location point GENERATED ALWAYS AS (point(longitude, latitude)) STORED'
+    )
+    op.create_index('ix_buildings_location', 'buildings', ['location'], unique=False, postgresql_using='gist')
+
+    # радиусный поиск переходит на GiST-индекс по location; ячейки сетки больше никто не читает
+    op.drop_index('ix_buildings_grid_cell', table_name='buildings')
+    op.drop_column('buildings', 'grid_cell')
+
+
+def downgrade() -> None:
+    op.add_column(
+        'buildings',
+        sa.Column(
+            'grid_cell',
+            sa.Integer(),
+            sa.Computed(
+                '(floor((latitude + 90) / 0.01::float8) * 36000 + floor((longitude + 180) / 0.01::float8))::integer',
+                persisted=True,
+            ),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        'ix_buildings_grid_cell',
+        'buildings',
+        ['grid_cell'],
+        unique=False,
+        postgresql_include=['latitude', 'longitude'],
+    )
+    op.drop_index('ix_buildings_location', table_name='buildings', postgresql_using='gist')
+    op.drop_column('buildings', 'location')
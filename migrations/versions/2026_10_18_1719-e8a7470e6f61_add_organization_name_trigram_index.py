@@ -0,0 +1,35 @@
+"""add organization name trigram index
+
+Revision ID: e8a7470e6f61
+Revises: 38c428236da3
+Create Date: 2026-10-18 17:19:58.839556
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a7470e6f61'
+down_revision: Union[str, None] = '38c428236da3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_organizations_name_trgm',
+        'organizations',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    # расширение не удаляем: им могут пользоваться другие объекты БД
+    op.drop_index('ix_organizations_name_trgm', table_name='organizations')
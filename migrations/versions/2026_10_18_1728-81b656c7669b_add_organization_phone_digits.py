@@ -0,0 +1,68 @@
+"""add organization phone digits
+
+Revision ID: 81b656c7669b
+Revises: e8a7470e6f61
+Create Date: 2026-10-18 17:28:55.339345
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '81b656c7669b'
+down_revision: Union[str, None] = 'e8a7470e6f61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PHONE_DIGITS_FUNCTION = r"""
+CREATE FUNCTION organization_phone_digits(phone_numbers jsonb) RETURNS text[]
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+AS $$
+    SELECT coalesce(array_agg(regexp_replace(regexp_replace(number, '\D', '', 'g'), '^8(\d{10})$', '7\1')), '{}')
+    FROM jsonb_array_elements_text(phone_numbers) AS number
+$$
+"""
+
+
+def upgrade() -> None:
+    op.alter_column(
+        'organizations',
+        'phone_numbers',
+        existing_type=postgresql.JSON(astext_type=sa.Text()),
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        existing_nullable=False,
+        postgresql_using='phone_numbers::jsonb',
+    )
+    # каноническая форма номеров (см. app.core.phones.canonical_phone); функция неизменяемая —
+    # её можно использовать в вычисляемой колонке, ADD COLUMN ... STORED заполнит колонку для существующих строк
+    op.execute(PHONE_DIGITS_FUNCTION)
+    op.add_column(
+        'organizations',
+        sa.Column(
+            'phone_digits',
+            postgresql.ARRAY(sa.Text()),
+            sa.Computed('organization_phone_digits(phone_numbers)', persisted=True),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        'ix_organizations_phone_digits', 'organizations', ['phone_digits'], unique=False, postgresql_using='gin'
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_organizations_phone_digits', table_name='organizations', postgresql_using='gin')
+    op.drop_column('organizations', 'phone_digits')
+    op.execute('DROP FUNCTION organization_phone_digits(jsonb)')
+    op.alter_column(
+        'organizations',
+        'phone_numbers',
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        type_=postgresql.JSON(astext_type=sa.Text()),
+        existing_nullable=False,
+    )
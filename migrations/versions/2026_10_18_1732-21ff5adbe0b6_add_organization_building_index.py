@@ -0,0 +1,26 @@
+"""add organization building index
+
+Revision ID: 21ff5adbe0b6
+Revises: 81b656c7669b
+Create Date: 2026-10-18 17:32:08.504851
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '21ff5adbe0b6'
+down_revision: Union[str, None] = '81b656c7669b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_organizations_building_id', 'organizations', ['building_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_organizations_building_id', table_name='organizations')